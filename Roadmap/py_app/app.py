@@ -5,6 +5,9 @@ from pathlib import Path
 
 # ----- importy interních částí -----
 from py_app.core.utils import load_roadmap, default_roadmap_path
+from py_app.core.progress import bind_roadmap, apply_roadmap_diff
+from py_app.core import analytics
+from py_app.core.hot_reload import RoadmapWatcher, add_reload_listener
 from py_app.screens.home_screen import create_home_view
 from py_app.screens.profile_screen import create_profile_view
 from py_app.screens.settings_screen import create_settings_view
@@ -47,8 +50,11 @@ def main(page: ft.Page) -> None:
     # --- Načtení dat roadmapy ---
     roadmap_path = default_roadmap_path()
     roadmap_model = load_roadmap(roadmap_path)
+    bind_roadmap(roadmap_model)
+    analytics.enable()
 
     selected_index: int = 0
+    open_category: tuple | None = None   # (id, name) otevřené kategorie
     body = ft.Container(expand=True)
 
     # ===== FACTORY funkce pro obrazovky =====
@@ -62,6 +68,9 @@ def main(page: ft.Page) -> None:
         return create_settings_view(page)
 
     def _open_category(category_id: str, category_name: str) -> None:
+        nonlocal open_category
+        open_category = (category_id, category_name)
+
         def _back():
             _show(0)
 
@@ -70,8 +79,9 @@ def main(page: ft.Page) -> None:
         page.update()
 
     def _show(idx: int) -> None:
-        nonlocal selected_index
+        nonlocal selected_index, open_category
         selected_index = idx
+        open_category = None
 
         if idx == 0:
             view = _home()
@@ -96,5 +106,27 @@ def main(page: ft.Page) -> None:
         bgcolor=ft.colors.with_opacity(0.06, ft.colors.ON_SURFACE),
     )
 
+    # --- Hot-reload roadmap.json: změny obsahu se projeví bez restartu ---
+    def _on_roadmap_reload(rm, diff) -> None:
+        if rm is not roadmap_model:
+            return
+        if open_category is not None:
+            # kategorii překreslíme jen, pokud se změna týká jejího tracku
+            if diff.structure or open_category[0] in diff.tracks:
+                _open_category(*open_category)
+        else:
+            _show(selected_index)
+
+    def _on_ui(fn) -> None:
+        # přepis modelu + překreslení až ve smyčce stránky, ne ve vlákně watcheru;
+        # async handlery obrazovek tak model nikdy neuvidí rozepsaný
+        async def _run():
+            fn()
+        page.run_task(_run)
+
+    add_reload_listener(apply_roadmap_diff)
+    add_reload_listener(_on_roadmap_reload)
+    RoadmapWatcher(roadmap_path, roadmap_model, dispatch=_on_ui).start()
+
     page.add(body, nav)
     _show(0)
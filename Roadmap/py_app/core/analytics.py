@@ -0,0 +1,291 @@
+# py_app/core/analytics.py
+from __future__ import annotations
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import datetime as dt
+import io
+import json
+import os
+import threading
+
+import numpy as np
+
+from . import progress as _pg
+from .storage import atomic_write_bytes
+
+try:  # advisory locking je jen na POSIXu; na Windows běžíme bez zámků
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+# Analytická pipeline nad proudem operací z progress vrstvy:
+#   1) každá uložená operace se připíše jako řádek do spoolu (events.jsonl)
+#   2) refresh() přečte spool, uloží ho jako další sloupcový NPZ chunk,
+#      inkrementálně přičte denní / týdenní / měsíční rollupy a spool zkrátí
+#   3) čtení grafu = rollupy + ještě nezpracovaný spool v paměti, nic nezapisuje
+#
+# Sloupce: day (ordinal data), type (kód), amount, track, node (indexy do slovníků).
+#
+# Odolnost proti pádu a souběhu (více workerů, viz progress_store.py):
+#   - append i refresh běží pod fcntl zámkem složky (<root>/.lock)
+#   - jediný bod potvrzení je meta.json (atomický zápis): seznam chunků,
+#     slovníky, rollupy a pozice ve spoolu (offset + inode souboru)
+#   - chunky mají nerecyklovaná čísla; nový chunk se zapíše dřív, než ho
+#     meta.json uvede, staré se mažou až po potvrzení → pád nic neztratí ani
+#     nezapočte dvakrát
+#   - zkrácení spoolu = nový soubor přes os.replace; jiný inode, než zná
+#     meta.json, znamená „spool už je zkrácený, čti od začátku“
+
+EVENT_TYPES: Tuple[str, ...] = ("xp", "node", "task_done", "task_undone", "badge")
+PERIODS: Tuple[str, ...] = ("day", "week", "month")
+_MAX_CHUNKS = 32
+
+
+def _period_key(period: str, day: dt.date) -> str:
+    if period == "day":
+        return day.isoformat()
+    if period == "week":
+        y, w, _ = day.isocalendar()
+        return f"{y}-W{w:02d}"
+    return f"{day.year}-{day.month:02d}"
+
+
+class AnalyticsStore:
+    """Sloupcová historie a rollupy jednoho uživatele (složka `root`)."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.spool = self.root / "events.jsonl"
+        self.meta_path = self.root / "meta.json"
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self, shared: bool = False) -> Iterator[None]:
+        """Zámek složky napříč vlákny i procesy (shared = jen čtení)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.root / ".lock", "a+b") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    # ---------- zápis ----------
+    def append(self, op: Dict[str, Any]) -> None:
+        kind = op.get("type")
+        if kind == "task":
+            kind = "task_done" if op.get("done") else "task_undone"
+        if kind not in EVENT_TYPES:
+            return
+        node = op.get("node")
+        meta = _pg._NODE_META.get(str(node)) if node is not None else None
+        row = {
+            "date": op.get("date") or _pg._today_str(),
+            "type": kind,
+            "amount": int(op.get("amount", 1)),
+            "node": node or "",
+            "track": meta[0] if meta else "",
+        }
+        with self._locked(), self.spool.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    # ---------- stav ----------
+    def _load_meta(self) -> Dict[str, Any]:
+        if self.meta_path.exists():
+            return json.loads(self.meta_path.read_text(encoding="utf-8"))
+        return {"offset": 0, "spool_ino": None, "chunks": [], "next_chunk": 0,
+                "tracks": [""], "nodes": [""], "rollups": {p: {} for p in PERIODS}}
+
+    def _commit(self, meta: Dict[str, Any]) -> None:
+        atomic_write_bytes(self.meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    def _chunk_path(self, i: int) -> Path:
+        return self.root / f"events-{i:05d}.npz"
+
+    def _write_chunk(self, i: int, cols: Dict[str, np.ndarray]) -> None:
+        buf = io.BytesIO()
+        np.savez(buf, **cols)
+        atomic_write_bytes(self._chunk_path(i), buf.getvalue())
+
+    # ---------- inkrementální zpracování ----------
+    def _pending(self, meta: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int, Optional[int]]:
+        """Nezpracované celé řádky spoolu, offset za posledním z nich a inode spoolu."""
+        try:
+            with self.spool.open("rb") as f:
+                ino = os.fstat(f.fileno()).st_ino
+                # jiný inode → spool se po potvrzení zkrátil, čteme od začátku
+                start = int(meta.get("offset", 0)) if ino == meta.get("spool_ino") else 0
+                f.seek(start)
+                tail = f.read()
+        except FileNotFoundError:
+            return [], 0, None
+        end = tail.rfind(b"\n") + 1            # poslední řádek může být rozepsaný
+        rows = [json.loads(line) for line in tail[:end].decode("utf-8").splitlines() if line.strip()]
+        return rows, start + end, ino
+
+    def _truncate_spool(self, meta: Dict[str, Any]) -> None:
+        """Zahodí zpracovaný začátek spoolu (volá se pod zámkem, po potvrzení meta)."""
+        with self.spool.open("rb") as f:
+            f.seek(int(meta["offset"]))
+            rest = f.read()
+        atomic_write_bytes(self.spool, rest)
+        meta["offset"] = 0
+        meta["spool_ino"] = self.spool.stat().st_ino
+        self._commit(meta)
+
+    def refresh(self) -> int:
+        """Zpracuje nové řádky spoolu a spool zkrátí. Vrací počet nových událostí."""
+        with self._locked():
+            meta = self._load_meta()
+            rows, offset, ino = self._pending(meta)
+            meta["offset"], meta["spool_ino"] = offset, ino
+            if not rows:
+                return 0
+
+            tracks: List[str] = meta["tracks"]
+            nodes: List[str] = meta["nodes"]
+            t_idx = {t: i for i, t in enumerate(tracks)}
+            n_idx = {n: i for i, n in enumerate(nodes)}
+
+            def code(vocab: List[str], index: Dict[str, int], value: str) -> int:
+                if value not in index:
+                    index[value] = len(vocab)
+                    vocab.append(value)
+                return index[value]
+
+            days = np.fromiter((dt.date.fromisoformat(r["date"]).toordinal() for r in rows), dtype=np.int32, count=len(rows))
+            cols = {
+                "day": days,
+                "type": np.fromiter((EVENT_TYPES.index(r["type"]) for r in rows), dtype=np.int8, count=len(rows)),
+                "amount": np.fromiter((r["amount"] for r in rows), dtype=np.int32, count=len(rows)),
+                "track": np.fromiter((code(tracks, t_idx, r["track"]) for r in rows), dtype=np.int32, count=len(rows)),
+                "node": np.fromiter((code(nodes, n_idx, r["node"]) for r in rows), dtype=np.int32, count=len(rows)),
+            }
+            # chunk s dosud nepoužitým číslem; dokud ho meta neuvede, nepočítá se
+            chunk = int(meta["next_chunk"])
+            self._write_chunk(chunk, cols)
+            meta["chunks"].append(chunk)
+            meta["next_chunk"] = chunk + 1
+            self._add_to_rollups(meta["rollups"], rows)
+            self._commit(meta)
+
+            self._truncate_spool(meta)
+            if len(meta["chunks"]) > _MAX_CHUNKS:
+                self._compact(meta)
+            return len(rows)
+
+    @staticmethod
+    def _add_to_rollups(rollups: Dict[str, Any], rows: List[Dict[str, Any]]) -> None:
+        """rollups[period][klíč_periody][dimenze] = {"xp", "tasks", "nodes"}; dimenze: "*", "t:<track>", "n:<node>"."""
+        field = {"xp": "xp", "node": "nodes", "task_done": "tasks", "task_undone": "tasks"}
+        for r in rows:
+            name = field.get(r["type"])
+            if name is None:
+                continue
+            amount = r["amount"] if r["type"] != "task_undone" else -1
+            day = dt.date.fromisoformat(r["date"])
+            dims = ["*"]
+            if r["track"]:
+                dims.append("t:" + r["track"])
+            if r["node"]:
+                dims.append("n:" + r["node"])
+            for period in PERIODS:
+                bucket = rollups.setdefault(period, {}).setdefault(_period_key(period, day), {})
+                for d in dims:
+                    cell = bucket.setdefault(d, {"xp": 0, "tasks": 0, "nodes": 0})
+                    cell[name] += amount
+
+    def _compact(self, meta: Dict[str, Any]) -> None:
+        """Slije chunky do jednoho; staré se smažou až po potvrzení nového."""
+        old = list(meta["chunks"])
+        merged = int(meta["next_chunk"])
+        self._write_chunk(merged, self._read_chunks(old))
+        meta["chunks"] = [merged]
+        meta["next_chunk"] = merged + 1
+        self._commit(meta)
+        for i in old:
+            self._chunk_path(i).unlink(missing_ok=True)
+
+    # ---------- čtení ----------
+    def _read_chunks(self, ids: List[int]) -> Dict[str, np.ndarray]:
+        parts: Dict[str, List[np.ndarray]] = {}
+        for i in ids:
+            with np.load(self._chunk_path(i)) as z:
+                for k in z.files:
+                    parts.setdefault(k, []).append(z[k])
+        if not parts:
+            return {k: np.empty(0, dtype=np.int32) for k in ("day", "type", "amount", "track", "node")}
+        return {k: np.concatenate(v) for k, v in parts.items()}
+
+    def events(self) -> Dict[str, np.ndarray]:
+        """Celá zpracovaná historie jako sloupce (numpy pole stejné délky)."""
+        if not self.meta_path.exists():
+            return self._read_chunks([])
+        with self._locked(shared=True):
+            return self._read_chunks(self._load_meta()["chunks"])
+
+    def to_frame(self):
+        """Historie jako pandas DataFrame (date, type, amount, track, node)."""
+        import pandas as pd
+
+        meta = self._load_meta()
+        cols = self.events()
+        return pd.DataFrame({
+            "date": pd.to_datetime([dt.date.fromordinal(int(d)) for d in cols["day"]]),
+            "type": pd.Categorical.from_codes(cols["type"].astype(np.int64), EVENT_TYPES) if len(cols["type"]) else [],
+            "amount": cols["amount"],
+            "track": np.asarray(meta["tracks"], dtype=object)[cols["track"]] if len(cols["track"]) else [],
+            "node": np.asarray(meta["nodes"], dtype=object)[cols["node"]] if len(cols["node"]) else [],
+        })
+
+    def rollup(self, period: str = "week", dim: str = "*") -> Dict[str, Dict[str, int]]:
+        """{klíč_periody: {"xp", "tasks", "nodes"}} pro dimenzi "*", "t:<track>" nebo "n:<node>"."""
+        if not self.root.exists():
+            return {}
+        with self._locked(shared=True):
+            meta = self._load_meta()
+            rows, _, _ = self._pending(meta)
+        rollups = meta["rollups"]
+        self._add_to_rollups(rollups, rows)
+        data = rollups.get(period, {})
+        return {k: v[dim] for k, v in sorted(data.items()) if dim in v}
+
+
+# ====== napojení na progress vrstvu ======
+_STORES: Dict[Tuple[str, str], AnalyticsStore] = {}
+
+
+def analytics_for(user_id: Optional[str] = None) -> AnalyticsStore:
+    uid = str(user_id) if user_id is not None else _pg.current_user()
+    store = _pg._store()
+    path = store.path_for(uid)
+    root = store.root / "analytics" / (path.parent.name if uid != _pg.DEFAULT_USER else "") / path.stem
+    key = (str(store.root), uid)
+    if key not in _STORES or _STORES[key].root != root:
+        _STORES[key] = AnalyticsStore(root)
+    return _STORES[key]
+
+
+def _spool_op(user_id: str, op: Dict[str, Any]) -> None:
+    analytics_for(user_id).append(op)
+
+
+def enable() -> None:
+    """Začne exportovat proud operací progressu do analytického spoolu."""
+    _pg.add_op_listener(_spool_op)
+    # zbytek spoolu z minulého běhu → NPZ (čtení grafů už pak nic nezapisuje)
+    analytics_for().refresh()
+
+
+def weekly_xp(weeks: int = 8, track_id: Optional[str] = None) -> List[Tuple[str, int]]:
+    """XP za posledních `weeks` týdnů (včetně prázdných), volitelně jen pro jeden track."""
+    roll = analytics_for().rollup("week", "*" if track_id is None else f"t:{track_id}")
+    today = dt.date.today()
+    out: List[Tuple[str, int]] = []
+    for i in range(weeks - 1, -1, -1):
+        key = _period_key("week", today - dt.timedelta(weeks=i))
+        out.append((key, int(roll.get(key, {}).get("xp", 0))))
+    return out
@@ -0,0 +1,73 @@
+# py_app/core/badges.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from .events import ProgressEvent, XP_GAINED, NODE_COMPLETED, DAY_ROLLED
+
+XP_THRESHOLDS: Tuple[int, ...] = (100, 500, 1000)
+STREAK_THRESHOLDS: Tuple[int, ...] = (3, 7, 14, 30)
+
+
+@dataclass(frozen=True)
+class BadgeRule:
+    """
+    Deklarativní pravidlo odznaku.
+    - id:   ID odznaku; může obsahovat pole události, např. "track_{track}_complete"
+    - on:   typy událostí, po kterých má smysl pravidlo kontrolovat
+    - when: predikát nad (progress dokument, událost) – musí být O(1)
+    """
+    id: str
+    on: Tuple[str, ...]
+    when: Callable[[Dict[str, Any], ProgressEvent], bool]
+
+    def badge_id(self, ev: ProgressEvent) -> str:
+        return self.id.format(**ev._asdict()) if "{" in self.id else self.id
+
+
+def _at_least(field: str, value: int) -> Callable[[Dict[str, Any], ProgressEvent], bool]:
+    return lambda p, ev: int(p.get(field, 0)) >= value
+
+
+DEFAULT_RULES: List[BadgeRule] = (
+    [BadgeRule(f"xp_{th}", (XP_GAINED,), _at_least("xp", th)) for th in XP_THRESHOLDS]
+    + [BadgeRule(f"streak_{th}", (DAY_ROLLED,), _at_least("streak_days", th)) for th in STREAK_THRESHOLDS]
+    + [BadgeRule("track_{track}_complete", (NODE_COMPLETED,),
+                 lambda p, ev: ev.track is not None and ev.remaining == 0)]
+)
+
+
+class BadgeEngine:
+    """Pro každou událost vyhodnotí jen pravidla, která se k ní přihlásila."""
+
+    def __init__(self, rules: Iterable[BadgeRule] = ()):
+        self._by_event: Dict[str, List[BadgeRule]] = {}
+        for r in rules:
+            self.add_rule(r)
+
+    def add_rule(self, rule: BadgeRule) -> None:
+        for ev_type in rule.on:
+            self._by_event.setdefault(ev_type, []).append(rule)
+
+    def dispatch(self, p: Dict[str, Any], events: Iterable[ProgressEvent]) -> List[str]:
+        """
+        Udělí odznaky, jejichž pravidla události splnily. Nové odznaky zapíše do
+        p["badges"] i p["badges_unseen"] a vrátí je.
+        """
+        badges: List[str] = p.setdefault("badges", [])
+        owned = set(badges)
+        newly: List[str] = []
+        for ev in events:
+            for rule in self._by_event.get(ev.type, ()):
+                bid = rule.badge_id(ev)
+                if bid in owned or not rule.when(p, ev):
+                    continue
+                owned.add(bid)
+                newly.append(bid)
+        if newly:
+            badges.extend(newly)
+            p.setdefault("badges_unseen", []).extend(newly)
+        return newly
+
+
+engine = BadgeEngine(DEFAULT_RULES)
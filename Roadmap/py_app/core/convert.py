@@ -0,0 +1,64 @@
+# py_app/core/convert.py
+from __future__ import annotations
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import sys
+
+from .storage import (
+    BINARY_SUFFIX, KIND_PROGRESS, KIND_ROADMAP, binary_kind, decode_document, is_binary, write_document,
+)
+from .utils import load_roadmap, save_roadmap
+
+# Převod roadmapy / progressu mezi JSON a binárním formátem (core/storage.py).
+#
+#   python -m py_app.core.convert data/roadmap.json data/roadmap.bin
+#   python -m py_app.core.convert data/progress.bin progress.json --kind progress
+#
+# Cílový formát určuje přípona (.bin = binární), nebo --to json|binary.
+# Roadmapa jde přes load_roadmap → projde migracemi i validací.
+
+KINDS = {"roadmap": KIND_ROADMAP, "progress": KIND_PROGRESS}
+
+
+def _guess_kind(raw: bytes) -> str:
+    if is_binary(raw):
+        return "roadmap" if binary_kind(raw) == KIND_ROADMAP else "progress"
+    # roadmapa má vždy "nodes", progress nikdy
+    return "roadmap" if b'"nodes"' in raw else "progress"
+
+
+def convert(src: str | Path, dst: str | Path, kind: Optional[str] = None,
+            binary: Optional[bool] = None) -> str:
+    """Převede soubor; vrací druh dokumentu ("roadmap" / "progress")."""
+    src, dst = Path(src), Path(dst)
+    raw = src.read_bytes()
+    kind = kind or _guess_kind(raw)
+    if binary is None:
+        binary = dst.suffix == BINARY_SUFFIX
+    if kind == "roadmap":
+        save_roadmap(load_roadmap(src, use_compiled=False, cache=False), dst, binary=binary)
+    else:
+        write_document(dst, decode_document(raw, KIND_PROGRESS), KIND_PROGRESS, binary)
+    return kind
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m py_app.core.convert",
+                                 description="Převod roadmapy/progressu mezi JSON a binárním formátem.")
+    ap.add_argument("src", type=Path)
+    ap.add_argument("dst", type=Path)
+    ap.add_argument("--kind", choices=sorted(KINDS), help="druh dokumentu (jinak se odhadne)")
+    ap.add_argument("--to", choices=("json", "binary"), help="cílový formát (jinak podle přípony)")
+    args = ap.parse_args(argv)
+    try:
+        kind = convert(args.src, args.dst, args.kind, None if args.to is None else args.to == "binary")
+    except (OSError, ValueError) as e:
+        print(f"Chyba: {e}", file=sys.stderr)
+        return 1
+    print(f"{kind}: {args.src} → {args.dst} ({args.dst.stat().st_size} B)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
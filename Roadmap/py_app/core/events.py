@@ -0,0 +1,23 @@
+# py_app/core/events.py
+from __future__ import annotations
+from typing import NamedTuple, Optional
+
+# Typy událostí, které vznikají při mutacích progressu
+XP_GAINED = "xp_gained"
+NODE_COMPLETED = "node_completed"
+DAY_ROLLED = "day_rolled"
+
+
+class ProgressEvent(NamedTuple):
+    """
+    Jedna událost z mutace progressu.
+    - amount:    XP (xp_gained) nebo nová délka streaku (day_rolled)
+    - node_id:   uzel, kterého se událost týká
+    - track:     track uzlu (node_completed)
+    - remaining: kolik uzlů v tracku po této události ještě zbývá (node_completed)
+    """
+    type: str
+    amount: int = 0
+    node_id: Optional[str] = None
+    track: Optional[str] = None
+    remaining: Optional[int] = None
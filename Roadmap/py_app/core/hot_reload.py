@@ -0,0 +1,212 @@
+# py_app/core/hot_reload.py
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, FrozenSet, List, Optional, Tuple
+import hashlib
+import threading
+
+from .models import Roadmap
+from . import utils as _utils
+
+# Hot-reload roadmap.json bez restartu aplikace:
+#   1) RoadmapWatcher polluje (mtime_ns, size) souboru – žádná externí služba
+#   2) nový obsah se naparsuje a porovná se živou Roadmap podle id uzlů
+#   3) změny se promítnou DO živého objektu (obrazovky i callbacky ho sdílejí):
+#      změněné uzly přes Roadmap.replace_node (index + topo pořadí jen lokálně),
+#      přidané/odebrané uzly, změny tracků, hran či pořadí → index se postaví znovu
+#   4) posluchači (progress, recommender, obrazovky) dostanou RoadmapDiff
+# Cache layoutů/figur klíčované přes roadmap_hash se invalidují samy – hash se mění.
+#
+# Vlákna: watcher jen čte a parsuje soubor. Přepis živého modelu a posluchači
+# běží pod RELOAD_LOCK, a to ve vlákně, které určí `dispatch` (Flet: smyčka
+# stránky, viz app.py). Čtenáři z jiných vláken (Dash callbacky) drží
+# RELOAD_LOCK po dobu práce s modelem.
+
+RELOAD_LOCK = threading.RLock()
+
+
+@dataclass(frozen=True)
+class RoadmapDiff:
+    added: Tuple[str, ...] = ()
+    removed: Tuple[str, ...] = ()
+    changed: Tuple[str, ...] = ()             # stejné id, jiný obsah
+    prereqs_changed: Tuple[str, ...] = ()     # podmnožina changed
+    tracks: FrozenSet[str] = frozenset()      # tracky, kterých se změna týká
+    structure: bool = False                   # nutný plný rebuild indexu
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.structure)
+
+    @property
+    def touched(self) -> FrozenSet[str]:
+        return frozenset(self.added) | frozenset(self.removed) | frozenset(self.changed)
+
+
+def diff_roadmaps(old: Roadmap, new: Roadmap) -> RoadmapDiff:
+    """Porovná dvě verze roadmapy podle id uzlů (O(V) + porovnání změněných uzlů)."""
+    old_by_id = old.index.node_by_id
+    new_by_id = {n.id: n for n in new.nodes}
+
+    added = tuple(nid for nid in new_by_id if nid not in old_by_id)
+    removed = tuple(nid for nid in old_by_id if nid not in new_by_id)
+    changed: List[str] = []
+    prereqs_changed: List[str] = []
+    tracks = set()
+    for nid, n in new_by_id.items():
+        o = old_by_id.get(nid)
+        if o is None:
+            tracks.add(n.track)
+            continue
+        if o != n:
+            changed.append(nid)
+            tracks.update((o.track, n.track))
+            if o.prereqs != n.prereqs:
+                prereqs_changed.append(nid)
+    tracks.update(old_by_id[nid].track for nid in removed)
+
+    same_tracks = old.tracks == new.tracks
+    if not same_tracks:
+        tracks.update(t.id for t in old.tracks)
+        tracks.update(t.id for t in new.tracks)
+    structure = bool(
+        added or removed or not same_tracks or old.edges != new.edges
+        or [n.id for n in old.nodes] != [n.id for n in new.nodes]
+    )
+    return RoadmapDiff(added, removed, tuple(changed), tuple(prereqs_changed), frozenset(tracks), structure)
+
+
+def apply_diff(live: Roadmap, new: Roadmap, diff: RoadmapDiff) -> RoadmapDiff:
+    """
+    Promítne `new` do živého objektu `live` (reference držené UI zůstanou platné).
+    Vrací skutečně použitý diff (inkrementální přepis může skončit plným rebuildem).
+    """
+    live.metadata = new.metadata
+    live.learning_paths = new.learning_paths
+    if not diff.structure:
+        try:
+            for nid in diff.changed:
+                # edges se nezměnily (jinak by šlo o strukturu) → zůstanou podle souboru
+                live.replace_node(new.index.node_by_id[nid], sync_edges=False)
+        except ValueError:
+            # přechodný cyklus při postupném přepisu (např. otočená hrana) → plný rebuild
+            diff = RoadmapDiff(diff.added, diff.removed, diff.changed, diff.prereqs_changed, diff.tracks, True)
+    if diff.structure:
+        live.tracks = new.tracks
+        live.nodes = new.nodes
+        live.edges = new.edges
+        live._set_topo(list(new.topo_order))
+        live._index = None
+    live.schema_version = new.schema_version
+    live._source_hash = new._source_hash
+    return diff
+
+
+# ====== posluchači ======
+ReloadListener = Callable[[Roadmap, RoadmapDiff], None]
+_LISTENERS: List[ReloadListener] = []
+
+
+def add_reload_listener(fn: ReloadListener) -> None:
+    if fn not in _LISTENERS:
+        _LISTENERS.append(fn)
+
+
+def remove_reload_listener(fn: ReloadListener) -> None:
+    if fn in _LISTENERS:
+        _LISTENERS.remove(fn)
+
+
+def _notify(roadmap: Roadmap, diff: RoadmapDiff) -> None:
+    for fn in list(_LISTENERS):
+        try:
+            fn(roadmap, diff)
+        except Exception as e:  # posluchač nesmí shodit watcher
+            print(f"[ROADMAP] Chyba posluchače reloadu: {e}")
+
+
+Dispatch = Callable[[Callable[[], None]], None]
+
+
+class RoadmapWatcher:
+    """
+    Hlídá soubor roadmapy a změny promítá do živé Roadmap.
+    poll() lze volat ručně (testy, Dash interval), start() spustí daemon vlákno.
+    dispatch(fn) předá přepis modelu + posluchače jinému vláknu (UI); bez něj
+    běží přímo v poll().
+    """
+
+    def __init__(self, path: str | Path, roadmap: Roadmap, interval: float = 0.5,
+                 dispatch: Optional[Dispatch] = None):
+        self.path = Path(path)
+        self.roadmap = roadmap
+        self.interval = float(interval)
+        self.dispatch = dispatch
+        self._stamp = self._stat()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def poll(self) -> Optional[RoadmapDiff]:
+        """
+        Jedna kontrola; vrátí aplikovaný diff, nebo None (beze změny / chyba,
+        s dispatch vždy None – diff dostanou posluchači).
+        """
+        with self._lock:
+            stamp = self._stat()
+            if stamp is None or stamp == self._stamp:
+                return None
+            self._stamp = stamp
+            raw = self.path.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            if digest == self.roadmap._source_hash:
+                return None
+            try:
+                new = _utils._parse_roadmap(raw, self.path)
+            except ValueError as e:
+                # rozepsaný / nevalidní soubor: necháme běžet starou verzi
+                print(f"[ROADMAP] Reload přeskočen: {e}")
+                return None
+            new._source_hash = digest
+
+            if self.dispatch is not None:
+                self.dispatch(lambda: self._apply(new, stamp))
+                return None
+            return self._apply(new, stamp)
+
+    def _apply(self, new: Roadmap, stamp: Tuple[int, int]) -> RoadmapDiff:
+        with RELOAD_LOCK:
+            diff = diff_roadmaps(self.roadmap, new)
+            diff = apply_diff(self.roadmap, new, diff)
+            _utils._adopt_live_roadmap(str(self.path.resolve()), stamp, self.roadmap)
+            if not diff.empty:
+                _notify(self.roadmap, diff)
+        return diff
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except OSError as e:
+                print(f"[ROADMAP] Chyba čtení při reloadu: {e}")
+
+    def start(self) -> "RoadmapWatcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="roadmap-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
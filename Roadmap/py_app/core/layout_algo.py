@@ -1,8 +1,96 @@
 # py_app/core/geometry.py  (doporučené umístění)
 
 from __future__ import annotations
-from typing import Dict, Tuple, List
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+import math
+import threading
+
+import numpy as np
+
 from py_app.core.models import Roadmap
+from py_app.core.spatial import SpatialIndex, segments_in_rect
+from py_app.core.utils import roadmap_hash
+
+# Geometrie hran je vektorizovaná: všechny hrany naráz jako pole
+# (n_edges, n_samples), žádná smyčka v Pythonu přes body ani hrany.
+# Výstup pro Plotly je plochý: hrana za hranou, oddělené NaN (Plotly NaN
+# kreslí jako přerušení čáry, stejně jako None).
+
+EDGE_SAMPLES = 24
+EDGE_BEND = 0.18
+
+# Rozložení uzlů se počítá jednou na obsah roadmapy (roadmap_hash) a parametry.
+# Dash volá z více vláken → LRU jen pod zámkem; výpočet běží mimo něj.
+_CACHE_SIZE = 32
+_LAYOUT_CACHE: "OrderedDict[Tuple[Hashable, ...], object]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def _cached(key: Tuple[Hashable, ...], compute: Callable[[], object]) -> object:
+    with _CACHE_LOCK:
+        hit = _LAYOUT_CACHE.get(key)
+        if hit is not None:
+            _LAYOUT_CACHE.move_to_end(key)
+            return hit
+    value = compute()
+    with _CACHE_LOCK:
+        # souběžně spočítané stejné rozložení → všichni dostanou první uložené
+        value = _LAYOUT_CACHE.setdefault(key, value)
+        _LAYOUT_CACHE.move_to_end(key)
+        while len(_LAYOUT_CACHE) > _CACHE_SIZE:
+            _LAYOUT_CACHE.popitem(last=False)
+    return value
+
+
+def clear_layout_cache() -> None:
+    with _CACHE_LOCK:
+        _LAYOUT_CACHE.clear()
+
+
+class NodePositions:
+    """Souřadnice uzlů jako pole: xy[row[id]] = (x, y)."""
+
+    def __init__(self, ids: List[str], xy: np.ndarray):
+        self.ids = ids
+        self.xy = xy
+        self.row: Dict[str, int] = {nid: i for i, nid in enumerate(ids)}
+        self._spatial: Optional[SpatialIndex] = None
+
+    def as_dict(self) -> Dict[str, Tuple[float, float]]:
+        return {nid: (float(x), float(y)) for nid, (x, y) in zip(self.ids, self.xy.tolist())}
+
+    def rows(self, node_ids: Iterable[str]) -> np.ndarray:
+        row = self.row
+        return np.fromiter((row[n] for n in node_ids), dtype=np.intp)
+
+    def spatial(self) -> SpatialIndex:
+        """Prostorový index nad xy; staví se při prvním dotazu a žije s rozložením v cache."""
+        if self._spatial is None:
+            self._spatial = SpatialIndex(self.xy)
+        return self._spatial
+
+
+def _serpentine(ids: List[str], per_col: int, x_step: float, y_step: float) -> NodePositions:
+    i = np.arange(len(ids))
+    col, k = np.divmod(i, per_col)
+    # liché sloupce jdou shora dolů; poslední (neúplný) sloupec se počítá od svého konce
+    col_len = np.minimum(per_col, len(ids) - col * per_col)
+    y_idx = np.where(col % 2 == 0, k, col_len - 1 - k)
+    xy = np.column_stack((col * x_step, y_idx * y_step)).astype(float)
+    return NodePositions(ids, xy)
+
+
+def serpentine_layout(
+    roadmap: Roadmap,
+    per_col: int = 4,
+    x_step: float = 2.2,
+    y_step: float = 1.8
+) -> NodePositions:
+    """Hadí rozložení jako NodePositions, cachované podle obsahu roadmapy."""
+    key = ("serpentine", roadmap_hash(roadmap), per_col, x_step, y_step)
+    return _cached(key, lambda: _serpentine([n.id for n in roadmap.nodes], per_col, x_step, y_step))  # type: ignore[return-value]
 
 
 def serpentine_positions(
@@ -14,73 +102,540 @@ def serpentine_positions(
     """
     Rozloží uzly po „hada“ (sloupce střídají směr). Vrací mapu id -> (x, y).
     """
-    ids: List[str] = [n.id for n in roadmap.nodes]
-    pos: Dict[str, Tuple[float, float]] = {}
-    col = 0
-    i = 0
-    while i < len(ids):
-        col_ids = ids[i:i + per_col]
-        going_up = (col % 2 == 0)
-        y_idx = list(range(len(col_ids))) if going_up else list(reversed(range(len(col_ids))))
-        for idx, nid in zip(y_idx, col_ids):
-            x = col * x_step
-            y = idx * y_step
-            pos[nid] = (x, y)
-        col += 1
-        i += per_col
-    return pos
+    return serpentine_layout(roadmap, per_col, x_step, y_step).as_dict()
+
+
+# =========================
+# Vrstvené rozložení (Sugiyama)
+# =========================
+# 1) vrstvy: uzel je vždy alespoň o vrstvu níž než všechny jeho prereqy;
+#    "level" navíc respektuje Node.level, "longest_path" jen hloubku grafu
+# 2) hrany přes víc vrstev se rozpadnou na úseky přes pomocné (dummy) vrcholy
+# 3) pořadí ve vrstvách: střídavé průchody dolů/nahoru, vrchol dostane
+#    barycentrum pozic sousedů v předchozí vrstvě (bincount → bez smyček)
+# 4) x-souřadnice: cíl = průměr x sousedů, pak se vrstva „rozhrne“ tak,
+#    aby sousedé drželi odstup x_step a zachovalo se pořadí
+LAYER_MODES = ("level", "longest_path")
+
+
+class LayeredLayout(NodePositions):
+    """NodePositions + číslo vrstvy každého uzlu (0 = nahoře)."""
+
+    def __init__(self, ids: List[str], xy: np.ndarray, layer: np.ndarray):
+        super().__init__(ids, xy)
+        self.layer = layer
+        self.n_layers = int(layer.max()) + 1 if len(layer) else 0
+
+
+def _assign_layers(roadmap: Roadmap, by: str) -> np.ndarray:
+    if by not in LAYER_MODES:
+        raise ValueError(f"Neznámý způsob vrstvení '{by}' (povolené: {', '.join(LAYER_MODES)}).")
+    node_by_id = roadmap.index.node_by_id
+    layer: Dict[str, int] = {}
+    for nid in roadmap.topo_order:
+        node = node_by_id[nid]
+        below = max((layer[p] + 1 for p in node.prereqs), default=0)
+        layer[nid] = max(below, node.level - 1) if by == "level" else below
+    return np.array([layer[n.id] for n in roadmap.nodes], dtype=np.intp)
+
+
+def _split_long_edges(layer: np.ndarray, src: np.ndarray, dst: np.ndarray):
+    """
+    Hrany přes k vrstev → k úseků přes k-1 dummy vrcholů (id od len(layer)).
+    Vrací (vrstva všech vrcholů, původní hrana každého dummy, úseky od, úseky do).
+    """
+    n = len(layer)
+    span = layer[dst] - layer[src]
+    extra = span - 1
+    total = int(extra.sum())
+    dummy_edge = np.repeat(np.arange(len(src)), extra)
+    first = np.cumsum(extra) - extra                           # první dummy každé hrany
+    step = np.arange(total) - first[dummy_edge] + 1
+    dummy_layer = layer[src][dummy_edge] + step
+
+    # řetěz vrcholů všech hran za sebou: s, d1, …, d(k-1), t
+    starts = np.cumsum(span + 1) - (span + 1)
+    ends = starts + span
+    seq = np.empty(int((span + 1).sum()), dtype=np.intp)
+    inner = np.ones(len(seq), dtype=bool)
+    inner[starts] = inner[ends] = False
+    seq[starts], seq[ends] = src, dst
+    seq[inner] = n + np.arange(total)
+    keep = np.ones(max(0, len(seq) - 1), dtype=bool)
+    keep[ends[:-1]] = False                                    # přechod mezi dvěma hranami
+    return np.concatenate((layer, dummy_layer)), dummy_edge, seq[:-1][keep], seq[1:][keep]
+
+
+def _group(keys: np.ndarray, n_groups: int) -> List[np.ndarray]:
+    """Indexy prvků rozdělené podle hodnoty klíče 0..n_groups-1."""
+    order = np.argsort(keys, kind="stable")
+    bounds = np.searchsorted(keys[order], np.arange(1, n_groups))
+    return np.split(order, bounds)
+
+
+def _barycenters(members: np.ndarray, key: np.ndarray, nb: np.ndarray,
+                 local: np.ndarray, value: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    m = len(members)
+    where = local[key]
+    total = np.bincount(where, weights=value[nb], minlength=m)
+    count = np.bincount(where, minlength=m)
+    return np.where(count > 0, total / np.maximum(count, 1), fallback)
+
+
+def _inversions(v: np.ndarray) -> int:
+    """
+    Počet dvojic i < j s v[i] > v[j] (shody se nepočítají). Merge sort po
+    úrovních: bloky velikosti w se párují a pro každý prvek pravého bloku se
+    searchsorted-em spočítá, kolik prvků levého bloku je větších.
+    """
+    n = len(v)
+    if n < 2:
+        return 0
+    span = int(v.max()) + 1
+    a = v.astype(np.int64)
+    idx = np.arange(n)
+    total = 0
+    width = 1
+    while width < n:
+        pair = idx // (2 * width)
+        right = (idx // width) % 2 == 1
+        code = pair * span + a                                  # bloky jsou seřazené → code roste
+        left_codes, right_codes = code[~right], code[right]
+        not_greater = np.searchsorted(left_codes, right_codes, side="right")
+        pair_end = np.searchsorted(left_codes, (pair[right] + 1) * span, side="left")
+        total += int((pair_end - not_greater).sum())
+        a = np.sort(code) - pair * span
+        width *= 2
+    return total
+
+
+def _crossings(local: np.ndarray, vlayer: np.ndarray, seg_from: np.ndarray, seg_to: np.ndarray) -> int:
+    """Počet křížení úseků mezi sousedními vrstvami při daném pořadí."""
+    total = 0
+    upper, lower = local[seg_from], local[seg_to]
+    for segs in _group(vlayer[seg_from], int(vlayer.max()) + 1):
+        if len(segs) > 1:
+            u, l = upper[segs], lower[segs]
+            total += _inversions(l[np.lexsort((l, u))])
+    return total
+
+
+def _spread(desired: np.ndarray, step: float) -> np.ndarray:
+    """Nejbližší rozmístění se zachovaným pořadím a odstupem >= step."""
+    offs = np.arange(len(desired)) * step
+    x = np.maximum.accumulate(desired - offs) + offs
+    return x - (x - desired).mean()
+
+
+def _layered(roadmap: Roadmap, by: str, x_step: float, y_step: float, sweeps: int) -> LayeredLayout:
+    ids = [n.id for n in roadmap.nodes]
+    n = len(ids)
+    if not n:
+        return LayeredLayout(ids, np.empty((0, 2)), np.empty(0, dtype=np.intp))
+    layer = _assign_layers(roadmap, by)
+    src, dst = prereq_edge_rows(roadmap)
+    vlayer, dummy_edge, seg_from, seg_to = _split_long_edges(layer, src, dst)
+    n_layers = int(vlayer.max()) + 1
+
+    # výchozí pořadí: po trackách v pořadí definice, pak podle pozice v nodes;
+    # dummy vrcholy se řadí jako uzel, ze kterého hrana vychází
+    track_no = {t.id: i for i, t in enumerate(roadmap.tracks)}
+    real_track = np.array([track_no.get(node.track, 0) for node in roadmap.nodes], dtype=np.intp)
+    origin = np.concatenate((np.arange(n), src[dummy_edge]))
+    members = [origin_rows[np.lexsort((origin[origin_rows], real_track[origin[origin_rows]]))]
+               for origin_rows in _group(vlayer, n_layers)]
+
+    local = np.empty(len(vlayer), dtype=np.intp)               # pozice vrcholu ve vrstvě
+    rel = np.empty(len(vlayer))                                 # totéž v [0, 1] – vrstvy mají různou šířku
+    for mem in members:
+        local[mem] = np.arange(len(mem))
+        rel[mem] = np.linspace(0.0, 1.0, len(mem)) if len(mem) > 1 else 0.5
+    down = _group(vlayer[seg_to], n_layers)                    # úseky končící ve vrstvě L
+    up = _group(vlayer[seg_from], n_layers)                    # úseky začínající ve vrstvě L
+
+    def sweep(L: int, from_above: bool, value: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+        segs = down[L] if from_above else up[L]
+        key, nb = (seg_to[segs], seg_from[segs]) if from_above else (seg_from[segs], seg_to[segs])
+        return _barycenters(members[L], key, nb, local, value, fallback)
+
+    # průchod může křížení i zhoršit → držíme nejlepší dosažené pořadí
+    best, best_members = _crossings(local, vlayer, seg_from, seg_to), list(members)
+    for it in range(sweeps):
+        from_above = it % 2 == 0
+        for L in (range(1, n_layers) if from_above else range(n_layers - 2, -1, -1)):
+            mem = members[L]
+            bary = sweep(L, from_above, rel, rel[mem])
+            mem = members[L] = mem[np.argsort(bary, kind="stable")]
+            local[mem] = np.arange(len(mem))
+            rel[mem] = np.linspace(0.0, 1.0, len(mem)) if len(mem) > 1 else 0.5
+        count = _crossings(local, vlayer, seg_from, seg_to)
+        if count < best:
+            best, best_members = count, list(members)
+        if best == 0:
+            break
+    members = best_members
+    for mem in members:
+        local[mem] = np.arange(len(mem))
+
+    x = np.empty(len(vlayer))
+    for mem in members:
+        x[mem] = (np.arange(len(mem)) - (len(mem) - 1) / 2.0) * x_step
+    for from_above in (True, False, True):
+        for L in (range(1, n_layers) if from_above else range(n_layers - 2, -1, -1)):
+            mem = members[L]
+            x[mem] = _spread(sweep(L, from_above, x, x[mem]), x_step)
+
+    xy = np.column_stack((x[:n], -layer * y_step)).astype(float)
+    return LayeredLayout(ids, xy, layer)
+
+
+def layered_layout(
+    roadmap: Roadmap,
+    by: str = "level",
+    x_step: float = 2.2,
+    y_step: float = 1.8,
+    sweeps: int = 4
+) -> LayeredLayout:
+    """Vrstvené rozložení prereq grafu (viz výše), cachované podle obsahu roadmapy."""
+    key = ("layered", roadmap_hash(roadmap), by, x_step, y_step, sweeps)
+    return _cached(key, lambda: _layered(roadmap, by, x_step, y_step, sweeps))  # type: ignore[return-value]
+
+
+def layered_positions(roadmap: Roadmap, by: str = "level") -> Dict[str, Tuple[float, float]]:
+    """Mapa id -> (x, y) z layered_layout."""
+    return layered_layout(roadmap, by).as_dict()
+
+
+LAYOUTS = {"serpentine": serpentine_layout, "layered": layered_layout}
+
+
+def layout_for(roadmap: Roadmap, kind: str = "serpentine") -> NodePositions:
+    try:
+        return LAYOUTS[kind](roadmap)
+    except KeyError:
+        raise ValueError(f"Neznámé rozložení '{kind}' (povolené: {', '.join(LAYOUTS)}).") from None
+
+
+# =========================
+# Hrany (kvadratické Bézierovy křivky)
+# =========================
+def _bernstein(n: int, gap: bool) -> np.ndarray:
+    """Váhy kvadratické Bézierovy křivky (3, n); gap přidá sloupec NaN na oddělení hran."""
+    t = np.linspace(0.0, 1.0, n) if n > 1 else np.zeros(1)
+    w = np.vstack(((1 - t) ** 2, 2 * (1 - t) * t, t ** 2))
+    return np.hstack((w, np.full((3, 1), np.nan))) if gap else w
+
+
+def _sample(a: np.ndarray, b: np.ndarray, k: float, n: int, gap: bool) -> Tuple[np.ndarray, np.ndarray]:
+    a = np.asarray(a, dtype=float).reshape(-1, 2)
+    b = np.asarray(b, dtype=float).reshape(-1, 2)
+    d = b - a
+    c = (a + b) * 0.5 + k * np.column_stack((-d[:, 1], d[:, 0]))
+    w = _bernstein(n, gap)
+    # (m, 3) kontrolní body @ (3, n) váhy – jedno maticové násobení na osu
+    xs = np.column_stack((a[:, 0], c[:, 0], b[:, 0])) @ w
+    ys = np.column_stack((a[:, 1], c[:, 1], b[:, 1])) @ w
+    return xs, ys
+
+
+def bezier_edges(
+    a: np.ndarray,
+    b: np.ndarray,
+    k: float = EDGE_BEND,
+    n: int = EDGE_SAMPLES
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vzorky všech hran naráz. a, b: pole (m, 2) počátků a konců; control point
+    je střed úsečky posunutý o k*normála. Vrací (xs, ys) tvaru (m, n).
+    """
+    return _sample(a, b, k, n, gap=False)
+
+
+def flatten_with_gaps(xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(m, n) vzorky → plochá pole pro jednu Plotly stopu, hrany oddělené NaN."""
+    gap = np.full((xs.shape[0], 1), np.nan)
+    return np.hstack((xs, gap)).ravel(), np.hstack((ys, gap)).ravel()
+
+
+def quad_segments(a: np.ndarray, c: np.ndarray, b: np.ndarray, tolerance: float,
+                  max_segments: int = EDGE_SAMPLES - 1) -> np.ndarray:
+    """
+    Kolik úseků lomené čáry stačí na každou křivku, aby se od ní odchýlila
+    nejvýš o tolerance. U kvadratické Béziery je druhá derivace konstantní
+    (2·(a - 2c + b)), takže n úseků má chybu <= |a - 2c + b| / (4 n²).
+    Krátké a málo zakřivené hrany tak dostanou 1–2 úseky, dlouhé oblouky víc.
+    """
+    bend = np.hypot(*(a - 2 * c + b).T)
+    n = np.ceil(np.sqrt(bend / (4.0 * max(tolerance, 1e-12))))
+    return np.clip(n, 1, max(1, max_segments)).astype(np.intp)
+
+
+def _sample_adaptive(a: np.ndarray, b: np.ndarray, k: float, tolerance: float,
+                     max_segments: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Jako _sample s gap=True, ale s počtem vzorků podle quad_segments (ploché pole)."""
+    a = np.asarray(a, dtype=float).reshape(-1, 2)
+    b = np.asarray(b, dtype=float).reshape(-1, 2)
+    if not len(a):
+        return np.empty(0), np.empty(0)
+    d = b - a
+    c = (a + b) * 0.5 + k * np.column_stack((-d[:, 1], d[:, 0]))
+    segs = quad_segments(a, c, b, tolerance, max_segments)
+    counts = segs + 1
+    edge = np.repeat(np.arange(len(a)), counts)
+    first = np.cumsum(counts) - counts
+    t = (np.arange(len(edge)) - first[edge]) / segs[edge]
+    w0, w1, w2 = (1 - t) ** 2, 2 * (1 - t) * t, t ** 2
+    # každá předchozí hrana přidala jednu mezeru → bod i patří na pozici i + edge
+    out_x = np.full(len(edge) + len(a), np.nan)
+    out_y = np.full(len(edge) + len(a), np.nan)
+    at = np.arange(len(edge)) + edge
+    out_x[at] = w0 * a[edge, 0] + w1 * c[edge, 0] + w2 * b[edge, 0]
+    out_y[at] = w0 * a[edge, 1] + w1 * c[edge, 1] + w2 * b[edge, 1]
+    return out_x, out_y
 
 
 def rounded_edge_points(
     a: Tuple[float, float],
     b: Tuple[float, float],
-    k: float = 0.18,
-    n: int = 24
+    k: float = EDGE_BEND,
+    n: int = EDGE_SAMPLES
 ) -> Tuple[List[float], List[float]]:
     """
     Kvadratická Bézierova křivka mezi body a, b s jedním control pointem
     posunutým o k*normála v polovině úsečky. Vrací (xs, ys).
     """
-    ax, ay = a
-    bx, by = b
-    dx, dy = bx - ax, by - ay
-    nx, ny = -dy, dx
-    mx, my = (ax + bx) / 2.0, (ay + by) / 2.0
-    cx, cy = mx + k * nx, my + k * ny  # control
-    xs: List[float] = []
-    ys: List[float] = []
-    for t_i in range(n):
-        t = t_i / (n - 1) if n > 1 else 0.0
-        x = (1 - t) ** 2 * ax + 2 * (1 - t) * t * cx + t ** 2 * bx
-        y = (1 - t) ** 2 * ay + 2 * (1 - t) * t * cy + t ** 2 * by
-        xs.append(x)
-        ys.append(y)
-    return xs, ys
+    xs, ys = bezier_edges(np.array([a]), np.array([b]), k, n)
+    return xs[0].tolist(), ys[0].tolist()
+
+
+def route_edges(
+    positions: NodePositions,
+    edges: Iterable[Tuple[str, str]],
+    k: float = EDGE_BEND,
+    n: int = EDGE_SAMPLES,
+    tolerance: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Hrany (source, target) jako plochá pole pro Plotly (viz flatten_with_gaps)."""
+    pairs = list(edges)
+    if not pairs:
+        return np.empty(0), np.empty(0)
+    src, dst = zip(*pairs)
+    return route_rows(positions, positions.rows(src), positions.rows(dst), k, n, tolerance)
+
+
+def route_rows(
+    positions: NodePositions,
+    src: np.ndarray,
+    dst: np.ndarray,
+    k: float = EDGE_BEND,
+    n: int = EDGE_SAMPLES,
+    tolerance: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Jako route_edges, ale hrany už jako indexy řádků do positions.xy.
+    S tolerance (datové jednotky, viz Viewport.tolerance) se počet vzorků
+    volí po hranách adaptivně, n je pak horní mez počtu vzorků.
+    """
+    xy = positions.xy
+    if tolerance is not None:
+        return _sample_adaptive(xy[src], xy[dst], k, tolerance, n - 1)
+    xs, ys = _sample(xy[src], xy[dst], k, n, gap=True)
+    return xs.ravel(), ys.ravel()
+
+
+def prereq_edge_rows(roadmap: Roadmap) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Prereq hrany jako dvojice indexů uzlů (pořadí v roadmap.nodes, stejné jako
+    řádky NodePositions); cachované podle obsahu roadmapy.
+    """
+    def compute() -> Tuple[np.ndarray, np.ndarray]:
+        pos = roadmap.index.position
+        src = [pos[p] for node in roadmap.nodes for p in node.prereqs]
+        dst = [i for i, node in enumerate(roadmap.nodes) for _ in node.prereqs]
+        return np.array(src, dtype=np.intp), np.array(dst, dtype=np.intp)
+    return _cached(("prereq_edges", roadmap_hash(roadmap)), compute)  # type: ignore[return-value]
+
+
+def visible_edge_rows(positions: NodePositions, src: np.ndarray, dst: np.ndarray,
+                      view: "Viewport", k: float = EDGE_BEND) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Jen hrany, které mohou zasahovat do výřezu. Křivka leží v konvexním obalu
+    a, c, b a control point je od úsečky vzdálený k·|b - a| → o tolik se
+    obálka úsečky rozšíří.
+    """
+    xy = positions.xy
+    a, b = xy[src], xy[dst]
+    pad = abs(k) * np.hypot(*(b - a).T)
+    keep = segments_in_rect(a, b, view.x0, view.x1, view.y0, view.y1, pad)
+    return src[keep], dst[keep]
+
+
+def roadmap_edge_xy(roadmap: Roadmap, k: float = EDGE_BEND, n: int = EDGE_SAMPLES,
+                    layout: str = "serpentine", tolerance: Optional[float] = None,
+                    view: Optional["Viewport"] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Všechny prereq hrany roadmapy nad zvoleným rozložením (viz LAYOUTS); s view jen ty ve výřezu."""
+    src, dst = prereq_edge_rows(roadmap)
+    positions = layout_for(roadmap, layout)
+    if view is not None:
+        src, dst = visible_edge_rows(positions, src, dst, view, k)
+    return route_rows(positions, src, dst, k, n, tolerance)
 
 
-def build_route_xy(rm: Roadmap, path_ids: List[str]) -> Tuple[List[float], List[float]]:
+def build_route_xy(rm: Roadmap, path_ids: List[str],
+                   tolerance: Optional[float] = None) -> Tuple[List[float], List[float]]:
     """
     Z path_ids udělá polyline přes oblouky mezi po sobě jdoucími uzly.
     Pokud je v path_ids jen jeden uzel, vrátí jeho souřadnici.
+    S tolerance se hustota vzorků řídí zakřivením oblouků (viz quad_segments).
     """
-    pos = serpentine_positions(rm)
-    xs_all: List[float] = []
-    ys_all: List[float] = []
+    pos = serpentine_layout(rm)
     if len(path_ids) < 2:
         if path_ids:
-            x, y = pos[path_ids[0]]
-            xs_all = [x]
-            ys_all = [y]
-        return xs_all, ys_all
-
-    for a, b in zip(path_ids[:-1], path_ids[1:]):
-        xa, ya = pos[a]
-        xb, yb = pos[b]
-        xs, ys = rounded_edge_points((xa, ya), (xb, yb))
-        if xs_all:
-            # vyhnout se duplikaci koncového bodu
-            xs = xs[1:]
-            ys = ys[1:]
-        xs_all.extend(xs)
-        ys_all.extend(ys)
-    return xs_all, ys_all
+            x, y = pos.xy[pos.row[path_ids[0]]].tolist()
+            return [x], [y]
+        return [], []
+
+    rows = pos.rows(path_ids)
+    if tolerance is not None:
+        xs, ys = _sample_adaptive(pos.xy[rows[:-1]], pos.xy[rows[1:]], EDGE_BEND, tolerance, EDGE_SAMPLES - 1)
+        # mezery (NaN) vypadnou; navazující oblouky sdílejí krajní bod → první vzorek dalších vynecháme
+        gap = np.flatnonzero(np.isnan(xs))
+        drop = np.concatenate((gap, gap[:-1] + 1))
+        keep = np.ones(len(xs), dtype=bool)
+        keep[drop] = False
+        return xs[keep].tolist(), ys[keep].tolist()
+    xs, ys = bezier_edges(pos.xy[rows[:-1]], pos.xy[rows[1:]])
+    # navazující oblouky sdílejí krajní bod → u dalších hran první vzorek vynecháme
+    xs_all = np.concatenate((xs[0], xs[1:, 1:].ravel()))
+    ys_all = np.concatenate((ys[0], ys[1:, 1:].ravel()))
+    return xs_all.tolist(), ys_all.tolist()
+
+
+# =========================
+# Kružnice a úroveň detailu podle přiblížení
+# =========================
+def circle_steps(r: float, tolerance: float, max_steps: int = 120, min_steps: int = 8) -> int:
+    """Počet úseků mnohoúhelníku, jehož tětivy se od kružnice odchýlí nejvýš o tolerance."""
+    if r <= 0 or tolerance >= r:
+        return min_steps
+    steps = math.ceil(math.pi / math.acos(1.0 - tolerance / r))
+    return max(min_steps, min(max_steps, steps))
+
+
+def ring_xy(centers: np.ndarray, r: float, steps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Kružnice kolem všech středů naráz (steps + 1 bodů na kruh), oddělené NaN."""
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    th = np.linspace(0.0, 2 * math.pi, steps + 1)
+    xs = centers[:, :1] + r * np.cos(th)
+    ys = centers[:, 1:] + r * np.sin(th)
+    return flatten_with_gaps(xs, ys)
+
+
+# Velikost grafu v pixelech neznáme (relayoutData ji nenese) → typický rozměr karty.
+VIEW_WIDTH_PX = 900
+VIEW_HEIGHT_PX = 640
+
+
+@dataclass(frozen=True)
+class Viewport:
+    """Viditelný výřez v datových souřadnicích + velikost plochy v pixelech."""
+    x0: float
+    x1: float
+    y0: float
+    y1: float
+    width_px: int = VIEW_WIDTH_PX
+    height_px: int = VIEW_HEIGHT_PX
+
+    @property
+    def units_per_px(self) -> float:
+        return max(abs(self.x1 - self.x0) / max(1, self.width_px),
+                   abs(self.y1 - self.y0) / max(1, self.height_px))
+
+    @property
+    def px_per_unit(self) -> float:
+        upp = self.units_per_px
+        return 1.0 / upp if upp > 0 else float("inf")
+
+    def tolerance(self, px: float) -> float:
+        """Tolerance v datových jednotkách odpovídající `px` pixelům na obrazovce."""
+        return px * self.units_per_px
+
+
+def _axis_range(relayout: Mapping[str, Any], axis: str) -> Optional[Tuple[float, float]]:
+    # Dash posílá buď "xaxis.range[0]" / "xaxis.range[1]", nebo "xaxis.range": [a, b]
+    try:
+        if f"{axis}.range[0]" in relayout:
+            return float(relayout[f"{axis}.range[0]"]), float(relayout[f"{axis}.range[1]"])
+        if f"{axis}.range" in relayout:
+            lo, hi = relayout[f"{axis}.range"]
+            return float(lo), float(hi)
+    except (KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+def viewport_from_relayout(relayout: Optional[Mapping[str, Any]], default: Viewport) -> Viewport:
+    """
+    Výřez z Dash relayoutData. Autorange (dvojklik) = default; chybí-li jedna
+    osa (scaleanchor), dopočítá se ze stejného měřítka jako ta druhá.
+    """
+    if not relayout or relayout.get("xaxis.autorange") or relayout.get("yaxis.autorange"):
+        return default
+    xr, yr = _axis_range(relayout, "xaxis"), _axis_range(relayout, "yaxis")
+    if xr is None and yr is None:
+        return default
+    if xr is None:
+        cx, half = (default.x0 + default.x1) / 2, (yr[1] - yr[0]) * default.width_px / default.height_px / 2
+        xr = (cx - half, cx + half)
+    if yr is None:
+        cy, half = (default.y0 + default.y1) / 2, (xr[1] - xr[0]) * default.height_px / default.width_px / 2
+        yr = (cy - half, cy + half)
+    return Viewport(xr[0], xr[1], yr[0], yr[1], default.width_px, default.height_px)
+
+
+@dataclass(frozen=True)
+class LodTier:
+    name: str
+    min_px_per_unit: float      # tier platí od tohoto přiblížení výš
+    tolerance_px: float         # povolená odchylka geometrie na obrazovce
+    decorations: bool           # ikony, záře a jiné ozdoby
+
+
+LOD_TIERS: Tuple[LodTier, ...] = (
+    LodTier("detail", 45.0, 0.35, True),
+    LodTier("normal", 12.0, 0.6, True),
+    LodTier("overview", 0.0, 1.5, False),
+)
+
+
+def lod_tier(view: Viewport) -> LodTier:
+    ppu = view.px_per_unit
+    for tier in LOD_TIERS:
+        if ppu >= tier.min_px_per_unit:
+            return tier
+    return LOD_TIERS[-1]
+
+
+# =========================
+# Ořez na výřez (culling)
+# =========================
+# Pod tímto počtem uzlů se kreslí všechno – ořez by jen přidal přestavby při posunu.
+CULL_MIN_NODES = 200
+
+
+def _snap_range(lo: float, hi: float) -> Tuple[float, float]:
+    # krok mřížky = čtvrtina až polovina šířky výřezu (mocnina dvou → stabilní při malém zoomu)
+    width = max(hi - lo, 1e-9)
+    g = 2.0 ** math.ceil(math.log2(width)) / 2
+    return math.floor((lo - g) / g) * g, math.ceil((hi + g) / g) * g
+
+
+def cull_window(view: Viewport) -> Viewport:
+    """
+    Výřez rozšířený o okraj a zarovnaný na mřížku. Kreslí se všechno uvnitř,
+    takže menší posun nic nepřestaví – okno se změní, až když se výřez
+    přiblíží jeho okraji (okno je pak součástí klíče pro překreslení).
+    """
+    x0, x1 = _snap_range(min(view.x0, view.x1), max(view.x0, view.x1))
+    y0, y1 = _snap_range(min(view.y0, view.y1), max(view.y0, view.y1))
+    return Viewport(x0, x1, y0, y1, view.width_px, view.height_px)
@@ -0,0 +1,123 @@
+# py_app/core/migrations.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# Verzované migrace roadmap.json.
+#
+# Soubor nese top-level "schema_version" (chybí = 1). Každá migrace říká, na
+# jakou verzi data posouvá, a skládá se ze dvou háčků:
+#   node(n, ctx)      – úprava jednoho uzlu; háčky všech čekajících migrací
+#                       běží v JEDNOM průchodu přes nodes
+#   finish(data, ctx) – úpravy celého dokumentu po průchodu (hrany apod.),
+#                       v pořadí verzí
+# ctx je sdílený slovník, kam si node-háčky ukládají, co finish potřebuje
+# (např. id uzlů), aby se přes uzly nemuselo jít znovu.
+# Node-háček tedy nesmí záviset na finish-háčku starší migrace.
+
+SCHEMA_VERSION = 2
+
+NodeHook = Callable[[Dict[str, Any], Dict[str, Any]], None]
+FinishHook = Callable[[Dict[str, Any], Dict[str, Any]], None]
+
+
+@dataclass(frozen=True)
+class Migration:
+    to_version: int
+    name: str
+    node: Optional[NodeHook] = None
+    finish: Optional[FinishHook] = None
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def register(migration: Migration) -> Migration:
+    MIGRATIONS.append(migration)
+    MIGRATIONS.sort(key=lambda m: m.to_version)
+    return migration
+
+
+def schema_version_of(data: Dict[str, Any]) -> int:
+    try:
+        return int(data.get("schema_version", 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+def migrate(data: Dict[str, Any]) -> int:
+    """
+    Posune surová data na SCHEMA_VERSION (na místě). Vrací původní verzi;
+    data už v aktuální verzi nechá beze změny.
+    """
+    version = schema_version_of(data)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    pending = [m for m in MIGRATIONS if version < m.to_version <= SCHEMA_VERSION]
+    ctx: Dict[str, Any] = {}
+    node_hooks = [m.node for m in pending if m.node is not None]
+    if node_hooks:
+        for n in data.get("nodes", []) or []:
+            for hook in node_hooks:
+                hook(n, ctx)
+    for m in pending:
+        if m.finish is not None:
+            m.finish(data, ctx)
+
+    data["schema_version"] = SCHEMA_VERSION
+    return version
+
+
+# =========================
+# v1 → v2: číselná difficulty/level, doplněné a pročištěné edges
+# =========================
+_DIFFICULTY = {
+    "beginner": 1,
+    "intermediate": 2,
+    "advanced": 3,
+    "expert": 4,
+    # pro jistotu i česky:
+    "zacatecnik": 1,
+    "stredne pokrocily": 2,
+    "pokrocily": 3,
+}
+
+
+def _v2_node(n: Dict[str, Any], ctx: Dict[str, Any]) -> None:
+    # difficulty string → 1..4 (neznámé = 2), level musí být číslo
+    v = n.get("difficulty")
+    if isinstance(v, str):
+        n["difficulty"] = _DIFFICULTY.get(v.strip().lower(), 2)
+    if not isinstance(n.get("level"), int):
+        n["level"] = 1
+
+    ids: Set[str] = ctx.setdefault("ids", set())
+    edges: Set[Tuple[str, str]] = ctx.setdefault("prereq_edges", set())
+    nid = n.get("id")
+    if nid:
+        ids.add(str(nid))
+        for pre in n.get("prereqs", []) or []:
+            if pre:
+                edges.add((str(pre), str(nid)))
+
+
+def _v2_finish(data: Dict[str, Any], ctx: Dict[str, Any]) -> None:
+    """
+    Chybějící edges doplní z prereqs + learning_paths, existující pročistí;
+    v obou případech zůstanou jen hrany mezi existujícími uzly.
+    """
+    ids: Set[str] = ctx.get("ids", set())
+    if isinstance(data.get("edges"), list):
+        pairs = [(str(e.get("source")), str(e.get("target"))) for e in data["edges"]]
+    else:
+        merged = set(ctx.get("prereq_edges", set()))
+        for lp in data.get("learning_paths", []) or []:
+            seq = lp.get("node_sequence", []) or []
+            for a, b in zip(seq, seq[1:]):
+                merged.add((str(a), str(b)))
+        pairs = sorted(merged)
+    data["edges"] = [{"source": a, "target": b} for a, b in pairs if a in ids and b in ids]
+
+
+register(Migration(2, "numeric difficulty/level + edges", node=_v2_node, finish=_v2_finish))
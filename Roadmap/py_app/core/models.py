@@ -1,6 +1,12 @@
 from __future__ import annotations
-from typing import List, Optional, Dict
-from pydantic import BaseModel, Field, field_validator, model_validator
+from collections import deque
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional, Dict, Tuple
+from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_validator
+
+from .migrations import SCHEMA_VERSION
+
+if TYPE_CHECKING:
+    from .roadmap_index import RoadmapIndex
 
 
 class Metadata(BaseModel):
@@ -55,14 +61,159 @@ class Edge(BaseModel):
     target: str
 
 
+def _topological_order(nodes: List["Node"]) -> Tuple[List[str], List[str]]:
+    """
+    Kahn nad prereq grafem (prereq -> uzel), O(V+E), stabilní vůči pořadí v JSONu.
+    Vrací (pořadí, zbytek) – zbytek jsou uzly, které leží v cyklu nebo za ním.
+    """
+    indeg: Dict[str, int] = {}
+    succ: Dict[str, List[str]] = {}
+    for n in nodes:
+        indeg[n.id] = len(n.prereqs)
+        succ.setdefault(n.id, [])
+        for p in n.prereqs:
+            succ.setdefault(p, []).append(n.id)
+
+    queue = deque(n.id for n in nodes if indeg[n.id] == 0)
+    order: List[str] = []
+    while queue:
+        nid = queue.popleft()
+        order.append(nid)
+        for s in succ[nid]:
+            indeg[s] -= 1
+            if indeg[s] == 0:
+                queue.append(s)
+
+    rest = [n.id for n in nodes if indeg[n.id] > 0] if len(order) < len(nodes) else []
+    return order, rest
+
+
+def _find_cycles(nodes: List["Node"], rest: Iterable[str], limit: int = 5) -> List[List[str]]:
+    """
+    Tarjan (iterativně) jen nad uzly, které Kahn nedokázal seřadit.
+    Z každé silně souvislé komponenty vytáhne jeden konkrétní cyklus a -> b -> ... -> a.
+    """
+    members = set(rest)
+    succ: Dict[str, List[str]] = {nid: [] for nid in members}
+    for n in nodes:
+        if n.id in members:
+            for p in n.prereqs:
+                if p in members:
+                    succ[p].append(n.id)
+
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack = set()
+    cycles: List[List[str]] = []
+
+    for root in rest:
+        if root in index:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, i = work.pop()
+            if i == 0:
+                index[v] = low[v] = len(index)
+                stack.append(v)
+                on_stack.add(v)
+            recurse = False
+            nxt = succ[v]
+            while i < len(nxt):
+                w = nxt[i]
+                i += 1
+                if w not in index:
+                    work.append((v, i))
+                    work.append((w, 0))
+                    recurse = True
+                    break
+                if w in on_stack:
+                    low[v] = min(low[v], index[w])
+            if recurse:
+                continue
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+            if low[v] == index[v]:
+                comp = set()
+                while True:
+                    w = stack.pop()
+                    on_stack.discard(w)
+                    comp.add(w)
+                    if w == v:
+                        break
+                if len(comp) > 1 or v in succ[v]:
+                    cycles.append(_walk_cycle(v, succ, comp))
+                    if len(cycles) >= limit:
+                        return cycles
+    return cycles
+
+
+def _walk_cycle(start: str, succ: Dict[str, List[str]], comp: set) -> List[str]:
+    # v SCC má každý uzel následníka uvnitř komponenty → chůze se do |comp| kroků zacyklí
+    seen: Dict[str, int] = {}
+    path: List[str] = []
+    v = start
+    while v not in seen:
+        seen[v] = len(path)
+        path.append(v)
+        v = next(w for w in succ[v] if w in comp)
+    return path[seen[v]:] + [v]
+
+
+def _format_cycles(cycles: List[List[str]]) -> str:
+    return "; ".join(" -> ".join(c) for c in cycles)
+
+
 class Roadmap(BaseModel):
+    schema_version: int = SCHEMA_VERSION     # verze formátu souboru (viz core/migrations.py)
     metadata: Optional[Metadata] = None
     tracks: List[Track]
     nodes: List[Node]
     learning_paths: List[LearningPath] = Field(default_factory=list)
     edges: List[Edge] = Field(default_factory=list)
 
-    # základní konzistence referencí
+    # sha256 zdrojového souboru (vyplní load_roadmap); slouží jako klíč cache
+    _source_hash: Optional[str] = PrivateAttr(default=None)
+    # verze, ze které se při načtení migrovalo (None = soubor už byl aktuální)
+    _migrated_from: Optional[int] = PrivateAttr(default=None)
+    _index: Optional[Any] = PrivateAttr(default=None)
+    # topologické pořadí prereq grafu (vyplní validace)
+    _topo_order: Optional[List[str]] = PrivateAttr(default=None)
+    _topo_pos: Optional[Dict[str, int]] = PrivateAttr(default=None)
+    # líně načítaná těla uzlů (core/streaming.py, lazy=True)
+    _lazy_bodies: Optional[Any] = PrivateAttr(default=None)
+
+    @property
+    def index(self) -> "RoadmapIndex":
+        """Předpočítaný RoadmapIndex (staví se jednou, při prvním přístupu)."""
+        if self._index is None:
+            from .roadmap_index import RoadmapIndex
+            self._index = RoadmapIndex(self)
+        return self._index
+
+    @property
+    def topo_order(self) -> List[str]:
+        """Uzly v topologickém pořadí (prereqy vždy před uzlem)."""
+        self._ensure_topo()
+        return self._topo_order  # type: ignore[return-value]
+
+    @property
+    def topo_pos(self) -> Dict[str, int]:
+        self._ensure_topo()
+        return self._topo_pos  # type: ignore[return-value]
+
+    def _ensure_topo(self) -> None:
+        if self._topo_order is None:
+            # model_construct obchází validaci → dopočítáme (případný cyklus na konec)
+            order, rest = _topological_order(self.nodes)
+            self._set_topo(order + rest)
+
+    def _set_topo(self, order: List[str]) -> None:
+        self._topo_order = order
+        self._topo_pos = {nid: i for i, nid in enumerate(order)}
+
+    # základní konzistence referencí + acyklický prereq graf
     @model_validator(mode="after")
     def _validate_refs(self) -> "Roadmap":
         node_ids = {n.id for n in self.nodes}
@@ -81,4 +232,98 @@ class Roadmap(BaseModel):
             if e.source not in node_ids or e.target not in node_ids:
                 raise ValueError(f"Edge '{e.source}->{e.target}' odkazuje na neznámý node.")
 
+        # cyklus v prereqs by uzly navždy zamkl → odmítneme ho už při načtení
+        order, rest = _topological_order(self.nodes)
+        if rest:
+            raise ValueError(f"Prereqs obsahují cyklus: {_format_cycles(_find_cycles(self.nodes, rest))}.")
+        self._set_topo(order)
         return self
+
+    # ---------- inkrementální úprava jednoho uzlu ----------
+    def replace_node(self, node: Node | Dict[str, Any], sync_edges: bool = True) -> Node:
+        """
+        Nahradí uzel se stejným id a zvaliduje jen dotčený podgraf.
+
+        Odebrané prereqy pořadí nerozbijí; pro každý nový prereq p -> n, kde p
+        je v pořadí až za n, se (Pearce–Kelly) projde jen úsek pořadí mezi n a p:
+        buď najdeme cestu n ~> p (= cyklus, změna se vrátí a vyhodí ValueError),
+        nebo se uzly v tomto úseku přeskládají. Zbytek pořadí zůstane, jak byl.
+        Hrany prereq -> uzel v `edges` se upraví spolu s prereqy (sync_edges=False
+        je nechá být – hot-reload přebírá edges ze souboru beze změny).
+        """
+        new = node if isinstance(node, Node) else Node.model_validate(node)
+        idx = self.index
+        old = idx.node_by_id.get(new.id)
+        if old is None:
+            raise ValueError(f"Node '{new.id}' v roadmapě není.")
+        if new.track not in idx.track_by_id:
+            raise ValueError(f"Node '{new.id}' odkazuje na neznámý track '{new.track}'.")
+        for p in new.prereqs:
+            if p not in idx.node_by_id:
+                raise ValueError(f"Node '{new.id}' má prereq '{p}', který není v nodes.")
+        if new.id in new.prereqs:
+            raise ValueError(f"Prereqs obsahují cyklus: {new.id} -> {new.id}.")
+
+        pos = self.topo_pos
+        idx._replace_node(old, new)
+        before = set(old.prereqs)
+        try:
+            for p in new.prereqs:
+                if p not in before and pos[p] > pos[new.id]:
+                    self._reorder(p, new.id)
+        except ValueError:
+            idx._replace_node(new, old)
+            raise
+
+        self.nodes[idx.position[new.id]] = new
+        if sync_edges:
+            self._replace_prereq_edges(old, new)
+        self._source_hash = None
+        return new
+
+    def _replace_prereq_edges(self, old: Node, new: Node) -> None:
+        before = set(old.prereqs)
+        removed = before - set(new.prereqs)
+        if removed:
+            self.edges[:] = [e for e in self.edges if not (e.target == new.id and e.source in removed)]
+        have = {e.source for e in self.edges if e.target == new.id}
+        added = [p for p in dict.fromkeys(new.prereqs) if p not in before and p not in have]
+        self.edges.extend(Edge(source=p, target=new.id) for p in added)
+        self.index._replace_edges(new.id, removed, added)
+
+    def _reorder(self, u: str, v: str) -> None:
+        """Pearce–Kelly pro novou hranu u -> v s pos[u] > pos[v]."""
+        idx, order, pos = self.index, self._topo_order, self._topo_pos
+        lo, hi = pos[v], pos[u]
+
+        # dopředu od v (jen uzly před u); dosažení u = cyklus
+        parent: Dict[str, Optional[str]] = {v: None}
+        todo = [v]
+        while todo:
+            x = todo.pop()
+            for y in idx.succ.get(x, ()):
+                if y == u:
+                    path = [x]
+                    while parent[path[-1]] is not None:
+                        path.append(parent[path[-1]])  # type: ignore[arg-type]
+                    cycle = [u] + path[::-1] + [u]
+                    raise ValueError(f"Prereqs obsahují cyklus: {_format_cycles([cycle])}.")
+                if y not in parent and pos[y] < hi:
+                    parent[y] = x
+                    todo.append(y)
+        forward = list(parent)
+
+        # dozadu od u (jen uzly za v)
+        back = {u}
+        todo = [u]
+        while todo:
+            x = todo.pop()
+            for y in idx.pred.get(x, ()):
+                if y not in back and pos[y] > lo:
+                    back.add(y)
+                    todo.append(y)
+
+        moved = sorted(back, key=pos.__getitem__) + sorted(forward, key=pos.__getitem__)
+        for slot, nid in zip(sorted(pos[n] for n in moved), moved):
+            order[slot] = nid
+            pos[nid] = slot
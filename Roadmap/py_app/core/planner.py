@@ -0,0 +1,205 @@
+# py_app/core/planner.py
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import heapq
+import re
+
+from .models import Roadmap
+from .utils import roadmap_hash
+
+# Plánovač studia nad prereq DAGem:
+#   - estimate ("40h", "2d", "1.5 h", "90min", "1w") → hodiny
+#   - earliest finish = nejdelší cesta (v hodinách) od kořenů k uzlu, hotové uzly stojí 0
+#   - kritická cesta pro uzel / track, týdenní rozvrh pod rozpočtem hodin
+# Stav (earliest finish) se po dokončení uzlu přepočítá jen pro jeho potomky.
+
+DEFAULT_HOURS = 10.0
+HOURS_PER_UNIT = {"m": 1 / 60, "min": 1 / 60, "h": 1.0, "hod": 1.0, "d": 8.0, "den": 8.0, "dny": 8.0,
+                  "dni": 8.0, "w": 40.0, "tyden": 40.0, "týden": 40.0, "týdny": 40.0}
+_ESTIMATE = re.compile(r"^\s*(\d+(?:[.,]\d+)?)\s*(?:-\s*(\d+(?:[.,]\d+)?))?\s*([a-zA-Zá-ž]*)\s*$")
+_EPS = 1e-9
+
+
+def parse_estimate(value: Optional[str], default: float = DEFAULT_HOURS) -> float:
+    """'40h' → 40.0; rozsah '10-20h' bere průměr; chybějící/neznámý formát → default."""
+    if value is None:
+        return default
+    m = _ESTIMATE.match(str(value).lower())
+    if not m:
+        return default
+    lo = float(m.group(1).replace(",", "."))
+    hi = float(m.group(2).replace(",", ".")) if m.group(2) else lo
+    unit = HOURS_PER_UNIT.get(m.group(3) or "h")
+    if unit is None:
+        return default
+    return (lo + hi) / 2 * unit
+
+
+class StudyPlanner:
+    """
+    Kritická cesta a rozvrh pro jednu roadmapu.
+
+    Drží earliest finish všech uzlů pro aktuální množinu hotových uzlů.
+    update(completed) posune stav: přibyly-li jen nové hotové uzly, přepočítají
+    se pouze jejich potomci (v topologickém pořadí); jinak proběhne plný průchod
+    O(V+E). Výsledky dotazů se pamatují podle (množina hotových, dotaz).
+    """
+
+    def __init__(self, roadmap: Roadmap, default_hours: float = DEFAULT_HOURS, memo_size: int = 128):
+        self.roadmap = roadmap
+        self.index = roadmap.index
+        self.hours: Dict[str, float] = {n.id: parse_estimate(n.estimate, default_hours) for n in roadmap.nodes}
+        self.completed: FrozenSet[str] = frozenset()
+        self._ef: Dict[str, float] = {}
+        self._via: Dict[str, Optional[str]] = {}
+        self._memo: "OrderedDict[Tuple[Any, ...], Any]" = OrderedDict()
+        self._memo_size = int(memo_size)
+        self._recompute(self.index.topo_order)
+
+    # ---------- stav ----------
+    def _cost(self, nid: str) -> float:
+        return 0.0 if nid in self.completed else self.hours.get(nid, 0.0)
+
+    def _recompute(self, ids: Iterable[str]) -> None:
+        ef, via, pred = self._ef, self._via, self.index.pred
+        for nid in ids:
+            best, arg = 0.0, None
+            for p in pred.get(nid, ()):
+                if ef[p] > best:
+                    best, arg = ef[p], p
+            ef[nid] = best + self._cost(nid)
+            via[nid] = arg
+
+    def update(self, completed: Iterable[str]) -> "StudyPlanner":
+        target = frozenset(map(str, completed))
+        if target == self.completed:
+            return self
+        if self.completed <= target:
+            added = target - self.completed
+            self.completed = target
+            pos, mask = self.index.topo_pos, 0
+            for nid in added:
+                if nid in pos:
+                    mask |= self.index.descendants(nid) | (1 << pos[nid])
+            self._recompute(self.index.ids_of(mask))
+        else:
+            self.completed = target
+            self._recompute(self.index.topo_order)
+        return self
+
+    def _memoized(self, key: Tuple[Any, ...], compute):
+        key = (self.completed,) + key
+        hit = self._memo.get(key)
+        if hit is not None:
+            self._memo.move_to_end(key)
+            return hit
+        value = self._memo[key] = compute()
+        while len(self._memo) > self._memo_size:
+            self._memo.popitem(last=False)
+        return value
+
+    # ---------- dotazy ----------
+    def earliest_finish(self, node_id: str) -> float:
+        """Kolik hodin minimálně zbývá, než bude uzel hotový (včetně všech prereqů na nejdelší větvi)."""
+        return self._ef.get(str(node_id), 0.0)
+
+    def critical_path(self, node_id: str) -> Tuple[float, List[str]]:
+        """(hodiny, uzly) nejdelší zbývající řetěz prereqů vedoucí k uzlu; hotové uzly vynechá."""
+        def compute():
+            path: List[str] = []
+            cur: Optional[str] = str(node_id)
+            while cur is not None:
+                if cur not in self.completed:
+                    path.append(cur)
+                cur = self._via.get(cur)
+            return self.earliest_finish(node_id), path[::-1]
+        return self._memoized(("node", str(node_id)), compute)
+
+    def track_critical_path(self, track_id: str) -> Tuple[float, List[str]]:
+        """Kritická cesta k dokončení celého tracku (může vést i přes prereqy z jiných tracků)."""
+        def compute():
+            nodes = self.index.track_nodes(track_id)
+            if not nodes:
+                return 0.0, []
+            last = max(nodes, key=lambda n: self._ef[n.id])
+            return self.critical_path(last.id)
+        return self._memoized(("track", track_id), compute)
+
+    def _required(self, target: Optional[str], track: Optional[str]) -> int:
+        idx = self.index
+        if target is not None:
+            mask = idx.ancestors(target) | idx.mask_of([target])
+        elif track is not None:
+            mask = 0
+            for n in idx.track_nodes(track):
+                mask |= idx.ancestors(n.id)
+            mask |= idx.mask_of(n.id for n in idx.track_nodes(track))
+        else:
+            mask = (1 << len(idx.topo_order)) - 1
+        return mask & ~idx.mask_of(self.completed)
+
+    def weekly_schedule(self, hours_per_week: float, target: Optional[str] = None,
+                        track: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Rozvrh po týdnech: [{"week": 1, "hours": 10.0, "items": [(node_id, hodiny), ...]}, ...].
+
+        Z dostupných uzlů bere vždy ten s nejdelším zbývajícím řetězem k cíli
+        (kritická cesta první); uzel se smí rozdělit přes víc týdnů.
+        """
+        budget = float(hours_per_week)
+        if budget <= 0:
+            raise ValueError("hours_per_week musí být kladné.")
+
+        def compute():
+            idx = self.index
+            need: Set[str] = set(idx.ids_of(self._required(target, track)))
+            tail: Dict[str, float] = {}
+            for nid in reversed(idx.topo_order):
+                if nid in need:
+                    tail[nid] = self._cost(nid) + max((tail[s] for s in idx.succ.get(nid, ()) if s in need), default=0.0)
+            indeg = {nid: sum(1 for p in idx.pred.get(nid, ()) if p in need) for nid in need}
+            heap = [(-tail[n], idx.topo_pos[n], n) for n, d in indeg.items() if d == 0]
+            heapq.heapify(heap)
+
+            weeks: List[Dict[str, Any]] = []
+            items: List[Tuple[str, float]] = []
+            left = budget
+            while heap:
+                _, _, nid = heapq.heappop(heap)
+                h = self._cost(nid)
+                while h > _EPS:
+                    take = min(h, left)
+                    items.append((nid, round(take, 2)))
+                    h -= take
+                    left -= take
+                    if left <= _EPS:
+                        weeks.append({"week": len(weeks) + 1, "hours": round(budget, 2), "items": items})
+                        items, left = [], budget
+                for s in idx.succ.get(nid, ()):
+                    if s in indeg:
+                        indeg[s] -= 1
+                        if indeg[s] == 0:
+                            heapq.heappush(heap, (-tail[s], idx.topo_pos[s], s))
+            if items:
+                weeks.append({"week": len(weeks) + 1, "hours": round(budget - left, 2), "items": items})
+            return weeks
+        return self._memoized(("schedule", budget, target, track), compute)
+
+
+# ====== cache plánovačů podle obsahu roadmapy ======
+_PLANNERS: "OrderedDict[str, StudyPlanner]" = OrderedDict()
+_MAX_PLANNERS = 4
+
+
+def planner_for(roadmap: Roadmap, completed: Iterable[str] = ()) -> StudyPlanner:
+    """Plánovač pro roadmapu (sdílený podle roadmap_hash), posunutý na zadané hotové uzly."""
+    key = roadmap_hash(roadmap)
+    pl = _PLANNERS.get(key)
+    if pl is None:
+        pl = _PLANNERS[key] = StudyPlanner(roadmap)
+        while len(_PLANNERS) > _MAX_PLANNERS:
+            _PLANNERS.popitem(last=False)
+    else:
+        _PLANNERS.move_to_end(key)
+    return pl.update(completed)
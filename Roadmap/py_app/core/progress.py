@@ -1,14 +1,75 @@
 # py_app/core/progress.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Any, Dict, List, Tuple, Optional, Iterable
-import json
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, List, Tuple, Optional, Iterable, FrozenSet, Mapping
+import uuid
+import shutil
+import asyncio
+import hashlib
+import weakref
+import functools
+import contextvars
 import datetime as dt
+from contextlib import contextmanager
+
+from .badges import engine as _badge_engine, XP_THRESHOLDS, STREAK_THRESHOLDS
+from .events import ProgressEvent, XP_GAINED, NODE_COMPLETED, DAY_ROLLED
+from .progress_store import ProgressStore, DEFAULT_USER
+from .storage import BINARY_SUFFIX
+from .unlock import UnlockEngine
+from . import review as _review
 
 # ====== Cesty ======
-_PROGRESS_PATH = Path("py_app/core/data/progress.json")
+_PROGRESS_PATH = Path(__file__).resolve().parent / "data" / "progress.json"
 _BACKUP_DIR = _PROGRESS_PATH.parent / "progress_backups"
 
+# ====== Úložiště + aktuální uživatel ======
+# Výchozí uživatel bydlí v _PROGRESS_PATH, ostatní v shardovaných souborech
+# vedle něj (viz ProgressStore). Uživatel se vybírá přes contextvar, takže ho
+# zdědí i asyncio tasky a asyncio.to_thread.
+_STORE: Optional[ProgressStore] = None
+_CURRENT_USER: contextvars.ContextVar[str] = contextvars.ContextVar("progress_user", default=DEFAULT_USER)
+
+def _store() -> ProgressStore:
+    global _STORE
+    if _STORE is None or _STORE.default_path != _PROGRESS_PATH:
+        _STORE = ProgressStore(_PROGRESS_PATH.parent, default_name=_PROGRESS_PATH.name,
+                               binary=_PROGRESS_PATH.suffix == BINARY_SUFFIX)
+    return _STORE
+
+def configure_store(root: str | Path, cache_size: int = 256, binary: bool = False) -> ProgressStore:
+    """
+    Přesune progress (všech uživatelů) do jiné složky, např. sdíleného disku workerů.
+    binary=True ukládá dokumenty v kompaktním binárním formátu (progress.bin).
+    """
+    global _PROGRESS_PATH, _BACKUP_DIR, _STORE
+    _PROGRESS_PATH = Path(root) / ("progress" + (BINARY_SUFFIX if binary else ".json"))
+    _BACKUP_DIR = Path(root) / "progress_backups"
+    _STORE = ProgressStore(root, default_name=_PROGRESS_PATH.name, cache_size=cache_size, binary=binary)
+    return _STORE
+
+def current_user() -> str:
+    return _CURRENT_USER.get()
+
+@contextmanager
+def use_user(user_id: str):
+    """Všechna volání progress API uvnitř bloku pracují s dokumentem daného uživatele."""
+    token = _CURRENT_USER.set(str(user_id))
+    try:
+        yield
+    finally:
+        _CURRENT_USER.reset(token)
+
+def _locked(fn):
+    """Read-modify-write pod zámkem uživatele (napříč vlákny i procesy)."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _store().locked(current_user()):
+            return fn(*args, **kwargs)
+    return wrapper
+
 # ====== Interní helpery ======
 def _today_str() -> str:
     return dt.date.today().isoformat()
@@ -27,55 +88,365 @@ def _default_progress() -> Dict[str, Any]:
         "completed_nodes": [],       # list[str]
         "tasks": {},                 # { node_id: { "tasks_done":[int,...], "completed": bool } }
         "badges": [],                # list[str]
+        "badges_unseen": [],         # odznaky udělené enginem, které UI ještě neohlásilo
         "recent": [],                # list[ { "date": "YYYY-MM-DD", "type":"xp|node", "amount":int, "id": str } ]
-        "meta": {"created": now, "last_updated": now, "version": 1}
+        "daily_log": {},             # { "YYYY-MM-DD": xp_za_den }
+        "reviews": {},               # { "node:idx": {ease, interval, reps, due} } – viz core/review.py
+        "review_due": {},            # { "YYYY-MM-DD": ["node:idx", ...] }
+        "aggregates": _empty_aggregates(),
+        "meta": {"created": now, "last_updated": now, "version": 1, "origin": uuid.uuid4().hex[:12]}
     }
 
+# ====== Materializované agregace ======
+# Průběh per track a denní XP se udržují přímo v dokumentu a aktualizují se
+# v rámci každé mutace, takže čtení (home, profil, odznaky) je O(1).
+#   aggregates = { "roadmap": <podpis roadmapy>,
+#                  "tasks_done": int,
+#                  "tracks": { track_id: {"units_done": int, "nodes_done": int} } }
+# "Jednotka" odpovídá metrice z category_progress_from_nodes: jeden task,
+# nebo celý uzel, pokud nemá tasks_all.
+
+_NODE_META: Dict[str, Tuple[str, int]] = {}          # node_id -> (track_id, počet tasků)
+_TRACK_TOTALS: Dict[str, Dict[str, int]] = {}        # track_id -> {"units": int, "nodes": int}
+_ROADMAP_SIG: Optional[str] = None
+_PREREQS: Dict[str, Tuple[str, ...]] = {}            # node_id -> prereqy
+_UNLOCKS: Dict[str, Tuple[str, ...]] = {}            # node_id -> uzly, které odemyká
+_UNLOCK_ENGINES: Dict[str, UnlockEngine] = {}        # cesta k dokumentu -> čítače odemykání
+
+def _empty_aggregates() -> Dict[str, Any]:
+    return {"roadmap": _ROADMAP_SIG, "tasks_done": 0, "tracks": {}}
+
+def _field(obj: Any, name: str, default: Any = None) -> Any:
+    """Čte atribut z pydantic modelu i z dictu (obrazovky pracují s obojím)."""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+def _roadmap_sig(meta: Dict[str, Tuple[str, int]]) -> str:
+    return hashlib.sha1(repr(sorted(meta.items())).encode("utf-8")).hexdigest()[:16]
+
+def bind_roadmap(roadmap: Any) -> None:
+    """
+    Zaregistruje strukturu roadmapy (uzel → track, počty tasků), ze které se
+    počítají agregace. Přijímá Roadmap model i surový dict z roadmap.json.
+    """
+    global _ROADMAP_SIG
+    meta: Dict[str, Tuple[str, int]] = {}
+    totals: Dict[str, Dict[str, int]] = {}
+    prereqs: Dict[str, Tuple[str, ...]] = {}
+    for t in _field(roadmap, "tracks", []) or []:
+        totals[str(_field(t, "id"))] = {"units": 0, "nodes": 0}
+    for n in _field(roadmap, "nodes", []) or []:
+        nid = str(_field(n, "id"))
+        tid = str(_field(n, "track"))
+        n_tasks = len(_field(n, "tasks_all") or [])
+        meta[nid] = (tid, n_tasks)
+        prereqs[nid] = tuple(str(x) for x in (_field(n, "prereqs") or []))
+        tot = totals.setdefault(tid, {"units": 0, "nodes": 0})
+        tot["units"] += n_tasks or 1
+        tot["nodes"] += 1
+
+    _NODE_META.clear()
+    _NODE_META.update(meta)
+    _TRACK_TOTALS.clear()
+    _TRACK_TOTALS.update(totals)
+    _ROADMAP_SIG = _roadmap_sig(meta)
+
+    unlocks: Dict[str, List[str]] = {nid: [] for nid in prereqs}
+    for nid, pre in prereqs.items():
+        for x in pre:
+            unlocks.setdefault(x, []).append(nid)
+    _PREREQS.clear()
+    _PREREQS.update(prereqs)
+    _UNLOCKS.clear()
+    _UNLOCKS.update((k, tuple(v)) for k, v in unlocks.items())
+    _UNLOCK_ENGINES.clear()
+
+def apply_roadmap_diff(roadmap: Any, diff: Any) -> None:
+    """
+    Po hot-reloadu (core/hot_reload.py) přepíše jen záznamy změněných uzlů:
+    meta/součty tracku, prereq mapy a čítače odemykání. Přidané/odebrané uzly
+    nebo změna struktury → plné bind_roadmap.
+    """
+    global _ROADMAP_SIG
+    if diff.structure:
+        bind_roadmap(roadmap)
+        return
+
+    index = roadmap.index
+    meta_changed = False
+    for nid in diff.changed:
+        n = index.node_by_id[nid]
+        new_meta = (str(n.track), len(n.tasks_all or []))
+        old_meta = _NODE_META.get(nid)
+        if old_meta != new_meta:
+            meta_changed = True
+            if old_meta is not None:
+                tot = _TRACK_TOTALS.setdefault(old_meta[0], {"units": 0, "nodes": 0})
+                tot["units"] -= old_meta[1] or 1
+                tot["nodes"] -= 1
+            tot = _TRACK_TOTALS.setdefault(new_meta[0], {"units": 0, "nodes": 0})
+            tot["units"] += new_meta[1] or 1
+            tot["nodes"] += 1
+            _NODE_META[nid] = new_meta
+
+    for nid in diff.prereqs_changed:
+        old = _PREREQS.get(nid, ())
+        new = tuple(str(x) for x in index.node_by_id[nid].prereqs)
+        for x in old:
+            _UNLOCKS[x] = tuple(s for s in _UNLOCKS.get(x, ()) if s != nid)
+        for x in new:
+            _UNLOCKS[x] = _UNLOCKS.get(x, ()) + (nid,)
+        _PREREQS[nid] = new
+    for eng in _UNLOCK_ENGINES.values():
+        eng.refresh(diff.prereqs_changed)
+
+    if meta_changed:
+        # jiný podpis → agregace uložených dokumentů se při čtení přepočítají
+        _ROADMAP_SIG = _roadmap_sig(_NODE_META)
+
+def _unlock_engine(p: Dict[str, Any]) -> UnlockEngine:
+    """Čítače odemykání aktuálního uživatele, dorovnané podle dokumentu `p`."""
+    key = str(_store().path_for(current_user()))
+    completed = set(map(str, p.get("completed_nodes", [])))
+    eng = _UNLOCK_ENGINES.get(key)
+    if eng is None:
+        eng = _UNLOCK_ENGINES[key] = UnlockEngine(_PREREQS, _UNLOCKS, completed)
+    else:
+        eng.sync(completed)
+    return eng
+
+@_locked
+def unlock_engine(completed: Optional[Iterable[str]] = None) -> UnlockEngine:
+    """
+    Sdílené čítače odemykání aktuálního uživatele (tytéž, které posouvá
+    evaluate_node_completion / mark_completed), dorovnané podle `completed`,
+    jinak podle uloženého dokumentu.
+    """
+    if completed is None:
+        return _unlock_engine(_read_progress_file())
+    return _unlock_engine({"completed_nodes": completed})
+
+def _track_bucket(p: Dict[str, Any], track_id: str) -> Dict[str, int]:
+    return p["aggregates"]["tracks"].setdefault(track_id, {"units_done": 0, "nodes_done": 0})
+
+def _rebuild_aggregates(p: Dict[str, Any]) -> None:
+    """Jednorázový plný přepočet (migrace starých souborů / změna roadmapy / import)."""
+    agg = _empty_aggregates()
+    p["aggregates"] = agg
+    completed = set(map(str, p.get("completed_nodes", [])))
+    for nid, bucket in (p.get("tasks", {}) or {}).items():
+        n_done = len(set(bucket.get("tasks_done", [])))
+        agg["tasks_done"] += n_done
+        meta = _NODE_META.get(str(nid))
+        if meta and meta[1] > 0:
+            _track_bucket(p, meta[0])["units_done"] += n_done
+    for nid in completed:
+        meta = _NODE_META.get(nid)
+        if not meta:
+            continue
+        b = _track_bucket(p, meta[0])
+        b["nodes_done"] += 1
+        if meta[1] == 0:
+            b["units_done"] += 1
+
+def _ensure_aggregates(p: Dict[str, Any]) -> None:
+    agg = p.get("aggregates")
+    if not isinstance(agg, dict) or (_NODE_META and agg.get("roadmap") != _ROADMAP_SIG):
+        _rebuild_aggregates(p)
+
+def _mark_aggregates_stale(p: Dict[str, Any]) -> None:
+    """Neznámý uzel → agregace dopočítáme při příštím čtení s navázanou roadmapou."""
+    p["aggregates"]["roadmap"] = None
+
+@_locked
+def _persist_reviews() -> Any:
+    """Starý dokument bez fronty opakování: založíme ji jednou a uložíme (ne při každém čtení)."""
+    data = _store().read(current_user())
+    if isinstance(data, dict) and "reviews" not in data:
+        _ensure_aggregates(data)
+        _review.reconcile(data, dt.date.today())
+        _write_progress_file(data, backup=False)
+    return data
+
+def _daily_log_from_recent(recent: Any) -> Dict[str, int]:
+    """Dokument z doby před daily_log: denní součty XP dopočítáme z recent."""
+    log: Dict[str, int] = {}
+    for ev in recent or []:
+        if isinstance(ev, dict) and ev.get("type") == "xp" and ev.get("date"):
+            log[ev["date"]] = log.get(ev["date"], 0) + int(ev.get("amount", 0))
+    return log
+
 def _read_progress_file() -> Dict[str, Any]:
     try:
-        if _PROGRESS_PATH.exists():
-            data = json.loads(_PROGRESS_PATH.read_text(encoding="utf-8"))
-            if isinstance(data, dict):
-                # doplníme chybějící klíče (migrace)
-                base = _default_progress()
-                for k, v in base.items():
-                    if k not in data:
-                        data[k] = v
-                if "meta" not in data:
-                    data["meta"] = {"created": dt.datetime.utcnow().isoformat(),
-                                    "last_updated": dt.datetime.utcnow().isoformat(),
-                                    "version": 1}
-                return data
+        data = _store().read(current_user())
+        if isinstance(data, dict) and "reviews" not in data:
+            data = _persist_reviews()
+        if isinstance(data, dict):
+            # agregace dopočítáme dřív, než je default níže doplní prázdné
+            _ensure_aggregates(data)
+            if "daily_log" not in data:
+                data["daily_log"] = _daily_log_from_recent(data.get("recent"))
+            # doplníme chybějící klíče (migrace)
+            base = _default_progress()
+            for k, v in base.items():
+                if k not in data:
+                    data[k] = v
+            if "meta" not in data:
+                data["meta"] = {"created": dt.datetime.utcnow().isoformat(),
+                                "last_updated": dt.datetime.utcnow().isoformat(),
+                                "version": 1}
+            return data
     except Exception as e:
         print(f"[PROGRESS] Chyba čtení: {e}")
     return _default_progress()
 
-def _write_progress_file(data: Dict[str, Any], backup: bool = True) -> None:
+@_locked
+def _write_progress_file(data: Dict[str, Any], backup: bool = True) -> bool:
+    """Uloží dokument; vrací False, pokud se zápis nepovedl (chyba se jen vypíše)."""
+    pending = data.pop(_PENDING_OPS, None) or []
     try:
-        _PROGRESS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        user = current_user()
+        path = _store().source_for(user)
         data.setdefault("meta", {})
         data["meta"]["last_updated"] = dt.datetime.utcnow().isoformat()
 
-        if backup and _PROGRESS_PATH.exists():
-            _BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+        if backup and path.exists():
+            bdir = _BACKUP_DIR if user == DEFAULT_USER else _BACKUP_DIR / path.parent.name / path.stem
+            bdir.mkdir(parents=True, exist_ok=True)
             ts = dt.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            (_BACKUP_DIR / f"progress_{ts}.json").write_text(
-                json.dumps(_read_progress_file(), ensure_ascii=False, indent=2),
-                encoding="utf-8"
-            )
+            shutil.copyfile(path, bdir / f"progress_{ts}{path.suffix}")
 
-        _PROGRESS_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        _store().write(user, data)
     except Exception as e:
         print(f"[PROGRESS] Chyba zápisu: {e}")
+        return False
+    for op in pending:
+        _notify_op(op)
+    return True
+
+# ====== Synchronizační log ======
+# Log se vede až od první synchronizace (sync_progress zavolá _sync_state);
+# dokument, který se nikdy nesynchronizuje, tak neroste s každou mutací.
+# Každá lokální mutace pak zapíše operaci {dev, seq, ts, type, ...} do sync.ops.
+#   dev   – ID zařízení (dokumentu), seq – pořadí operací zařízení (1, 2, ...)
+#   ts    – Lamportovy hodiny (pro last-writer-wins u tasků)
+# sync.clock je vektor „nejvyšší seq viděné od každého zařízení“. Delta pro
+# protistranu = operace se seq > její clock[dev] (viz core/sync.py).
+def _sync_enabled(p: Dict[str, Any]) -> bool:
+    st = p.get("sync")
+    return isinstance(st, dict) and "device" in st
+
+def _sync_state(p: Dict[str, Any]) -> Dict[str, Any]:
+    """Stav synchronizace; první volání ji zapne a převede dosavadní stav na operace."""
+    if not _sync_enabled(p):
+        p["sync"] = {"device": uuid.uuid4().hex[:12], "seq": 0, "lamport": 0,
+                     "clock": {}, "ops": [], "task_ts": {}, "xp": {}, "xp_base": {}}
+        _bootstrap_ops(p)
+    return p["sync"]
+
+_OP_LISTENERS: List[Any] = []   # callbacky (user_id, op) – např. analytický spool
+
+def add_op_listener(fn) -> None:
+    """Zaregistruje odběratele všech operací (lokálních i přijatých synchronizací)."""
+    if fn not in _OP_LISTENERS:
+        _OP_LISTENERS.append(fn)
+
+# Operace se odběratelům posílají až po úspěšném zápisu dokumentu: do té doby
+# čekají v dokumentu pod _PENDING_OPS (_write_progress_file je před zápisem vyjme).
+_PENDING_OPS = "__pending_ops__"
+
+def _queue_op(p: Dict[str, Any], op: Dict[str, Any]) -> None:
+    p.setdefault(_PENDING_OPS, []).append(op)
+
+def _notify_op(op: Dict[str, Any]) -> None:
+    for fn in _OP_LISTENERS:
+        try:
+            fn(current_user(), op)
+        except Exception as e:
+            print(f"[PROGRESS] Chyba odběratele operací: {e}")
+
+def _log_op(p: Dict[str, Any], op: Dict[str, Any], notify: bool = True) -> Dict[str, Any]:
+    if not _sync_enabled(p):
+        # bez synchronizace se nic neloguje, operaci dostanou jen odběratelé
+        _queue_op(p, op)
+        return op
+    st = p["sync"]
+    st["seq"] += 1
+    st["lamport"] += 1
+    op = dict(op, dev=st["device"], seq=st["seq"], ts=st["lamport"])
+    st["clock"][st["device"]] = st["seq"]
+    st["ops"].append(op)
+    if op["type"] == "xp":
+        st["xp"][st["device"]] = int(st["xp"].get(st["device"], 0)) + int(op["amount"])
+    elif op["type"] == "task":
+        st["task_ts"][f"{op['node']}:{int(op['idx'])}"] = [op["ts"], op["dev"]]
+    if notify:
+        _queue_op(p, op)
+    return op
+
+def _history_origin(p: Dict[str, Any]) -> str:
+    """Společné id historie – kopie téhož dokumentu na dvou zařízeních ho sdílí."""
+    meta = p.setdefault("meta", {})
+    return str(meta.get("origin") or meta.get("created") or "legacy")
+
+def _bootstrap_ops(p: Dict[str, Any]) -> None:
+    """
+    Dokument z doby před synchronizací: dosavadní stav převedeme na operace
+    (jen do logu – odběratelé tyhle události už dřív dostali jednotlivě).
+    Tasky, uzly a odznaky jsou idempotentní. XP ne: společná část historie jde
+    jako "xp_base" s id historie (max-registr – kopie ji nesečtou dvakrát),
+    XP získané po rozdělení (meta.fork_xp, viz export_progress) jako běžná "xp"
+    operace do G-counteru zařízení. Bez značky se celé XP bere jako společné,
+    takže kopie, které se rozešly před první synchronizací, z rozdílu
+    započtou jen větší z přírůstků.
+    """
+    for nid, bucket in sorted((p.get("tasks", {}) or {}).items()):
+        for i in sorted(set(bucket.get("tasks_done", []))):
+            _log_op(p, {"type": "task", "node": str(nid), "idx": int(i), "done": True}, notify=False)
+    for nid in sorted(set(map(str, p.get("completed_nodes", [])))):
+        _log_op(p, {"type": "node", "node": nid}, notify=False)
+    xp = int(p.get("xp", 0))
+    fork = p.get("meta", {}).get("fork_xp")
+    base = xp if fork is None else min(xp, int(fork))
+    day = p.get("last_day") or _today_str()
+    if base > 0:
+        origin = _history_origin(p)
+        p["sync"]["xp_base"][origin] = base
+        _log_op(p, {"type": "xp_base", "origin": origin, "amount": base, "date": day}, notify=False)
+    if xp > base:
+        _log_op(p, {"type": "xp", "amount": xp - base, "date": day, "node": None}, notify=False)
+    for bid in sorted(set(p.get("badges", []))):
+        _log_op(p, {"type": "badge", "id": bid}, notify=False)
+
+def _dispatch(p: Dict[str, Any], events: List[ProgressEvent]) -> List[str]:
+    """Badge engine + zápis udělených odznaků do sync logu."""
+    newly = _badge_engine.dispatch(p, events)
+    for bid in newly:
+        _log_op(p, {"type": "badge", "id": bid})
+    return newly
 
 # ====== Veřejné utility (export/import/reset) ======
+@_locked
 def export_progress() -> Dict[str, Any]:
-    return _read_progress_file()
+    """
+    Dokument k přenosu na jiné zařízení. Před první synchronizací si export
+    (v exportu i ve zdroji) poznamená XP v bodě rozdělení (meta.fork_xp), aby
+    sync mohl sečíst, co která kopie získala potom (viz _bootstrap_ops).
+    """
+    p = _read_progress_file()
+    if not _sync_enabled(p):
+        p.setdefault("meta", {})["fork_xp"] = int(p.get("xp", 0))
+        _write_progress_file(p)
+    return p
 
+@_locked
 def import_progress(obj: Dict[str, Any], overwrite: bool = True) -> Dict[str, Any]:
     if not isinstance(obj, dict):
         raise ValueError("Importovaný objekt není dict.")
     if overwrite:
+        _rebuild_aggregates(obj)
+        _review.reconcile(obj, dt.date.today())
         _write_progress_file(obj)
         return obj
 
@@ -110,9 +481,17 @@ def import_progress(obj: Dict[str, Any], overwrite: bool = True) -> Dict[str, An
     rb = list(obj.get("recent", []))
     merged["recent"] = (rb + ra)[-50:]
 
+    dl = dict(cur.get("daily_log", {}) or {})
+    for day, amount in (obj.get("daily_log", {}) or {}).items():
+        dl[day] = max(int(dl.get(day, 0)), int(amount))
+    merged["daily_log"] = dl
+
+    _rebuild_aggregates(merged)
+    _review.reconcile(merged, dt.date.today())
     _write_progress_file(merged)
     return merged
 
+@_locked
 def reset_progress(full_reset: bool = True) -> None:
     if full_reset:
         _write_progress_file(_default_progress())
@@ -120,7 +499,8 @@ def reset_progress(full_reset: bool = True) -> None:
         cur = _read_progress_file()
         cur.update({
             "xp": 0, "level": 1, "streak_days": 0, "last_day": None,
-            "completed_nodes": [], "tasks": {}, "recent": []
+            "completed_nodes": [], "tasks": {}, "recent": [],
+            "daily_log": {}, "aggregates": _empty_aggregates()
         })
         _write_progress_file(cur)
 
@@ -137,16 +517,18 @@ def save_progress(data: Dict[str, Any]) -> None:
 def get_daily_goal() -> int:
     return int(_read_progress_file().get("daily_goal", 50))
 
+@_locked
 def set_daily_goal(v: int) -> None:
     p = _read_progress_file()
     p["daily_goal"] = int(max(0, v))
     _write_progress_file(p)
 
-def _record_xp_event(amount: int, node_id: Optional[str] = None) -> None:
-    """Zapíše XP událost do recent + udržuje streak."""
+def _apply_xp(p: Dict[str, Any], amount: int, node_id: Optional[str] = None,
+              log: bool = True) -> List[ProgressEvent]:
+    """Připíše XP do dokumentu: streak, level, recent a denní součet v daily_log."""
     if amount <= 0:
-        return
-    p = _read_progress_file()
+        return []
+    events: List[ProgressEvent] = []
 
     # streak update
     today = _today_str()
@@ -158,85 +540,215 @@ def _record_xp_event(amount: int, node_id: Optional[str] = None) -> None:
         else:
             p["streak_days"] = 1
         p["last_day"] = today
+        events.append(ProgressEvent(DAY_ROLLED, amount=int(p["streak_days"])))
+
+    _credit_xp(p, amount, today, node_id)
+    if log:
+        _log_op(p, {"type": "xp", "amount": int(amount), "date": today,
+                    "node": str(node_id) if node_id is not None else None})
 
+    events.append(ProgressEvent(XP_GAINED, amount=int(amount),
+                                node_id=str(node_id) if node_id is not None else None))
+    return events
+
+def _credit_xp(p: Dict[str, Any], amount: int, day: str, node_id: Optional[str] = None) -> None:
+    """XP, level, daily_log a recent – společné pro lokální i synchronizované události."""
     p["xp"] = int(p.get("xp", 0)) + int(amount)
     # jednoduchý level-up: každých 100 XP nová úroveň
     p["level"] = max(1, p["xp"] // 100 + 1)
 
+    log = p.setdefault("daily_log", {})
+    log[day] = int(log.get(day, 0)) + int(amount)
+
     p.setdefault("recent", [])
     p["recent"].append({
-        "date": today,
+        "date": day,
         "type": "xp",
         "amount": int(amount),
         "id": str(node_id) if node_id is not None else None
     })
     p["recent"] = p["recent"][-50:]
 
+@_locked
+def _record_xp_event(amount: int, node_id: Optional[str] = None) -> None:
+    """Zapíše XP událost do recent + udržuje streak."""
+    if amount <= 0:
+        return
+    p = _read_progress_file()
+    _dispatch(p, _apply_xp(p, amount, node_id))
     _write_progress_file(p)
 
+def _today_xp_of(p: Dict[str, Any]) -> int:
+    return int((p.get("daily_log") or {}).get(_today_str(), 0))
+
 def today_xp() -> int:
+    return _today_xp_of(_read_progress_file())
+
+def _goal_hit(p: Dict[str, Any]) -> bool:
+    return _today_xp_of(p) >= int(p.get("daily_goal", 50))
+
+# ====== Snapshot pro hromadné čtení ======
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """
+    Neměnný pohled na progress z jednoho načtení souboru.
+    - completed: hotové uzly
+    - done_bits: node_id -> bitová maska splněných indexů tasků
+    - ratios:    node_id -> podíl 0..1 pro uzly navázané roadmapy
+    """
+    completed: FrozenSet[str]
+    done_bits: Mapping[str, int]
+    ratios: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+
+    def tasks_done(self, node_id: str) -> List[int]:
+        bits = self.done_bits.get(str(node_id), 0)
+        out: List[int] = []
+        i = 0
+        while bits:
+            if bits & 1:
+                out.append(i)
+            bits >>= 1
+            i += 1
+        return out
+
+    def done_count(self, node_id: str) -> int:
+        return self.done_bits.get(str(node_id), 0).bit_count()
+
+    def ratio(self, node: Dict[str, Any]) -> float:
+        nid = str(node.get("id"))
+        tasks_all = node.get("tasks_all") or []
+        if not tasks_all:
+            return 1.0 if nid in self.completed else 0.0
+        return max(0.0, min(1.0, self.done_count(nid) / len(tasks_all)))
+
+def _snapshot_of(p: Dict[str, Any]) -> ProgressSnapshot:
+    completed = frozenset(map(str, p.get("completed_nodes", [])))
+    bits: Dict[str, int] = {}
+    for nid, bucket in (p.get("tasks", {}) or {}).items():
+        mask = 0
+        for i in bucket.get("tasks_done", []):
+            mask |= 1 << int(i)
+        if mask:
+            bits[str(nid)] = mask
+    ratios: Dict[str, float] = {}
+    for nid, (_, n_tasks) in _NODE_META.items():
+        if n_tasks:
+            ratios[nid] = min(1.0, bits.get(nid, 0).bit_count() / n_tasks)
+        else:
+            ratios[nid] = 1.0 if nid in completed else 0.0
+    return ProgressSnapshot(completed, MappingProxyType(bits), MappingProxyType(ratios))
+
+def progress_snapshot() -> ProgressSnapshot:
+    """Jedno načtení progress.json → indexovaný pohled pro vykreslení celého tracku."""
+    return _snapshot_of(_read_progress_file())
+
+@_locked
+def progress_state() -> Tuple[ProgressSnapshot, UnlockEngine]:
+    """Snapshot + sdílené čítače odemykání dorovnané podle téhož načtení."""
     p = _read_progress_file()
-    today = _today_str()
-    total = 0
-    for ev in p.get("recent", []):
-        if ev.get("type") == "xp" and ev.get("date") == today:
-            total += int(ev.get("amount", 0))
-    return total
+    return _snapshot_of(p), _unlock_engine(p)
 
-def get_tasks_done(node_id: str) -> List[int]:
+def get_tasks_done(node_id: str, snapshot: Optional[ProgressSnapshot] = None) -> List[int]:
+    if snapshot is not None:
+        return snapshot.tasks_done(node_id)
     p = _read_progress_file()
     bucket = p.get("tasks", {}).get(str(node_id), {})
     return [int(i) for i in bucket.get("tasks_done", [])]
 
-def set_task_done(node_id: str, index: int, done: bool) -> Dict[str, Any]:
-    p = _read_progress_file()
-    nid = str(node_id)
+def _apply_task(p: Dict[str, Any], nid: str, index: int, done: bool, log: bool = True) -> None:
+    """Přepne task v dokumentu a posune čítače tracku o ±1."""
     p.setdefault("tasks", {})
     p["tasks"].setdefault(nid, {"tasks_done": [], "completed": False})
     s = set(map(int, p["tasks"][nid]["tasks_done"]))
+    before = len(s)
     if done:
         s.add(int(index))
     else:
         s.discard(int(index))
     p["tasks"][nid]["tasks_done"] = sorted(s)
+
+    delta = len(s) - before
+    if not delta:
+        return
+    key = _review.task_key(nid, index)
+    if done:
+        _review.enroll(p, key, dt.date.today())
+    else:
+        _review.drop(p, key)
+    if log:
+        _log_op(p, {"type": "task", "node": nid, "idx": int(index), "done": bool(done)})
+    p["aggregates"]["tasks_done"] = int(p["aggregates"].get("tasks_done", 0)) + delta
+    meta = _NODE_META.get(nid)
+    if meta is None:
+        _mark_aggregates_stale(p)
+    elif meta[1] > 0:
+        _track_bucket(p, meta[0])["units_done"] += delta
+
+def _apply_node_completed(p: Dict[str, Any], nid: str, log: bool = True) -> List[ProgressEvent]:
+    """Označí uzel v dokumentu jako hotový. Vrací [], pokud už hotový byl."""
+    completed = set(map(str, p.get("completed_nodes", [])))
+    if nid in completed:
+        return []
+    if log:
+        _log_op(p, {"type": "node", "node": nid})
+    p["completed_nodes"] = sorted(completed | {nid})
+    p.setdefault("tasks", {}).setdefault(nid, {"tasks_done": [], "completed": False})
+    p["tasks"][nid]["completed"] = True
+
+    meta = _NODE_META.get(nid)
+    if meta is None:
+        _mark_aggregates_stale(p)
+        return [ProgressEvent(NODE_COMPLETED, node_id=nid)]
+    b = _track_bucket(p, meta[0])
+    b["nodes_done"] += 1
+    if meta[1] == 0:
+        b["units_done"] += 1
+    remaining = _TRACK_TOTALS.get(meta[0], {}).get("nodes", 0) - b["nodes_done"]
+    return [ProgressEvent(NODE_COMPLETED, node_id=nid, track=meta[0], remaining=remaining)]
+
+@_locked
+def set_task_done(node_id: str, index: int, done: bool) -> Dict[str, Any]:
+    p = _read_progress_file()
+    nid = str(node_id)
+    _apply_task(p, nid, index, done)
     _write_progress_file(p)
     return p["tasks"][nid]
 
-def node_progress_ratio(node: Dict[str, Any]) -> float:
-    tasks_all = node.get("tasks_all") or []
-    if not tasks_all:
-        # uzel bez úkolů – bereme hotové jen po označení completed
-        p = _read_progress_file()
-        return 1.0 if str(node.get("id")) in set(map(str, p.get("completed_nodes", []))) else 0.0
-    done = set(get_tasks_done(node.get("id")))
-    r = len(done) / max(1, len(tasks_all))
-    return max(0.0, min(1.0, float(r)))
+def node_progress_ratio(node: Dict[str, Any], snapshot: Optional[ProgressSnapshot] = None) -> float:
+    return (snapshot or progress_snapshot()).ratio(node)
 
+@_locked
 def evaluate_node_completion(node: Dict[str, Any], xp_award: int = 10) -> Tuple[bool, List[str], bool]:
     """
     Vrátí (just_completed, newly_unlocked_ids, goal_hit).
-    newly_unlocked necháváme prázdné (logika odemykání je v UI), ale držíme signaturu.
+    newly_unlocked = uzly, kterým dokončením právě ubyl poslední chybějící prereq
+    (jen s navázanou roadmapou, viz bind_roadmap).
     """
     p = _read_progress_file()
     nid = str(node.get("id"))
     tasks_all = node.get("tasks_all") or []
-    done_set = set(get_tasks_done(nid))
+    done_set = set(p.get("tasks", {}).get(nid, {}).get("tasks_done", []))
     already_completed = nid in set(map(str, p.get("completed_nodes", [])))
 
     just_completed = (not already_completed) and (len(tasks_all) > 0) and (len(done_set) == len(tasks_all))
     goal_hit = False
+    unlocked: List[str] = []
 
     if just_completed:
-        p["completed_nodes"] = sorted(set(map(str, p.get("completed_nodes", []))) | {nid})
-        p.setdefault("tasks", {}).setdefault(nid, {"tasks_done": [], "completed": False})
-        p["tasks"][nid]["completed"] = True
-        _write_progress_file(p)
+        engine = _unlock_engine(p)
+        events = _apply_node_completed(p, nid)
         # XP + denní cíl
-        _record_xp_event(xp_award, node_id=nid)
-        goal_hit = today_xp() >= get_daily_goal()
+        events += _apply_xp(p, xp_award, node_id=nid)
+        _dispatch(p, events)
+        # čítače se posunou až po uložení – neuložené dokončení nic neodemkne
+        if not _write_progress_file(p):
+            return False, [], False
+        unlocked = engine.complete(nid)
+        goal_hit = _goal_hit(p)
 
-    return just_completed, [], goal_hit
+    return just_completed, unlocked, goal_hit
 
+@_locked
 def mark_completed(node_id: str, xp_award: int = 10) -> Tuple[bool, bool]:
     """
     Označí uzel jako hotový bez ohledu na tasks_all.
@@ -244,23 +756,21 @@ def mark_completed(node_id: str, xp_award: int = 10) -> Tuple[bool, bool]:
     """
     p = _read_progress_file()
     nid = str(node_id)
-    already = nid in set(map(str, p.get("completed_nodes", [])))
-    goal_hit = False
 
-    if not already:
-        p["completed_nodes"] = sorted(set(map(str, p.get("completed_nodes", []))) | {nid})
-        p.setdefault("tasks", {}).setdefault(nid, {"tasks_done": [], "completed": True})
-        p["tasks"][nid]["completed"] = True
-        _write_progress_file(p)
-        _record_xp_event(xp_award, node_id=nid)
-        goal_hit = today_xp() >= get_daily_goal()
-        return True, goal_hit
-    return False, today_xp() >= get_daily_goal()
-
-def first_available_index(nodes: List[Dict[str, Any]]) -> int:
+    engine = _unlock_engine(p)
+    events = _apply_node_completed(p, nid)
+    if events:
+        events += _apply_xp(p, xp_award, node_id=nid)
+        _dispatch(p, events)
+        if not _write_progress_file(p):
+            return False, False
+        engine.complete(nid)
+        return True, _goal_hit(p)
+    return False, _goal_hit(p)
+
+def first_available_index(nodes: List[Dict[str, Any]], snapshot: Optional[ProgressSnapshot] = None) -> int:
     """Najde první uzel se statusem 'available', jinak první ne-hotový, jinak 0."""
-    p = _read_progress_file()
-    completed = set(map(str, p.get("completed_nodes", [])))
+    completed = (snapshot or progress_snapshot()).completed
     for i, n in enumerate(nodes):
         st = n.get("__status__")
         if st == "available":
@@ -270,7 +780,8 @@ def first_available_index(nodes: List[Dict[str, Any]]) -> int:
             return i
     return 0
 
-def category_progress_from_nodes(nodes: List[Dict[str, Any]]) -> Dict[str, int]:
+def category_progress_from_nodes(nodes: List[Dict[str, Any]],
+                                 snapshot: Optional[ProgressSnapshot] = None) -> Dict[str, int]:
     """
     Vypočítá agregovaný postup pro kategorii:
       - total: počet všech tasků (sum přes nodes[].tasks_all)
@@ -278,8 +789,7 @@ def category_progress_from_nodes(nodes: List[Dict[str, Any]]) -> Dict[str, int]:
       - pct  : procenta (zaokrouhlená)
     Pokud node nemá tasks_all, počítáme jej jako 0/0; pokud je completed, přičteme 1/1.
     """
-    p = _read_progress_file()
-    completed = set(map(str, p.get("completed_nodes", [])))
+    snap = snapshot or progress_snapshot()
     total = 0
     done = 0
     for n in nodes:
@@ -287,12 +797,23 @@ def category_progress_from_nodes(nodes: List[Dict[str, Any]]) -> Dict[str, int]:
         tasks = n.get("tasks_all") or []
         if tasks:
             total += len(tasks)
-            done += len(set(get_tasks_done(nid)))
+            done += snap.done_count(nid)
         else:
             # bez úkolů – pokud completed, ber 1/1 jinak 0/1?
             # Abychom nedeformovali metriky, započítáme jen pokud chceme uzly bez úkolů vidět:
             total += 1
-            done += 1 if nid in completed else 0
+            done += 1 if nid in snap.completed else 0
+    pct = int(round((done / total) * 100)) if total > 0 else 0
+    return {"total": total, "done": done, "pct": pct}
+
+def track_progress(track_id: str) -> Dict[str, int]:
+    """
+    Stejná metrika jako category_progress_from_nodes pro celý track, ale O(1)
+    z materializovaných čítačů (vyžaduje bind_roadmap).
+    """
+    p = _read_progress_file()
+    total = int(_TRACK_TOTALS.get(str(track_id), {}).get("units", 0))
+    done = int(p["aggregates"]["tracks"].get(str(track_id), {}).get("units_done", 0))
     pct = int(round((done / total) * 100)) if total > 0 else 0
     return {"total": total, "done": done, "pct": pct}
 
@@ -304,48 +825,37 @@ def _candidate_badges(roadmap: Optional[Any]) -> List[str]:
     - Streak: 3, 7, 14, 30
     - Kategorie: 'track_<id>_complete'
     """
-    out: List[str] = ["xp_100", "xp_500", "xp_1000", "streak_3", "streak_7", "streak_14", "streak_30"]
+    out: List[str] = [f"xp_{th}" for th in XP_THRESHOLDS] + [f"streak_{th}" for th in STREAK_THRESHOLDS]
     if roadmap:
-        for t in getattr(roadmap, "tracks", []):
-            out.append(f"track_{t.id}_complete")
+        for t in _field(roadmap, "tracks", []) or []:
+            out.append(f"track_{_field(t, 'id')}_complete")
     return out
 
+@_locked
 def recompute_badges(roadmap: Optional[Any] = None) -> Tuple[List[str], List[str]]:
     """
-    Přepočítá odznaky dle aktuálního stavu.
-    Vrací (všechny_možné, nově_udělené) — nové se rovnou uloží do progress.
+    Vrací (všechny_možné, nově_udělené).
+    Odznaky uděluje badge engine přímo v mutacích; tady vracíme ty, které UI
+    ještě neukázalo, a pro jistotu jednou proženeme pravidla syntetickými
+    událostmi (O(pravidla + tracky), bez průchodu uzly).
     """
     p = _read_progress_file()
-    owned = set(p.get("badges", []))
     possible = set(_candidate_badges(roadmap))
 
-    newly: List[str] = []
-
-    # XP thresholds
-    xp = int(p.get("xp", 0))
-    for th, bid in [(100, "xp_100"), (500, "xp_500"), (1000, "xp_1000")]:
-        if xp >= th and bid not in owned:
-            newly.append(bid)
+    if roadmap and not _NODE_META:
+        bind_roadmap(roadmap)
+        _ensure_aggregates(p)
 
-    # Streak thresholds
-    streak = int(p.get("streak_days", 0))
-    for th, bid in [(3, "streak_3"), (7, "streak_7"), (14, "streak_14"), (30, "streak_30")]:
-        if streak >= th and bid not in owned:
-            newly.append(bid)
+    events = [ProgressEvent(XP_GAINED), ProgressEvent(DAY_ROLLED)]
+    for tid, tot in _TRACK_TOTALS.items():
+        done_nodes = int(p["aggregates"]["tracks"].get(tid, {}).get("nodes_done", 0))
+        if tot["nodes"]:
+            events.append(ProgressEvent(NODE_COMPLETED, track=tid, remaining=tot["nodes"] - done_nodes))
+    _dispatch(p, events)
 
-    # Kategorie kompletní
-    if roadmap:
-        completed = set(map(str, p.get("completed_nodes", [])))
-        for t in roadmap.tracks:
-            t_nodes = [n for n in roadmap.nodes if n.track == t.id]
-            if t_nodes and all(str(n.id) in completed for n in t_nodes):
-                bid = f"track_{t.id}_complete"
-                if bid not in owned:
-                    newly.append(bid)
-
-    # Ulož
+    newly = list(p.get("badges_unseen", []))
     if newly:
-        p["badges"] = sorted(owned | set(newly))
+        p["badges_unseen"] = []
         _write_progress_file(p)
 
     return sorted(possible), newly
@@ -354,10 +864,12 @@ def recompute_badges(roadmap: Optional[Any] = None) -> Tuple[List[str], List[str
 def add_xp(amount: int) -> None:
     _record_xp_event(int(amount))
 
+@_locked
 def add_badge(badge_id: str) -> None:
     p = _read_progress_file()
     if badge_id not in p.get("badges", []):
         p.setdefault("badges", []).append(badge_id)
+        _log_op(p, {"type": "badge", "id": badge_id})
         _write_progress_file(p)
 
 def mark_task_done(node_id: str, task_id: int) -> None:
@@ -365,15 +877,12 @@ def mark_task_done(node_id: str, task_id: int) -> None:
     cur.add(int(task_id))
     set_task_done(node_id, int(task_id), True)
 
-from datetime import datetime
-
 def get_today_progress() -> float:
     """
     Vrací dnešní progres jako číslo 0.0 – 1.0 podle počtu splněných úkolů.
     """
     data = _read_progress_file()
-    tasks = data.get("tasks", {})
-    completed = sum(len(v.get("tasks_done", [])) for v in tasks.values())
+    completed = int(data["aggregates"].get("tasks_done", 0))
     # Předpokládejme max. 5 úkolů jako základní cíl
     return min(completed / 5, 1.0)
 
@@ -384,3 +893,95 @@ def get_current_streak() -> int:
     """
     data = _read_progress_file()
     return int(data.get("streak_days", 0))
+
+
+# ====== Opakování (spaced repetition) ======
+def due_reviews(limit: Optional[int] = None) -> List[Tuple[str, int]]:
+    """Tasky, které jsou dnes na řadě k opakování: [(node_id, index_tasku)]."""
+    p = _read_progress_file()
+    return [_review.split_key(k) for k in _review.due(p, dt.date.today(), limit)]
+
+def due_review_count() -> int:
+    return _review.due_count(_read_progress_file(), dt.date.today())
+
+@_locked
+def review_task(node_id: str, index: int, quality: int) -> Dict[str, Any]:
+    """Zapíše výsledek opakování (quality 0..5) a vrátí nový stav položky (ease, interval, due)."""
+    p = _read_progress_file()
+    key = _review.task_key(str(node_id), index)
+    if key not in p["reviews"]:
+        raise KeyError(f"Task {key} není v opakování.")
+    item = dict(_review.grade(p, key, quality, dt.date.today()))
+    _write_progress_file(p, backup=False)
+    return item
+
+
+# ====== Async API (Flet event loop) ======
+# Disková práce běží v thread poolu (asyncio.to_thread), takže handler ve smyčce
+# Fletu nikdy nečeká na I/O. Zapisovatelé jsou serializovaní přes asyncio.Lock,
+# aby se dva read-modify-write cykly z různých kliknutí nepřepsaly.
+_ASYNC_LOCKS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+def _async_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _ASYNC_LOCKS.get(loop)
+    if lock is None:
+        lock = _ASYNC_LOCKS[loop] = asyncio.Lock()
+    return lock
+
+async def _aread(fn, *args, **kwargs):
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+async def _awrite(fn, *args, **kwargs):
+    async with _async_lock():
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+async def aload_progress() -> Dict[str, Any]:
+    return await _aread(load_progress)
+
+async def aprogress_snapshot() -> ProgressSnapshot:
+    return await _aread(progress_snapshot)
+
+async def aprogress_state() -> Tuple[ProgressSnapshot, UnlockEngine]:
+    return await _aread(progress_state)
+
+async def aget_daily_goal() -> int:
+    return await _aread(get_daily_goal)
+
+async def atoday_xp() -> int:
+    return await _aread(today_xp)
+
+async def aset_daily_goal(v: int) -> None:
+    await _awrite(set_daily_goal, v)
+
+async def aset_task_done(node_id: str, index: int, done: bool) -> Dict[str, Any]:
+    return await _awrite(set_task_done, node_id, index, done)
+
+async def aevaluate_node_completion(node: Dict[str, Any], xp_award: int = 10) -> Tuple[bool, List[str], bool]:
+    return await _awrite(evaluate_node_completion, node, xp_award)
+
+@_locked
+def _toggle_task_and_evaluate(node: Dict[str, Any], index: int, done: bool,
+                              xp_award: int) -> Tuple[bool, List[str], bool]:
+    set_task_done(str(node.get("id")), index, done)
+    return evaluate_node_completion(node, xp_award)
+
+async def aset_task_and_evaluate(node: Dict[str, Any], index: int, done: bool,
+                                 xp_award: int = 10) -> Tuple[bool, List[str], bool]:
+    """Zaškrtnutí tasku + vyhodnocení uzlu pod jedním zámkem (jiný handler ani proces se mezi ně nevklíní)."""
+    return await _awrite(_toggle_task_and_evaluate, node, index, done, xp_award)
+
+async def amark_completed(node_id: str, xp_award: int = 10) -> Tuple[bool, bool]:
+    return await _awrite(mark_completed, node_id, xp_award)
+
+async def arecompute_badges(roadmap: Optional[Any] = None) -> Tuple[List[str], List[str]]:
+    return await _awrite(recompute_badges, roadmap)
+
+async def aadd_xp(amount: int) -> None:
+    await _awrite(add_xp, amount)
+
+async def adue_reviews(limit: Optional[int] = None) -> List[Tuple[str, int]]:
+    return await _aread(due_reviews, limit)
+
+async def areview_task(node_id: str, index: int, quality: int) -> Dict[str, Any]:
+    return await _awrite(review_task, node_id, index, quality)
@@ -0,0 +1,142 @@
+# py_app/core/progress_store.py
+from __future__ import annotations
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+import copy
+import hashlib
+import os
+import re
+import threading
+
+from .storage import BINARY_SUFFIX, KIND_PROGRESS, decode_document, write_document
+
+try:  # advisory locking je jen na POSIXu; na Windows běžíme bez zámků
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+DEFAULT_USER = "default"
+
+_SAFE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+def _stamp(st: os.stat_result) -> Tuple[int, int, int]:
+    # os.replace mění inode, takže i zápis se stejnou velikostí ve stejném ns poznáme
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class ProgressStore:
+    """
+    Úložiště progressu rozdělené po uživatelích.
+
+    - výchozí uživatel zůstává v <root>/<default_name> (zpětná kompatibilita),
+      ostatní jsou v <root>/users/<shard>/<user>.json, shard = 2 hex znaky hashe
+    - read-modify-write chrání fcntl zámek na <soubor>.lock (sdílený mezi procesy),
+      v rámci vlákna je zámek reentrantní
+    - zápis jde přes dočasný soubor + fsync + os.replace (core/storage.py),
+      čtenáři tak nikdy neuvidí půlku a pád nepoškodí původní soubor
+    - formát souboru podle přípony: .bin = kompaktní binární, jinak JSON;
+      binary=True zapisuje .bin; dokud .bin neexistuje, čte se JSON vedle
+      (<user>.json, progress.json) a při příštím zápisu se převede
+    - LRU horkých dokumentů; platnost ověřuje (mtime_ns, size, inode), takže změnu
+      z jiného workeru poznáme bez zbytečného parsování
+    """
+
+    def __init__(self, root: str | Path, default_name: str = "progress.json", cache_size: int = 256,
+                 binary: bool = False):
+        self.root = Path(root)
+        self.default_path = self.root / default_name
+        self.cache_size = int(cache_size)
+        self.suffix = BINARY_SUFFIX if binary else ".json"
+        self._cache: "OrderedDict[str, Tuple[Tuple[int, int, int], Dict[str, Any]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._held = threading.local()
+
+    # ---------- cesty ----------
+    def path_for(self, user_id: str) -> Path:
+        user_id = str(user_id)
+        if user_id == DEFAULT_USER:
+            return self.default_path
+        digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+        name = user_id if _SAFE_ID.match(user_id) else digest
+        return self.root / "users" / digest[:2] / f"{name}{self.suffix}"
+
+    def source_for(self, user_id: str) -> Path:
+        """Soubor, ze kterého se dokument čte (po přepnutí na binární formát i starý JSON)."""
+        path = self.path_for(user_id)
+        if path.suffix == BINARY_SUFFIX and not path.exists():
+            legacy = path.with_suffix(".json")
+            if legacy.exists():
+                return legacy
+        return path
+
+    # ---------- zámky ----------
+    @contextmanager
+    def locked(self, user_id: str) -> Iterator[None]:
+        """Exkluzivní zámek uživatele napříč procesy (reentrantní v rámci vlákna)."""
+        held: Dict[str, int] = self._held.__dict__.setdefault("depth", {})
+        uid = str(user_id)
+        if held.get(uid):
+            held[uid] += 1
+            try:
+                yield
+            finally:
+                held[uid] -= 1
+            return
+
+        path = self.path_for(uid)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_suffix(".lock"), "a+b") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            held[uid] = 1
+            try:
+                yield
+            finally:
+                held[uid] = 0
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    # ---------- čtení / zápis ----------
+    def read(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Vrátí kopii dokumentu (volající ho smí měnit), nebo None, pokud neexistuje."""
+        uid = str(user_id)
+        path = self.source_for(uid)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            self._evict(uid)
+            return None
+
+        with self._cache_lock:
+            hit = self._cache.get(uid)
+            if hit is not None and hit[0] == _stamp(st):
+                self._cache.move_to_end(uid)
+                return copy.deepcopy(hit[1])
+
+        data = decode_document(path.read_bytes(), KIND_PROGRESS)
+        if isinstance(data, dict):
+            self._remember(uid, _stamp(st), data)
+            return copy.deepcopy(data)
+        return data
+
+    def write(self, user_id: str, data: Dict[str, Any]) -> None:
+        uid = str(user_id)
+        path = self.path_for(uid)
+        with self.locked(uid):
+            write_document(path, data, KIND_PROGRESS)
+            self._remember(uid, _stamp(path.stat()), copy.deepcopy(data))
+
+    # ---------- LRU ----------
+    def _remember(self, uid: str, stamp: Tuple[int, int, int], data: Dict[str, Any]) -> None:
+        with self._cache_lock:
+            self._cache[uid] = (stamp, data)
+            self._cache.move_to_end(uid)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _evict(self, uid: str) -> None:
+        with self._cache_lock:
+            self._cache.pop(uid, None)
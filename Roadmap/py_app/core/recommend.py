@@ -0,0 +1,190 @@
+# py_app/core/recommend.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import heapq
+import math
+
+from .models import Roadmap
+from .planner import parse_estimate
+from .unlock import UnlockEngine
+
+
+@dataclass(frozen=True)
+class ScoreWeights:
+    """Váhy skóre; vyšší skóre = lepší další krok."""
+    unblocks: float = 1.0      # log(1 + počet uzlů, ke kterým uzel vede)
+    progress: float = 2.0      # rozpracované uzly dotáhnout
+    difficulty: float = 0.5    # 1..4
+    level: float = 0.3         # 1..9
+    hours: float = 0.02        # za hodinu odhadu
+
+
+_COMPACT_SLACK = 64   # kolik zastaralých záznamů nad počet živých ještě tolerujeme
+
+
+class Recommender:
+    """
+    Řazení dostupných uzlů podle toho, co dává největší smysl dělat dál.
+
+    Skóre kombinuje obtížnost, level, odhad hodin, rozpracovanost (podíl
+    splněných tasků) a počet uzlů, které uzel tranzitivně odemyká. Skóre žijí
+    v haldách (globální + po trackách) s líným mazáním: změna progressu jen
+    přidá nové záznamy pro dotčené uzly, zastaralé se zahodí až při výběru.
+    Jakmile zastaralé záznamy převáží, haldy se přestaví (_compact).
+
+    Instance není thread-safe; sdílená mezi vlákny (Dash) se volá pod zámkem.
+    """
+
+    def __init__(self, roadmap: Roadmap, weights: ScoreWeights = ScoreWeights()):
+        self.index = roadmap.index
+        self.weights = weights
+        self._static: Dict[str, float] = {}
+        self._n_tasks: Dict[str, int] = {}
+        for n in roadmap.nodes:
+            self._set_static(n)
+        self._bits: Dict[str, int] = {}
+        self._score: Dict[str, float] = {}
+        self._heaps: Dict[Optional[str], List[Tuple[float, int, str]]] = {}
+        self._unlock = UnlockEngine.for_roadmap(roadmap)
+        self._rebuild()
+
+    # ---------- skóre ----------
+    def _set_static(self, n) -> None:
+        w = self.weights
+        self._static[n.id] = (
+            w.unblocks * math.log1p(self.index.descendants(n.id).bit_count())
+            - w.difficulty * n.difficulty
+            - w.level * n.level
+            - w.hours * parse_estimate(n.estimate)
+        )
+        self._n_tasks[n.id] = len(n.tasks_all)
+
+    def refresh(self, node_ids: Iterable[str]) -> None:
+        """Přepočítá skóre uzlů, kterým se změnil obsah (ne prereqy) – např. po hot-reloadu."""
+        for nid in node_ids:
+            n = self.index.node_by_id.get(nid)
+            if n is None:
+                continue
+            self._set_static(n)
+            if self._unlock.is_available(nid):
+                self._push(nid)
+        self._maybe_compact()
+
+    def _ratio(self, nid: str) -> float:
+        n = self._n_tasks.get(nid, 0)
+        return min(1.0, self._bits.get(nid, 0).bit_count() / n) if n else 0.0
+
+    def _push(self, nid: str) -> None:
+        node = self.index.node_by_id.get(nid)
+        if node is None:
+            return
+        score = self._static[nid] + self.weights.progress * self._ratio(nid)
+        self._score[nid] = score
+        entry = (-score, self.index.topo_pos.get(nid, 0), nid)
+        heapq.heappush(self._heaps.setdefault(None, []), entry)
+        heapq.heappush(self._heaps.setdefault(node.track, []), entry)
+
+    def _maybe_compact(self) -> None:
+        if len(self._heaps.get(None, ())) > 2 * len(self._score) + _COMPACT_SLACK:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Přestaví haldy jen z platných záznamů (heapify, O(n))."""
+        self._score = {nid: s for nid, s in self._score.items() if self._unlock.is_available(nid)}
+        heaps: Dict[Optional[str], List[Tuple[float, int, str]]] = {}
+        for nid, score in self._score.items():
+            node = self.index.node_by_id.get(nid)
+            if node is None:
+                continue
+            entry = (-score, self.index.topo_pos.get(nid, 0), nid)
+            heaps.setdefault(None, []).append(entry)
+            heaps.setdefault(node.track, []).append(entry)
+        for heap in heaps.values():
+            heapq.heapify(heap)
+        self._heaps = heaps
+
+    def _rebuild(self) -> None:
+        self._score.clear()
+        self._heaps.clear()
+        for nid in self._unlock.available():
+            self._push(nid)
+
+    # ---------- změny progressu ----------
+    def update(self, completed: Iterable[str], done_bits: Optional[Mapping[str, int]] = None,
+               touched: Optional[Iterable[str]] = None) -> None:
+        """
+        Posune stav na nový progress (typicky ProgressSnapshot.completed / .done_bits).
+        Zná-li volající dotčené uzly (touched), porovnají se tasky jen u nich a jejich
+        potomků (masky indexu); jinak jeden průchod done_bits. Odemčené uzly dodá
+        UnlockEngine.sync v O(out-degree), velikost roadmapy se neprochází.
+        """
+        if done_bits is None:
+            done_bits = {}
+        unlocked = self._unlock.sync(completed)
+        if unlocked is None:
+            self._bits = {nid: bits for nid, bits in done_bits.items() if bits}
+            self._rebuild()
+            return
+        for nid in unlocked:
+            self._push(nid)
+
+        if touched is not None:
+            touched = set(map(str, touched))
+            mask = 0
+            for nid in touched:
+                mask |= self.index.descendants(nid)
+            candidates = touched.union(self.index.ids_of(mask))
+            changed = [nid for nid in candidates if self._bits.get(nid, 0) != done_bits.get(nid, 0)]
+        else:
+            changed, kept = [], 0
+            for nid, bits in done_bits.items():
+                old = self._bits.get(nid, 0)
+                kept += bool(old)
+                if old != bits:
+                    changed.append(nid)
+            if kept < len(self._bits):     # některý uzel z done_bits zmizel (reset tasků)
+                changed += [nid for nid in self._bits if nid not in done_bits]
+        for nid in changed:
+            if done_bits.get(nid):
+                self._bits[nid] = done_bits[nid]
+            else:
+                self._bits.pop(nid, None)
+            if self._unlock.is_available(nid):
+                self._push(nid)
+        self._maybe_compact()
+
+    def update_snapshot(self, snapshot) -> None:
+        self.update(snapshot.completed, snapshot.done_bits)
+
+    # ---------- dotazy ----------
+    def _valid(self, entry: Tuple[float, int, str]) -> bool:
+        neg, _, nid = entry
+        return self._unlock.is_available(nid) and self._score.get(nid) == -neg
+
+    def best(self, track: Optional[str] = None) -> Optional[str]:
+        """Nejlepší dostupný uzel (volitelně jen v tracku), nebo None. Amortizovaně O(log n)."""
+        heap = self._heaps.get(track)
+        while heap and not self._valid(heap[0]):
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    def top(self, k: int = 5, track: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Prvních k doporučení jako [(node_id, skóre)]. O(k log n) + zahozené zastaralé záznamy."""
+        heap = self._heaps.get(track)
+        out: List[Tuple[str, float]] = []
+        taken: List[Tuple[float, int, str]] = []
+        while heap and len(out) < k:
+            entry = heapq.heappop(heap)
+            # zastaralý záznam nebo duplikát platného se zahodí natrvalo (líné mazání)
+            if not self._valid(entry) or any(t[2] == entry[2] for t in taken):
+                continue
+            taken.append(entry)
+            out.append((entry[2], -entry[0]))
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return out
+
+    def score(self, node_id: str) -> Optional[float]:
+        nid = str(node_id)
+        return self._score.get(nid) if self._unlock.is_available(nid) else None
@@ -0,0 +1,144 @@
+# py_app/core/registry.py
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+import sys
+import threading
+
+from .models import Roadmap
+from .streaming import load_roadmap_streaming
+from .utils import default_roadmap_path, load_roadmap
+
+# Víc roadmap z jedné složky (<id>.json). Soubor se načte a zvaliduje až při
+# prvním get(); v paměti drží registr nejvýš `capacity` modelů, nejdéle
+# nepoužitý se zahodí (LRU). Řetězce, které se mezi roadmapami opakují
+# (id uzlů a tracků, prereqy, labely, tasky), jdou přes sys.intern, takže
+# paměť roste s unikátním obsahem, ne s počtem načtených kopií.
+
+DEFAULT_CAPACITY = 8
+
+
+def default_roadmap_dir() -> Path:
+    return Path(__file__).resolve().parent / "data" / "roadmaps"
+
+
+def intern_roadmap(roadmap: Roadmap) -> Roadmap:
+    """Nahradí opakující se řetězce v modelu jejich internovanou kopií (na místě)."""
+    it = sys.intern
+    for t in roadmap.tracks:
+        t.id = it(t.id)
+        t.name = it(t.name)
+    for n in roadmap.nodes:
+        n.id = it(n.id)
+        n.track = it(n.track)
+        n.label = it(n.label)
+        n.prereqs = [it(p) for p in n.prereqs]
+        n.tasks_all = [it(t) for t in n.tasks_all]
+    for e in roadmap.edges:
+        e.source = it(e.source)
+        e.target = it(e.target)
+    for lp in roadmap.learning_paths:
+        lp.node_sequence = [it(x) for x in lp.node_sequence]
+    return roadmap
+
+
+class RoadmapRegistry:
+    """
+    Líně načítané roadmapy podle id (jméno souboru bez .json).
+
+    Modely jdou přes load_roadmap(cache=False) – procesní cache v utils by
+    jinak držela i vyhozené roadmapy. Předkompilované artefakty jsou stejně
+    jako v load_roadmap opt-in (use_compiled=True) a vznikají jen pro zdroje
+    ve starém schématu (vedle nich, <jméno>.json.compiled). lazy=True načítá
+    proudově bez těl uzlů (core/streaming.py, dočte je ensure_bodies).
+    """
+
+    def __init__(self, root: str | Path | None = None, capacity: int = DEFAULT_CAPACITY,
+                 use_compiled: bool = False, lazy: bool = False):
+        self.root = Path(root) if root is not None else default_roadmap_dir()
+        self.capacity = max(1, int(capacity))
+        self.use_compiled = use_compiled
+        self.lazy = lazy
+        self._extra: Dict[str, Path] = {}
+        self._loaded: "OrderedDict[str, Roadmap]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------- katalog ----------
+    def register(self, roadmap_id: str, path: str | Path) -> None:
+        """Přidá roadmapu mimo složku (např. výchozí data/roadmap.json)."""
+        with self._lock:
+            self._extra[roadmap_id] = Path(path)
+            self._loaded.pop(roadmap_id, None)
+
+    def path_for(self, roadmap_id: str) -> Path:
+        p = self._extra.get(roadmap_id)
+        if p is None:
+            p = self.root / f"{roadmap_id}.json"
+        return p
+
+    def ids(self) -> List[str]:
+        """Id všech dostupných roadmap (jen výpis složky, nic se neparsuje)."""
+        found = set(self._extra)
+        if self.root.is_dir():
+            found.update(p.stem for p in self.root.glob("*.json") if p.is_file())
+        return sorted(found)
+
+    def __contains__(self, roadmap_id: str) -> bool:
+        return roadmap_id in self._extra or self.path_for(roadmap_id).is_file()
+
+    # ---------- načítání ----------
+    def get(self, roadmap_id: str) -> Roadmap:
+        """Vrátí roadmapu; při prvním přístupu ji načte a případně vyhodí nejstarší."""
+        with self._lock:
+            rm = self._loaded.get(roadmap_id)
+            if rm is not None:
+                self._loaded.move_to_end(roadmap_id)
+                return rm
+            p = self.path_for(roadmap_id)
+
+        if not p.is_file():
+            raise KeyError(f"Neznámá roadmapa: {roadmap_id}")
+        # parsování mimo zámek; při souběhu vyhraje první uložený model
+        if self.lazy:
+            rm = load_roadmap_streaming(p, lazy=True)
+        else:
+            rm = load_roadmap(p, use_compiled=self.use_compiled, cache=False)
+        intern_roadmap(rm)
+
+        with self._lock:
+            cur = self._loaded.get(roadmap_id)
+            if cur is not None:
+                self._loaded.move_to_end(roadmap_id)
+                return cur
+            self._loaded[roadmap_id] = rm
+            while len(self._loaded) > self.capacity:
+                self._loaded.popitem(last=False)
+            return rm
+
+    def loaded(self) -> List[str]:
+        """Id roadmap aktuálně v paměti, od nejdéle nepoužité."""
+        with self._lock:
+            return list(self._loaded)
+
+    def evict(self, roadmap_id: Optional[str] = None) -> None:
+        """Zahodí jednu roadmapu z paměti (bez id všechny)."""
+        with self._lock:
+            if roadmap_id is None:
+                self._loaded.clear()
+            else:
+                self._loaded.pop(roadmap_id, None)
+
+
+DEFAULT_ID = "default"
+_REGISTRY: Optional[RoadmapRegistry] = None
+
+
+def roadmaps() -> RoadmapRegistry:
+    """Sdílený registr nad data/roadmaps/ s výchozí roadmapou pod id "default"."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        reg = RoadmapRegistry()
+        reg.register(DEFAULT_ID, default_roadmap_path())
+        _REGISTRY = reg
+    return _REGISTRY
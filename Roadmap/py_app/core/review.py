@@ -0,0 +1,115 @@
+# py_app/core/review.py
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import datetime as dt
+
+# Opakování splněných tasků (SM-2) – čisté funkce nad progress dokumentem.
+#   reviews    = { "node:idx": {"ease": float, "interval": int, "reps": int, "due": "YYYY-MM-DD"} }
+#   review_due = { "YYYY-MM-DD": ["node:idx", ...] }   # index po dnech
+# "Co je dnes na řadě" projde jen dny <= dnes, ne všechny tasky.
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+FIRST_INTERVAL = 1        # dny po splnění tasku do prvního opakování
+SECOND_INTERVAL = 6
+
+
+def task_key(node_id: str, index: int) -> str:
+    return f"{node_id}:{int(index)}"
+
+
+def split_key(key: str) -> Tuple[str, int]:
+    nid, _, idx = key.rpartition(":")
+    return nid, int(idx)
+
+
+def _bucket_add(p: Dict[str, Any], key: str, day: str) -> None:
+    p["review_due"].setdefault(day, []).append(key)
+
+
+def _bucket_remove(p: Dict[str, Any], key: str, day: str) -> None:
+    bucket = p["review_due"].get(day)
+    if not bucket:
+        return
+    try:
+        bucket.remove(key)
+    except ValueError:
+        return
+    if not bucket:
+        del p["review_due"][day]
+
+
+def enroll(p: Dict[str, Any], key: str, today: dt.date) -> None:
+    """Zařadí splněný task do opakování (první termín zítra). Už zařazený nechá být."""
+    reviews = p.setdefault("reviews", {})
+    p.setdefault("review_due", {})
+    if key in reviews:
+        return
+    due = (today + dt.timedelta(days=FIRST_INTERVAL)).isoformat()
+    reviews[key] = {"ease": DEFAULT_EASE, "interval": 0, "reps": 0, "due": due}
+    _bucket_add(p, key, due)
+
+
+def drop(p: Dict[str, Any], key: str) -> None:
+    item = p.setdefault("reviews", {}).pop(key, None)
+    if item is not None:
+        _bucket_remove(p, key, item["due"])
+
+
+def reconcile(p: Dict[str, Any], today: dt.date) -> None:
+    """Srovná opakování se splněnými tasky a přestaví denní index (migrace, import)."""
+    p.setdefault("reviews", {})
+    p["review_due"] = {}
+    for key, item in sorted(p["reviews"].items()):
+        _bucket_add(p, key, item["due"])
+    done = set()
+    for nid, bucket in (p.get("tasks", {}) or {}).items():
+        for i in bucket.get("tasks_done", []):
+            done.add(task_key(str(nid), i))
+    for key in [k for k in p["reviews"] if k not in done]:
+        drop(p, key)
+    for key in sorted(done):
+        enroll(p, key, today)
+
+
+def grade(p: Dict[str, Any], key: str, quality: int, today: dt.date) -> Dict[str, Any]:
+    """
+    SM-2: quality 0..5 (0 = vůbec, 5 = perfektně). Pod 3 začíná task znovu
+    od krátkého intervalu, jinak interval roste 1 → 6 → interval·ease.
+    """
+    q = max(0, min(5, int(quality)))
+    item = p["reviews"][key]
+    _bucket_remove(p, key, item["due"])
+
+    if q < 3:
+        item["reps"] = 0
+        item["interval"] = FIRST_INTERVAL
+    else:
+        item["reps"] = int(item["reps"]) + 1
+        if item["reps"] == 1:
+            item["interval"] = FIRST_INTERVAL
+        elif item["reps"] == 2:
+            item["interval"] = SECOND_INTERVAL
+        else:
+            item["interval"] = max(1, round(int(item["interval"]) * float(item["ease"])))
+    item["ease"] = round(max(MIN_EASE, float(item["ease"]) + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)), 4)
+    item["due"] = (today + dt.timedelta(days=int(item["interval"]))).isoformat()
+    _bucket_add(p, key, item["due"])
+    return item
+
+
+def due(p: Dict[str, Any], today: dt.date, limit: Optional[int] = None) -> List[str]:
+    """Klíče tasků s termínem <= dnes, nejdřív ty nejvíc po termínu."""
+    day = today.isoformat()
+    out: List[str] = []
+    for d in sorted(k for k in (p.get("review_due") or {}) if k <= day):
+        for key in p["review_due"][d]:
+            out.append(key)
+            if limit is not None and len(out) >= limit:
+                return out
+    return out
+
+
+def due_count(p: Dict[str, Any], today: dt.date) -> int:
+    day = today.isoformat()
+    return sum(len(v) for k, v in (p.get("review_due") or {}).items() if k <= day)
@@ -0,0 +1,191 @@
+# py_app/core/roadmap_index.py
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Roadmap, Node, Track
+
+DEFAULT_COLOR = "#888888"
+
+
+class _NodeMaps:
+    """
+    Mapy po uzlech plněné uzel po uzlu: staví je RoadmapIndex, nebo už
+    proudové načítání (core/streaming.py) během čtení souboru.
+    """
+
+    def __init__(self) -> None:
+        self.node_by_id: Dict[str, Node] = {}
+        self.nodes_by_track: Dict[str, List[Node]] = {}
+        self.ordinal: Dict[str, int] = {}
+        self.position: Dict[str, int] = {}
+        self.succ: Dict[str, List[str]] = {}
+
+    def add(self, n: Node) -> None:
+        self.node_by_id[n.id] = n
+        self.position[n.id] = len(self.position)
+        bucket = self.nodes_by_track.setdefault(n.track, [])
+        self.ordinal[n.id] = len(bucket)
+        bucket.append(n)
+        self.succ.setdefault(n.id, [])
+        for p in n.prereqs:
+            self.succ.setdefault(p, []).append(n.id)
+
+
+class RoadmapIndex:
+    """
+    Předpočítané struktury nad Roadmap, postavené jednou (O(V+E)).
+
+    - node_by_id / track_by_id
+    - nodes_by_track: uzly tracku v pořadí z JSONu, ordinal = pozice v tracku
+    - prereq graf:  pred[n] = prereqy uzlu, succ[n] = uzly, které n odemyká
+    - edges graf:   out_edges / in_edges z roadmap.edges
+    - topo_order / topo_pos: topologické pořadí prereq grafu (sdílené s Roadmap)
+    - position: pozice uzlu v roadmap.nodes
+    - ancestor / descendant masky (int, bit i = uzel topo_order[i]) pro dotazy
+      nad tranzitivním uzávěrem; staví se líně, až při prvním dotazu
+    """
+
+    def __init__(self, roadmap: Roadmap, maps: Optional[_NodeMaps] = None):
+        self.roadmap = roadmap
+        self.track_by_id: Dict[str, Track] = {t.id: t for t in roadmap.tracks}
+        if maps is None:
+            maps = _NodeMaps()
+            for n in roadmap.nodes:
+                maps.add(n)
+        self.node_by_id: Dict[str, Node] = maps.node_by_id
+        # pořadí tracků podle roadmap.tracks, i ty bez uzlů
+        self.nodes_by_track: Dict[str, List[Node]] = {t.id: maps.nodes_by_track.pop(t.id, []) for t in roadmap.tracks}
+        self.nodes_by_track.update(maps.nodes_by_track)
+        self.ordinal: Dict[str, int] = maps.ordinal
+        self.position: Dict[str, int] = maps.position
+
+        self.pred: Dict[str, Tuple[str, ...]] = {n.id: tuple(n.prereqs) for n in roadmap.nodes}
+        self.succ: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in maps.succ.items()}
+
+        out_e: Dict[str, List[str]] = {n.id: [] for n in roadmap.nodes}
+        in_e: Dict[str, List[str]] = {n.id: [] for n in roadmap.nodes}
+        for e in roadmap.edges:
+            out_e.setdefault(e.source, []).append(e.target)
+            in_e.setdefault(e.target, []).append(e.source)
+        self.out_edges: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in out_e.items()}
+        self.in_edges: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in in_e.items()}
+
+        # stejné objekty jako v Roadmap → inkrementální přeskládání je vidět i tady
+        self.topo_order: List[str] = roadmap.topo_order
+        self.topo_pos: Dict[str, int] = roadmap.topo_pos
+        self._anc: Optional[Dict[str, int]] = None
+        self._desc: Optional[Dict[str, int]] = None
+
+    def _replace_node(self, old: Node, new: Node) -> None:
+        """Přepojí uzel na místě (volá Roadmap.replace_node); cena ~ počet prereqů."""
+        nid = new.id
+        self.node_by_id[nid] = new
+
+        if old.track == new.track:
+            self.nodes_by_track[new.track][self.ordinal[nid]] = new
+        else:
+            bucket = self.nodes_by_track[old.track]
+            del bucket[self.ordinal[nid]]
+            for i in range(self.ordinal[nid], len(bucket)):
+                self.ordinal[bucket[i].id] = i
+            bucket = self.nodes_by_track.setdefault(new.track, [])
+            at = bisect_left([self.position[n.id] for n in bucket], self.position[nid])
+            bucket.insert(at, new)
+            for i in range(at, len(bucket)):
+                self.ordinal[bucket[i].id] = i
+
+        for p in old.prereqs:
+            self.succ[p] = tuple(s for s in self.succ.get(p, ()) if s != nid)
+        for p in new.prereqs:
+            self.succ[p] = self.succ.get(p, ()) + (nid,)
+        self.pred[nid] = tuple(new.prereqs)
+        # pořadí (= čísla bitů) se mohlo posunout → masky postavíme znovu při dalším dotazu
+        self._anc = self._desc = None
+
+    def _replace_edges(self, nid: str, removed: Iterable[str], added: Iterable[str]) -> None:
+        """Odebere hrany removed -> nid a přidá added -> nid (volá Roadmap._replace_prereq_edges)."""
+        removed = set(removed)
+        for p in removed:
+            self.out_edges[p] = tuple(t for t in self.out_edges.get(p, ()) if t != nid)
+        incoming = tuple(s for s in self.in_edges.get(nid, ()) if s not in removed)
+        for p in added:
+            self.out_edges[p] = self.out_edges.get(p, ()) + (nid,)
+            incoming += (p,)
+        self.in_edges[nid] = incoming
+
+    # ---------- dosažitelnost (bitové masky) ----------
+    def _ancestor_masks(self) -> Dict[str, int]:
+        # v topologickém pořadí jsou masky všech prereqů hotové dřív než uzel
+        if self._anc is None:
+            pos, anc = self.topo_pos, {}
+            for nid in self.topo_order:
+                m = 0
+                for p in self.pred.get(nid, ()):
+                    m |= anc.get(p, 0) | (1 << pos[p])
+                anc[nid] = m
+            self._anc = anc
+        return self._anc
+
+    def _descendant_masks(self) -> Dict[str, int]:
+        if self._desc is None:
+            pos, desc = self.topo_pos, {}
+            for nid in reversed(self.topo_order):
+                m = 0
+                for s in self.succ.get(nid, ()):
+                    m |= desc.get(s, 0) | (1 << pos[s])
+                desc[nid] = m
+            self._desc = desc
+        return self._desc
+
+    def mask_of(self, node_ids: Iterable[str]) -> int:
+        pos, m = self.topo_pos, 0
+        for nid in node_ids:
+            i = pos.get(str(nid))
+            if i is not None:
+                m |= 1 << i
+        return m
+
+    def ids_of(self, mask: int) -> List[str]:
+        """Uzly z masky v topologickém pořadí (prereqy dřív než to, co odemykají)."""
+        order, out = self.topo_order, []
+        while mask:
+            low = mask & -mask
+            out.append(order[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+    def ancestors(self, node_id: str) -> int:
+        return self._ancestor_masks().get(str(node_id), 0)
+
+    def descendants(self, node_id: str) -> int:
+        return self._descendant_masks().get(str(node_id), 0)
+
+    def missing_for(self, node_id: str, completed: Iterable[str]) -> List[str]:
+        """Vše, co ještě chybí k odemčení uzlu (celý řetěz, ne jen přímé prereqy)."""
+        return self.ids_of(self.ancestors(node_id) & ~self.mask_of(completed))
+
+    def unblocks(self, node_id: str) -> List[str]:
+        """Všechny uzly, ke kterým uzel (přímo i nepřímo) vede."""
+        return self.ids_of(self.descendants(node_id))
+
+    def shared_prereqs(self, *node_ids: str) -> List[str]:
+        """Prereqy (tranzitivně) společné všem zadaným uzlům."""
+        if not node_ids:
+            return []
+        m = -1
+        for nid in node_ids:
+            m &= self.ancestors(nid)
+        return self.ids_of(m)
+
+    # ---------- pohodlné dotazy ----------
+    def track_color(self, track_id: str, default: str = DEFAULT_COLOR) -> str:
+        t = self.track_by_id.get(track_id)
+        return (t.color if t is not None else None) or default
+
+    def track_nodes(self, track_id: str) -> List[Node]:
+        return self.nodes_by_track.get(track_id, [])
+
+    def label(self, node_id: str) -> str:
+        n = self.node_by_id.get(node_id)
+        return n.label if n is not None else node_id
@@ -0,0 +1,103 @@
+# py_app/core/spatial.py
+from __future__ import annotations
+from typing import Optional
+import math
+
+import numpy as np
+
+# Prostorový index nad souřadnicemi uzlů (NodePositions.xy, body na plátně):
+# "který uzel je pod kurzorem" a "které uzly jsou ve výřezu" bez průchodu
+# všemi uzly. Pravidelná mřížka: každý bod dostane klíč buňky
+# cx * ny + cy, klíče se jednou seřadí a dotaz na obdélník je pro každý
+# sloupec buněk jedno binární hledání (searchsorted) → O(sloupce · log n)
+# plus počet nalezených bodů. Uzly z rozložení jsou rozprostřené zhruba
+# rovnoměrně, takže mřížka stačí a na rozdíl od quadtree se staví jedním
+# argsortem.
+
+TARGET_PER_CELL = 2.0
+
+
+class SpatialIndex:
+    """Mřížkový index bodů xy (n, 2); dotazy vrací řádky do xy."""
+
+    def __init__(self, xy: np.ndarray, cell: Optional[float] = None):
+        self.xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+        n = len(self.xy)
+        if n:
+            lo, hi = self.xy.min(axis=0), self.xy.max(axis=0)
+        else:
+            lo = hi = np.zeros(2)
+        span = hi - lo
+        if cell is None:
+            # buňka tak velká, aby na ni v průměru připadlo TARGET_PER_CELL bodů
+            area = max(span[0], 1e-9) * max(span[1], 1e-9)
+            cell = math.sqrt(area * TARGET_PER_CELL / max(1, n))
+            cell = max(cell, float(span.max()) / max(1, n), 1e-9)
+        if cell <= 0:
+            raise ValueError("cell musí být kladné")
+        self.cell = float(cell)
+        self.origin = lo
+        self.nx, self.ny = (np.floor(span / self.cell).astype(np.int64) + 1).tolist()
+
+        cx, cy = self._cells(self.xy)
+        key = cx * self.ny + cy
+        self.order = np.argsort(key, kind="stable")
+        self.keys = key[self.order]
+
+    def __len__(self) -> int:
+        return len(self.xy)
+
+    def _cells(self, pts: np.ndarray):
+        c = np.floor((pts - self.origin) / self.cell).astype(np.int64)
+        return np.clip(c[:, 0], 0, self.nx - 1), np.clip(c[:, 1], 0, self.ny - 1)
+
+    def in_rect(self, x0: float, x1: float, y0: float, y1: float) -> np.ndarray:
+        """Řádky bodů v obdélníku (včetně hranic), vzestupně seřazené."""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        if not len(self.xy):
+            return np.empty(0, dtype=np.intp)
+        cx0, cy0 = np.floor((np.array([x0, y0]) - self.origin) / self.cell)
+        cx1, cy1 = np.floor((np.array([x1, y1]) - self.origin) / self.cell)
+        if cx1 < 0 or cy1 < 0 or cx0 >= self.nx or cy0 >= self.ny:
+            return np.empty(0, dtype=np.intp)
+        cols = np.arange(max(0, int(cx0)), min(self.nx - 1, int(cx1)) + 1, dtype=np.int64)
+        cy0, cy1 = max(0, int(cy0)), min(self.ny - 1, int(cy1))
+        # v každém sloupci tvoří buňky cy0..cy1 souvislý úsek seřazených klíčů
+        start = np.searchsorted(self.keys, cols * self.ny + cy0, side="left")
+        stop = np.searchsorted(self.keys, cols * self.ny + cy1, side="right")
+        counts = stop - start
+        total = int(counts.sum())
+        if not total:
+            return np.empty(0, dtype=np.intp)
+        at = np.repeat(start - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        cand = self.order[at]
+        # krajní buňky přesahují obdélník → přesný filtr
+        p = self.xy[cand]
+        ok = (p[:, 0] >= x0) & (p[:, 0] <= x1) & (p[:, 1] >= y0) & (p[:, 1] <= y1)
+        return np.sort(cand[ok])
+
+    def nearest(self, x: float, y: float, radius: float) -> Optional[int]:
+        """Nejbližší bod do vzdálenosti radius (hit-test kurzoru), jinak None."""
+        cand = self.in_rect(x - radius, x + radius, y - radius, y + radius)
+        if not len(cand):
+            return None
+        d2 = ((self.xy[cand] - (x, y)) ** 2).sum(axis=1)
+        best = int(np.argmin(d2))
+        return int(cand[best]) if d2[best] <= radius * radius else None
+
+
+def segments_in_rect(a: np.ndarray, b: np.ndarray, x0: float, x1: float, y0: float, y1: float,
+                     pad: float | np.ndarray = 0.0) -> np.ndarray:
+    """
+    Maska úseček/hran a→b, jejichž obálka (rozšířená o pad, číslo nebo pole
+    po hranách) zasahuje do obdélníku. Konzervativní – hranu, která do
+    výřezu zasahuje, nikdy nezahodí.
+    """
+    a = np.asarray(a, dtype=float).reshape(-1, 2)
+    b = np.asarray(b, dtype=float).reshape(-1, 2)
+    pad = np.asarray(pad, dtype=float).reshape(-1, 1)
+    lo = np.minimum(a, b) - pad
+    hi = np.maximum(a, b) + pad
+    return ((hi[:, 0] >= min(x0, x1)) & (lo[:, 0] <= max(x0, x1))
+            & (hi[:, 1] >= min(y0, y1)) & (lo[:, 1] <= max(y0, y1)))
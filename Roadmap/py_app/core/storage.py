@@ -0,0 +1,131 @@
+# py_app/core/storage.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Any
+import json
+import marshal
+import os
+import secrets
+import struct
+import zlib
+
+# Společné I/O pro roadmapu i progress:
+#   atomic_write_bytes – dočasný soubor ve stejné složce + fsync + os.replace,
+#                        pád uprostřed zápisu nechá původní soubor celý
+#   binární formát     – hlavička (struct) + marshal payload; oproti JSON
+#                        s indent=2 je menší a zápis i čtení jsou rychlejší
+#
+# Formát souboru se při čtení pozná podle magic bajtů, při zápisu podle
+# přípony (BINARY_SUFFIX). JSON zůstává jako čitelný export.
+
+MAGIC = b"WQRB"
+FORMAT_VERSION = 1
+BINARY_SUFFIX = ".bin"
+
+KIND_ROADMAP = 1
+KIND_PROGRESS = 2
+
+# magic, verze formátu, druh dokumentu, verze marshalu, crc32 payloadu
+_HEADER = struct.Struct("<4sHBBI")
+
+
+def atomic_write_bytes(path: str | Path, data: bytes) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    # práva nového souboru určí kernel podle umask (0o666 jako open());
+    # existující dokument si po přepsání ponechá svá
+    try:
+        mode: int | None = p.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    while True:
+        tmp = p.parent / f"{p.name}.{secrets.token_hex(4)}.tmp"
+        try:
+            fd = os.open(tmp, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0), 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if mode is not None:
+                os.chmod(tmp, mode)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, p)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(p.parent)
+
+
+def _fsync_dir(d: Path) -> None:
+    # přejmenování je trvalé až po fsync složky (jen POSIX; jinde nejde otevřít)
+    try:
+        fd = os.open(str(d), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# =========================
+# Binární formát
+# =========================
+def is_binary(raw: bytes) -> bool:
+    return raw[:len(MAGIC)] == MAGIC
+
+
+def binary_kind(raw: bytes) -> int:
+    """Druh binárního dokumentu z hlavičky (KIND_*)."""
+    return _HEADER.unpack_from(raw)[2]
+
+
+def wants_binary(path: str | Path) -> bool:
+    return Path(path).suffix == BINARY_SUFFIX
+
+
+def dump_binary(obj: Any, kind: int) -> bytes:
+    payload = marshal.dumps(obj)
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, kind, marshal.version, zlib.crc32(payload)) + payload
+
+
+def load_binary(raw: bytes, kind: int) -> Any:
+    if len(raw) < _HEADER.size or not is_binary(raw):
+        raise ValueError("není to binární dokument")
+    _, version, got_kind, marshal_version, crc = _HEADER.unpack_from(raw)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"nepodporovaná verze binárního formátu {version}")
+    if got_kind != kind:
+        raise ValueError(f"binární dokument je jiného druhu ({got_kind}, čekáno {kind})")
+    if marshal_version > marshal.version:
+        raise ValueError("soubor zapsal novější Python – převeď ho přes JSON (core/convert.py)")
+    payload = memoryview(raw)[_HEADER.size:]
+    if zlib.crc32(payload) != crc:
+        raise ValueError("poškozený binární dokument (nesedí crc32)")
+    return marshal.loads(payload)
+
+
+def decode_document(raw: bytes, kind: int) -> Any:
+    """Obsah souboru v libovolném z podporovaných formátů (JSON / binární)."""
+    return load_binary(raw, kind) if is_binary(raw) else json.loads(raw)
+
+
+def encode_document(obj: Any, kind: int, binary: bool, indent: int | None = 2) -> bytes:
+    if binary:
+        return dump_binary(obj, kind)
+    return json.dumps(obj, ensure_ascii=False, indent=indent).encode("utf-8")
+
+
+def write_document(path: str | Path, obj: Any, kind: int, binary: bool | None = None) -> None:
+    """Atomicky zapíše dokument; binary=None → podle přípony souboru."""
+    if binary is None:
+        binary = wants_binary(path)
+    atomic_write_bytes(path, encode_document(obj, kind, binary))
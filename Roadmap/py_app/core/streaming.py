@@ -0,0 +1,258 @@
+# py_app/core/streaming.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import codecs
+import hashlib
+import json
+import re
+import threading
+
+from .migrations import SCHEMA_VERSION
+from .models import Edge, LearningPath, Node, Roadmap, Track
+from .roadmap_index import RoadmapIndex, _NodeMaps
+from .utils import _SCHEMA_PEEK, load_roadmap
+
+# Proudové načítání velkých roadmap.json.
+#
+# json.load drží celý dokument jako jeden dict a pydantic z něj pak staví
+# modely – špička paměti je zhruba trojnásobek souboru. Tady se soubor čte
+# po blocích, top-level pole (nodes, edges, …) se rozebírají prvek po prvku
+# přes JSONDecoder.raw_decode a každý uzel se hned validuje na Node. Mimo
+# Node objekty tak v paměti žije jen aktuální blok. Mapy RoadmapIndex po
+# uzlech (node_by_id, tracky, pozice, succ) se plní rovnou při čtení.
+#
+# lazy=True navíc vynechá těla uzlů (desc, links); u každého uzlu si pamatuje
+# bajtový rozsah v souboru a ensure_bodies() je dočte, až o ně obrazovka
+# požádá. tasks_all zůstává – z jeho délky se počítá progress i odemykání.
+
+CHUNK_SIZE = 1 << 16
+LAZY_FIELDS = ("desc", "links")
+
+# ostatní top-level pole se také validují po prvcích, ať v paměti nezůstávají dicty
+_ITEM_MODELS = {"tracks": Track, "edges": Edge, "learning_paths": LearningPath}
+
+_DECODER = json.JSONDecoder()
+_WS = re.compile(r"[ \t\n\r]*")
+
+
+class _Stream:
+    """Textový buffer nad binárním souborem s počítáním bajtových offsetů."""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = max(1024, int(chunk_size))
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.sha = hashlib.sha256()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        # buf[mark] leží v souboru na bajtu mark_byte
+        self.mark = 0
+        self.mark_byte = 0
+
+    def offset(self) -> int:
+        """Bajtový offset aktuální pozice (posouvá značku → celkem O(n))."""
+        self.mark_byte += len(self.buf[self.mark:self.pos].encode("utf-8"))
+        self.mark = self.pos
+        return self.mark_byte
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        self.offset()
+        self.buf = self.buf[self.pos:]
+        self.pos = self.mark = 0
+        # dlouhá hodnota přes víc bloků → čteme geometricky, ať neparsujeme znovu a znovu
+        raw = self.f.read(max(self.chunk_size, len(self.buf)))
+        self.sha.update(raw)
+        if not raw:
+            self.eof = True
+            self.buf += self.decoder.decode(b"", final=True)
+            return False
+        self.buf += self.decoder.decode(raw)
+        return True
+
+    def peek(self) -> str:
+        """Další nemezerový znak (bez posunu), "" na konci souboru."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"očekáváno {' nebo '.join(repr(x) for x in chars)} na bajtu {self.offset()}")
+        self.pos += 1
+        return c
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise ValueError(f"neplatné JSON na bajtu {self.offset()}: {e.msg}") from e
+            # hodnota končí přesně na konci bufferu – číslo může pokračovat v dalším bloku
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+
+class LazyBodies:
+    """Bajtové rozsahy nenačtených těl uzlů: id -> (stub Node, offset, délka)."""
+
+    def __init__(self, path: Path, stamp: Tuple[int, int]):
+        self.path = path
+        self.stamp = stamp
+        self.spans: Dict[str, Tuple[Node, int, int]] = {}
+        self.lock = threading.Lock()
+
+
+def _read_document(s: _Stream, on_node) -> Dict[str, Any]:
+    doc: Dict[str, Any] = {}
+    s.expect("{")
+    if s.peek() == "}":
+        s.pos += 1
+        return doc
+    while True:
+        key = s.value()
+        if not isinstance(key, str):
+            raise ValueError(f"klíč musí být string (bajt {s.offset()})")
+        s.expect(":")
+        if s.peek() != "[":
+            doc[key] = s.value()
+        else:
+            s.pos += 1
+            items: List[Any] = []
+            doc[key] = items
+            model = _ITEM_MODELS.get(key)
+            if s.peek() == "]":
+                s.pos += 1
+            else:
+                while True:
+                    if key == "nodes":
+                        start = s.offset()
+                        obj = s.value()
+                        items.append(on_node(obj, start, s.offset()))
+                    elif model is not None:
+                        try:
+                            items.append(model.model_validate(s.value()))
+                        except Exception as e:
+                            raise ValueError(f"{key}[{len(items)}]: {e}") from e
+                    else:
+                        items.append(s.value())
+                    if s.expect(",]") == "]":
+                        break
+        if s.expect(",}") == "}":
+            break
+    if s.peek():
+        raise ValueError(f"data za koncem dokumentu (bajt {s.offset()})")
+    return doc
+
+
+def load_roadmap_streaming(path: str | Path, lazy: bool = False, chunk_size: int = CHUNK_SIZE) -> Roadmap:
+    """
+    Načte roadmapu po blocích; uzly se validují průběžně (duplicitní id nebo
+    chybný uzel skončí hned, s pořadím a bajtem v souboru). Starší
+    schema_version potřebuje migrace nad celým dokumentem → běžné načtení.
+    """
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"Soubor neexistuje: {p}")
+    with p.open("rb") as f:
+        m = _SCHEMA_PEEK.match(f.read(256))
+    if not m or int(m.group(1)) != SCHEMA_VERSION:
+        return load_roadmap(p, use_compiled=False, cache=False)
+
+    st = p.stat()
+    bodies = LazyBodies(p, (st.st_mtime_ns, st.st_size)) if lazy else None
+    # mapy indexu po uzlech (node_by_id, tracky, succ) se plní už při čtení
+    maps = _NodeMaps()
+
+    def on_node(obj: Any, start: int, end: int) -> Node:
+        i = len(maps.node_by_id)
+        if not isinstance(obj, dict):
+            raise ValueError(f"nodes[{i}] (bajt {start}) není objekt")
+        nid = obj.get("id")
+        if nid in maps.node_by_id:
+            raise ValueError(f"nodes[{i}] (bajt {start}): duplicitní id '{nid}'")
+        if bodies is not None:
+            for k in LAZY_FIELDS:
+                obj.pop(k, None)
+        try:
+            node = Node.model_validate(obj)
+        except Exception as e:
+            raise ValueError(f"nodes[{i}] (bajt {start}): {e}") from e
+        maps.add(node)
+        if bodies is not None:
+            bodies.spans[node.id] = (node, start, end - start)
+        return node
+
+    try:
+        with p.open("rb") as f:
+            s = _Stream(f, chunk_size)
+            doc = _read_document(s, on_node)
+        # hotové modely pydantic znovu nevaliduje → zbývá jen kontrola referencí a cyklů
+        rm = Roadmap.model_validate(doc)
+    except Exception as e:
+        raise ValueError(f"Neplatná struktura dat v {p}: {e}") from e
+    rm._source_hash = s.sha.hexdigest()
+    rm._lazy_bodies = bodies
+    rm._index = RoadmapIndex(rm, maps)
+    return rm
+
+
+def ensure_bodies(roadmap: Roadmap, node_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Dočte desc/links zadaných uzlů (bez ids všech), vrátí počet dočtených.
+    U roadmapy načtené celá je to no-op. Změnil-li se mezitím soubor, offsety
+    neplatí – těla se vezmou z nového načtení podle id.
+    """
+    bodies: Optional[LazyBodies] = roadmap._lazy_bodies
+    if bodies is None:
+        return 0
+    with bodies.lock:
+        spans = bodies.spans
+        ids = list(spans) if node_ids is None else [n for n in node_ids if n in spans]
+        if not ids:
+            return 0
+        live = roadmap.index.node_by_id
+        todo = []
+        for n in ids:
+            if live.get(n) is spans[n][0]:
+                todo.append(spans[n])
+            else:
+                del spans[n]        # uzel mezitím nahrazený (hot-reload, replace_node) už tělo má
+        todo.sort(key=lambda t: t[1])
+
+        # rozsah se zahodí až po přiřazení těla – chyba čtení ho nechá na příště
+        st = bodies.path.stat() if bodies.path.exists() else None
+        if st is None or (st.st_mtime_ns, st.st_size) != bodies.stamp:
+            fresh = load_roadmap_streaming(bodies.path).index.node_by_id
+            for stub, _, _ in todo:
+                full = fresh.get(stub.id)
+                if full is not None:
+                    stub.desc, stub.links = full.desc, full.links
+                del spans[stub.id]  # uzel v novém souboru není → tělo už nedočteme
+            return len(todo)
+
+        with bodies.path.open("rb") as f:
+            for stub, start, length in todo:
+                f.seek(start)
+                full = Node.model_validate_json(f.read(length))
+                stub.desc, stub.links = full.desc, full.links
+                del spans[stub.id]
+        return len(todo)
+
+
+def is_lazy(roadmap: Roadmap) -> bool:
+    """Má roadmapa ještě nenačtená těla uzlů?"""
+    bodies: Optional[LazyBodies] = roadmap._lazy_bodies
+    return bodies is not None and bool(bodies.spans)
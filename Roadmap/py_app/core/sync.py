@@ -0,0 +1,154 @@
+# py_app/core/sync.py
+from __future__ import annotations
+import datetime as dt
+from pathlib import Path
+from typing import Any, Dict, List, Protocol, Tuple
+
+from . import progress as _pg
+from .progress_store import ProgressStore, DEFAULT_USER
+
+# Operace jsou CRDT-friendly:
+#   node / badge – grow-only množiny (sjednocení)
+#   task         – last-writer-wins registr (max přes (ts, dev)) pro každý node:idx
+#   xp           – G-counter: per-zařízení max-registr, celkové XP = součet
+#   xp_base      – společná XP z doby před synchronizací, max-registr podle id
+#                  historie (kopie téhož dokumentu mají stejné id → nezapočte se
+#                  dvakrát); co kopie získaly po exportu (meta.fork_xp), jde při
+#                  zapnutí syncu jako "xp" do G-counteru. Kopie bez značky
+#                  (ručně zkopírovaný soubor) se rozdílem slijí jen na maximum.
+# Každou operaci aplikujeme právě jednou díky vektorovým hodinám (clock[dev]),
+# takže výsledek nezávisí na pořadí ani na opakované synchronizaci.
+
+Clock = Dict[str, int]
+Op = Dict[str, Any]
+
+
+class SyncRemote(Protocol):
+    def pull(self, since: Clock) -> Tuple[List[Op], Clock]:
+        """Vrátí operace novější než `since` a aktuální clock protistrany."""
+        ...
+
+    def push(self, ops: List[Op]) -> Clock:
+        """Uloží operace a vrátí clock protistrany po sloučení."""
+        ...
+
+
+class FileSyncRemote:
+    """
+    Lokální náhrada serveru: jeden JSON soubor s logem operací po zařízeních,
+    { "log": { dev: [op(seq=1), op(seq=2), ...] } }. Delta je pouhý řez seznamu.
+    """
+
+    def __init__(self, path: str | Path):
+        path = Path(path)
+        self._store = ProgressStore(path.parent, default_name=path.name, cache_size=1)
+
+    def _read(self) -> Dict[str, Any]:
+        return self._store.read(DEFAULT_USER) or {"log": {}}
+
+    def pull(self, since: Clock) -> Tuple[List[Op], Clock]:
+        log = self._read()["log"]
+        out: List[Op] = []
+        for dev, ops in log.items():
+            out.extend(ops[int(since.get(dev, 0)):])
+        return out, {dev: len(ops) for dev, ops in log.items()}
+
+    def push(self, ops: List[Op]) -> Clock:
+        with self._store.locked(DEFAULT_USER):
+            doc = self._read()
+            log = doc["log"]
+            for op in sorted(ops, key=lambda o: (o["dev"], o["seq"])):
+                dev_log = log.setdefault(op["dev"], [])
+                if int(op["seq"]) == len(dev_log) + 1:   # duplicity a mezery ignorujeme
+                    dev_log.append(op)
+            self._store.write(DEFAULT_USER, doc)
+            return {dev: len(ops) for dev, ops in log.items()}
+
+
+def _restreak(p: Dict[str, Any]) -> None:
+    """Streak jako odvozená hodnota z daily_log (konvergentní po sloučení)."""
+    days = p.get("daily_log") or {}
+    if not days:
+        return
+    last = max(days)
+    d = dt.date.fromisoformat(last)
+    streak = 0
+    while days.get(d.isoformat(), 0) > 0:
+        streak += 1
+        d -= dt.timedelta(days=1)
+    p["last_day"] = last
+    p["streak_days"] = streak
+
+
+def _apply_remote(p: Dict[str, Any], op: Op) -> List[_pg.ProgressEvent]:
+    st = _pg._sync_state(p)
+    kind = op.get("type")
+    if kind == "task":
+        key = f"{op['node']}:{int(op['idx'])}"
+        stamp = [int(op["ts"]), str(op["dev"])]
+        if stamp > st["task_ts"].get(key, [0, ""]):
+            st["task_ts"][key] = stamp
+            _pg._apply_task(p, str(op["node"]), int(op["idx"]), bool(op["done"]), log=False)
+    elif kind == "node":
+        return _pg._apply_node_completed(p, str(op["node"]), log=False)
+    elif kind == "xp":
+        _pg._credit_xp(p, int(op["amount"]), str(op.get("date") or _pg._today_str()), op.get("node"))
+        st["xp"][op["dev"]] = int(st["xp"].get(op["dev"], 0)) + int(op["amount"])
+        _restreak(p)
+        return [_pg.ProgressEvent(_pg.XP_GAINED, amount=int(op["amount"]))]
+    elif kind == "xp_base":
+        base = st.setdefault("xp_base", {})
+        extra = int(op["amount"]) - int(base.get(op["origin"], 0))
+        if extra > 0:
+            base[op["origin"]] = int(op["amount"])
+            _pg._credit_xp(p, extra, str(op.get("date") or _pg._today_str()), None)
+            _restreak(p)
+            return [_pg.ProgressEvent(_pg.XP_GAINED, amount=extra)]
+    elif kind == "badge":
+        if op["id"] not in p.setdefault("badges", []):
+            p["badges"].append(op["id"])
+    return []
+
+
+def apply_ops(p: Dict[str, Any], ops: List[Op]) -> int:
+    """Aplikuje cizí operace (každou nejvýš jednou, po zařízeních v pořadí seq)."""
+    st = _pg._sync_state(p)
+    clock: Clock = st["clock"]
+    applied = 0
+    events: List[_pg.ProgressEvent] = []
+    for op in sorted(ops, key=lambda o: (o["dev"], int(o["seq"]))):
+        dev, seq = str(op["dev"]), int(op["seq"])
+        if dev == st["device"] or seq != clock.get(dev, 0) + 1:
+            continue  # vlastní, už viděná, nebo by vznikla mezera
+        events += _apply_remote(p, op)
+        _pg._queue_op(p, op)
+        clock[dev] = seq
+        st["lamport"] = max(int(st["lamport"]), int(op["ts"]))
+        applied += 1
+    if events:
+        _pg._dispatch(p, events)
+    return applied
+
+
+@_pg._locked
+def sync_progress(remote: SyncRemote) -> Dict[str, int]:
+    """
+    Obousměrná delta synchronizace aktuálního uživatele s `remote`.
+    Stáhne jen operace, které lokální clock ještě neviděl, odešle jen vlastní
+    operace, které protistrana nemá, a potvrzené operace z lokálního logu smaže.
+    """
+    p = _pg._read_progress_file()
+    st = _pg._sync_state(p)
+    dev = st["device"]
+
+    incoming, remote_clock = remote.pull(dict(st["clock"]))
+    pulled = apply_ops(p, incoming)
+
+    outgoing = [op for op in st["ops"] if int(op["seq"]) > int(remote_clock.get(dev, 0))]
+    if outgoing:
+        remote_clock = remote.push(outgoing)
+    acked = int(remote_clock.get(dev, 0))
+    st["ops"] = [op for op in st["ops"] if int(op["seq"]) > acked]
+
+    _pg._write_progress_file(p)
+    return {"pulled": pulled, "pushed": len(outgoing)}
@@ -0,0 +1,86 @@
+# py_app/core/synthetic.py
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List
+import json
+import random
+
+# Generátor náhodných, ale validních roadmap (DAG) pro testy a benchmarky.
+# Prereqy vybíráme jen z dříve vygenerovaných uzlů → cyklus nevznikne.
+
+_DIFFICULTIES = ("Beginner", "Intermediate", "Advanced", "Expert")
+_PALETTE = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#7f7f7f")
+
+
+def generate_roadmap(n_nodes: int, n_tracks: int = 8, max_prereqs: int = 3, n_paths: int = 4,
+                     max_tasks: int = 5, seed: int = 0) -> Dict[str, Any]:
+    """
+    Vrátí surový dict ve formátu roadmap.json (projde migracemi i validací).
+
+    - level roste s pořadím uzlu v tracku (1..9)
+    - prereqy: většinou z posledních uzlů stejného tracku, občas napříč tracky
+    - difficulty střídá čísla a textové hodnoty (ověří i migraci)
+    - learning_paths sledují řetězy prereqů od náhodného uzlu zpět ke kořeni
+    """
+    rng = random.Random(seed)
+    n_tracks = max(1, min(int(n_tracks), max(1, n_nodes)))
+    tracks = [{"id": f"track-{t}", "name": f"Track {t}", "color": _PALETTE[t % len(_PALETTE)]}
+              for t in range(n_tracks)]
+    per_track: List[List[str]] = [[] for _ in range(n_tracks)]
+    track_len = max(1, n_nodes // n_tracks)
+
+    nodes: List[Dict[str, Any]] = []
+    for i in range(n_nodes):
+        t = rng.randrange(n_tracks)
+        own = per_track[t]
+        nid = f"n{i}"
+        prereqs: List[str] = []
+        if i:
+            for _ in range(rng.randint(0, max_prereqs)):
+                if own and rng.random() < 0.8:
+                    cand = own[max(0, len(own) - 8) + rng.randrange(min(8, len(own)))]
+                else:
+                    cand = f"n{rng.randrange(i)}"
+                if cand not in prereqs:
+                    prereqs.append(cand)
+        difficulty: Any = rng.randint(1, 4)
+        if rng.random() < 0.3:
+            difficulty = _DIFFICULTIES[difficulty - 1]
+        nodes.append({
+            "id": nid,
+            "label": f"Lekce {i}",
+            "track": tracks[t]["id"],
+            "level": min(9, 1 + len(own) * 9 // track_len),
+            "difficulty": difficulty,
+            "desc": f"Syntetický uzel {i}",
+            "estimate": f"{rng.randint(2, 80)}h",
+            "prereqs": prereqs,
+            "tasks_all": [f"Úkol {k + 1}" for k in range(rng.randint(0, max_tasks))],
+            "links": [],
+        })
+        own.append(nid)
+
+    by_id = {n["id"]: n for n in nodes}
+    paths: List[Dict[str, Any]] = []
+    for k in range(min(n_paths, n_nodes)):
+        cur = nodes[rng.randrange(n_nodes)]
+        seq = [cur["id"]]
+        while cur["prereqs"] and len(seq) < 50:
+            cur = by_id[rng.choice(cur["prereqs"])]
+            seq.append(cur["id"])
+        paths.append({"name": f"Cesta {k + 1}", "description": "", "node_sequence": seq[::-1]})
+
+    return {
+        "metadata": {"title": f"Synthetic roadmap ({n_nodes} uzlů)", "version": "synthetic"},
+        "tracks": tracks,
+        "nodes": nodes,
+        "learning_paths": paths,
+    }
+
+
+def write_roadmap(path: str | Path, n_nodes: int, **kwargs: Any) -> Path:
+    """Vygeneruje roadmapu a uloží ji jako JSON (vrací cestu)."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps(generate_roadmap(n_nodes, **kwargs), ensure_ascii=False), encoding="utf-8")
+    return p
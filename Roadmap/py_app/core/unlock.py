@@ -0,0 +1,91 @@
+# py_app/core/unlock.py
+from __future__ import annotations
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+COMPLETED = "completed"
+AVAILABLE = "available"
+LOCKED = "locked"
+
+
+class UnlockEngine:
+    """
+    Inkrementální odemykání uzlů nad prereq grafem.
+
+    Pro každý uzel drží počet ještě nesplněných prereqů. Dokončení uzlu sníží
+    čítač jen jeho následníkům (O(out-degree)) a vrátí přesně ty, které právě
+    klesly na nulu. Plný přepočet O(V+E) proběhne jen při reset().
+
+    pred[n] = prereqy uzlu n, succ[p] = uzly, které p odemyká
+    (RoadmapIndex.pred / .succ, případně totéž postavené z dictu).
+    """
+
+    def __init__(self, pred: Mapping[str, Sequence[str]], succ: Mapping[str, Sequence[str]],
+                 completed: Iterable[str] = ()):
+        self.pred = pred
+        self.succ = succ
+        self.completed: Set[str] = set()
+        self.remaining: Dict[str, int] = {}
+        self.reset(completed)
+
+    @classmethod
+    def for_roadmap(cls, roadmap, completed: Iterable[str] = ()) -> "UnlockEngine":
+        idx = roadmap.index
+        return cls(idx.pred, idx.succ, completed)
+
+    def reset(self, completed: Iterable[str]) -> None:
+        """Plný přepočet čítačů z množiny hotových uzlů."""
+        self.completed = set(map(str, completed))
+        done = self.completed
+        self.remaining = {nid: sum(1 for p in prereqs if p not in done) for nid, prereqs in self.pred.items()}
+
+    def refresh(self, node_ids: Iterable[str]) -> None:
+        """Přepočítá čítače jen zadaných uzlů (změnily se jim prereqy, např. po hot-reloadu)."""
+        done = self.completed
+        for nid in node_ids:
+            prereqs = self.pred.get(nid)
+            if prereqs is None:
+                self.remaining.pop(nid, None)
+            else:
+                self.remaining[nid] = sum(1 for p in prereqs if p not in done)
+
+    def complete(self, node_id: str) -> List[str]:
+        """Označí uzel jako hotový; vrátí uzly, které se tím právě odemkly."""
+        nid = str(node_id)
+        if nid in self.completed:
+            return []
+        self.completed.add(nid)
+        unlocked: List[str] = []
+        for s in self.succ.get(nid, ()):
+            left = self.remaining.get(s, 0) - 1
+            self.remaining[s] = left
+            if left == 0 and s not in self.completed:
+                unlocked.append(s)
+        return unlocked
+
+    def sync(self, completed: Iterable[str]) -> Optional[List[str]]:
+        """
+        Dorovná stav podle hotových uzlů z dokumentu (jiný worker, sync, import).
+        Přibyly-li jen nové uzly, aplikuje je inkrementálně a vrátí odemčené;
+        pokud nějaký hotový uzel zmizel (reset), přepočítá vše a vrátí None.
+        """
+        target = completed if isinstance(completed, (set, frozenset)) else set(map(str, completed))
+        if not self.completed <= target:
+            self.reset(target)
+            return None
+        unlocked: List[str] = []
+        for nid in target - self.completed:
+            unlocked.extend(self.complete(nid))
+        return [n for n in unlocked if n not in self.completed]
+
+    # ---------- dotazy ----------
+    def status(self, node_id: str) -> str:
+        nid = str(node_id)
+        if nid in self.completed:
+            return COMPLETED
+        return AVAILABLE if self.remaining.get(nid, 0) == 0 else LOCKED
+
+    def is_available(self, node_id: str) -> bool:
+        return self.status(node_id) == AVAILABLE
+
+    def available(self) -> List[str]:
+        return [nid for nid, left in self.remaining.items() if left == 0 and nid not in self.completed]
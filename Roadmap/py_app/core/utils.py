@@ -1,162 +1,212 @@
 from __future__ import annotations
+from collections import OrderedDict
 from pathlib import Path
-from typing import Tuple, Set, Dict, Any, List
+from typing import Tuple, Dict, Optional
+import hashlib
 import json
+import re
+import threading
 
-from .models import Roadmap, Edge
+from .models import Roadmap
+from .migrations import SCHEMA_VERSION, migrate
+from .storage import KIND_ROADMAP, atomic_write_bytes, dump_binary, is_binary, load_binary, write_document
 
 def default_roadmap_path() -> Path:
     # py_app/core/utils.py -> parent je "core", parents[1] je "py_app"
     return Path(__file__).resolve().parent / "data" / "roadmap.json"
 
-def load_roadmap(path: str | Path | None = None) -> Roadmap:
-    p = Path(path) if path is not None else default_roadmap_path()
-
-# Pomocné konstrukce hran
 # =========================
-def _edges_from_prereqs(data: dict) -> Set[Tuple[str, str]]:
-        data = json.load(f)
+# I/O
+# =========================
+# Cache napříč procesem: cesta -> ((mtime_ns, size), Roadmap). Vrácený model je
+# sdílený – volající ho nemají měnit (obrazovky si dělají model_dump()).
+# Obě mapy jsou LRU se společným limitem – každá úprava souboru (hot-reload)
+# jinak přidá další plný model, který by v procesu zůstal navždy.
+_CACHE_SIZE = 8
+_ROADMAP_CACHE: "OrderedDict[str, Tuple[Tuple[int, int], Roadmap]]" = OrderedDict()
+_ROADMAP_BY_HASH: "OrderedDict[str, Roadmap]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
 
-    # lehké migrace pro kompatibilitu
-    _ensure_numeric_difficulty(data)
-    _ensure_level_numeric(data)
-    _ensure_edges(data)
 
-    try:
-        return Roadmap(**data)
-    except Exception as e:  # hezká hláška s cestou k souboru
-        raise ValueError(f"Neplatná struktura dat v {p}: {e}") from e
-# =========================
-# Pomocné konstrukce hran
-# =========================
-def _edges_from_prereqs(data: dict) -> Set[Tuple[str, str]]:
-    """
-    Vytvoří hrany (source -> target) z pole prereqs u každého uzlu.
-    Každý prereq 'pre' vede do 'nid' (pre -> nid).
-    """
-    edges: Set[Tuple[str, str]] = set()
-    for n in data.get("nodes", []) or []:
-        nid = n.get("id")
-        for pre in n.get("prereqs", []) or []:
-            if nid and pre:
-                edges.add((str(pre), str(nid)))
-    return edges
+def _lru_put(cache: OrderedDict, key: str, value: object) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > _CACHE_SIZE:
+        cache.popitem(last=False)
 
+COMPILED_SUFFIX = ".compiled"
+_COMPILED_FORMAT = 4
 
-def _edges_from_learning_paths(data: dict) -> Set[Tuple[str, str]]:
-    """
-    Vytvoří sekvenční hrany z learning_paths.node_sequence.
-    Pro každý sousední pár (a, b) v posloupnosti přidá hranu (a -> b).
-    """
-    edges: Set[Tuple[str, str]] = set()
-    for lp in data.get("learning_paths", []) or []:
-        seq = lp.get("node_sequence", []) or []
-        for i in range(len(seq) - 1):
-            a, b = str(seq[i]), str(seq[i + 1])
-            edges.add((a, b))
-    return edges
 
+def _compiled_path(p: Path) -> Path:
+    return p.with_name(p.name + COMPILED_SUFFIX)
 
-# =========================
-# Migrace / normalizace
-# =========================
-def _ensure_numeric_difficulty(data: dict) -> None:
-    """
-    Migrace: pokud je difficulty string, přemapujeme ho na 1..4.
-    Neznámé hodnoty mapujeme na 2 (intermediate).
-    """
-    mapping = {
-        "beginner": 1,
-        "intermediate": 2,
-        "advanced": 3,
-        "expert": 4,
-        # pro jistotu i česky:
-        "zacatecnik": 1,
-        "stredne pokrocily": 2,
-        "pokrocily": 3,
-        "expert": 4,
-    }
-    for n in data.get("nodes", []) or []:
-        v = n.get("difficulty")
-        if isinstance(v, str):
-            n["difficulty"] = mapping.get(v.strip().lower(), 2)
-
-
-def _ensure_level_numeric(data: dict) -> None:
+
+def _load_compiled(p: Path, digest: str) -> Optional[Roadmap]:
     """
-    Volitelná migrace: pokud 'level' chybí nebo není číslo, nastavíme 1.
+    Zmigrovaný tvar souboru ve starší schema_version – použijeme jen při
+    shodném hashi zdroje. Ušetří se jen migrace, model projde běžnou
+    validací. Jsou v něm jen data (binární formát z core/storage.py, žádný
+    pickle), takže podvržený soubor ve složce s daty nemůže spustit kód.
     """
-    for n in data.get("nodes", []) or []:
-        if not isinstance(n.get("level"), int):
-            n["level"] = 1
+    cp = _compiled_path(p)
+    try:
+        blob = load_binary(cp.read_bytes(), KIND_ROADMAP)
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+    if (not isinstance(blob, dict) or blob.get("format") != _COMPILED_FORMAT
+            or blob.get("source") != digest or not isinstance(blob.get("roadmap"), dict)):
+        return None
+    try:
+        rm = Roadmap.model_validate(blob["roadmap"])
+    except ValueError:
+        return None
+    rm._source_hash = digest
+    rm._migrated_from = blob.get("migrated_from")
+    return rm
+
+
+def _write_compiled(p: Path, digest: str, roadmap: Roadmap) -> None:
+    cp = _compiled_path(p)
+    blob = {"format": _COMPILED_FORMAT, "source": digest, "migrated_from": roadmap._migrated_from,
+            "roadmap": roadmap.model_dump(mode="json")}
+    try:
+        atomic_write_bytes(cp, dump_binary(blob, KIND_ROADMAP))
+    except OSError:
+        pass  # artefakt je jen optimalizace (např. read-only složka)
 
 
-def _ensure_edges(data: dict) -> None:
-    """
-    Pokud edges chybí, doplníme z prereqs + learning_paths (sjednocená množina).
-    Necháváme pouze hrany, jejichž uzly v datasetu existují.
-    """
-    if "edges" in data and isinstance(data["edges"], list):
-        # i tak je lehce pročistíme
-        _prune_edges_to_existing_nodes(data)
-        return
+# "schema_version" ukládá save_roadmap hned na začátek souboru → stačí kouknout do hlavičky
+_SCHEMA_PEEK = re.compile(rb'^\s*\{\s*"schema_version"\s*:\s*(\d+)')
 
-    e1 = _edges_from_prereqs(data)
-    e2 = _edges_from_learning_paths(data)
-    merged = sorted(e1 | e2)
 
-    # filtr: pouze hrany, kde oba uzly existují
-    existing = {str(n.get("id")) for n in (data.get("nodes") or []) if n.get("id")}
-    filtered = [(a, b) for (a, b) in merged if a in existing and b in existing]
-    data["edges"] = [{"source": a, "target": b} for (a, b) in filtered]
+def _is_current(raw: bytes) -> bool:
+    m = _SCHEMA_PEEK.match(raw[:256])
+    return bool(m) and int(m.group(1)) == SCHEMA_VERSION
 
 
-def _prune_edges_to_existing_nodes(data: dict) -> None:
-    """
-    Pro jistotu vyhodíme hrany, které odkazují na neexistující uzly.
-    """
-    nodes_ids = {str(n.get("id")) for n in (data.get("nodes") or []) if n.get("id")}
-    new_edges: List[Dict[str, str]] = []
-    for e in data.get("edges", []) or []:
-        src = str(e.get("source"))
-        tgt = str(e.get("target"))
-        if src in nodes_ids and tgt in nodes_ids:
-            new_edges.append({"source": src, "target": tgt})
-    data["edges"] = new_edges
+def _parse_roadmap(raw: bytes, p: Path) -> Roadmap:
+    try:
+        if _is_current(raw):
+            # aktuální formát: bez json.loads a bez migrací, rovnou pydantic nad bajty
+            return Roadmap.model_validate_json(raw)
+
+        data = load_binary(raw, KIND_ROADMAP) if is_binary(raw) else json.loads(raw)
+        old_version = migrate(data)   # jeden průchod přes nodes, viz core/migrations.py
+        rm = Roadmap.model_validate(data)
+        if old_version < SCHEMA_VERSION:
+            rm._migrated_from = old_version
+        return rm
+    except Exception as e:  # hezká hláška s cestou k souboru
+        raise ValueError(f"Neplatná struktura dat v {p}: {e}") from e
 
 
-# =========================
-# I/O
-# =========================
-def load_roadmap(path: str | Path) -> Roadmap:
+def load_roadmap(path: str | Path | None = None, use_compiled: bool = False,
+                 persist_migrated: bool = False, cache: bool = True) -> Roadmap:
     """
-    Načte JSON, provede nenásilnou migraci (difficulty → čísla, doplnění edges,
-    zajištění level) a vrátí validní Roadmap (Pydantic v2).
+    Načte JSON (nebo binární .bin, viz core/storage.py), starší schema_version
+    převede migracemi (core/migrations.py) a vrátí validní Roadmap (Pydantic v2).
+    JSON v aktuální verzi se validuje rovnou z bajtů, bez migrací.
+    Bez cesty načte výchozí data/roadmap.json.
+
+    persist_migrated=True zapíše zmigrovaný tvar zpět do souboru, takže
+    příští načtení už migrace přeskočí.
+
+    Výsledek se drží v cache podle cesty + (mtime, size), resp. podle hashe
+    obsahu. use_compiled=True u souboru ve starší verzi (který se nepřepisuje,
+    viz persist_migrated) uloží vedle zdroje `<soubor>.compiled` se
+    zmigrovaným tvarem, takže příští studený start přeskočí migrace.
+    Soubory v aktuální verzi artefakt nepoužívají – model_validate_json nad
+    bajty je stejně rychlý jako jeho načtení.
+    cache=False procesní cache obejde (čtení i zápis) – pro volající, kteří
+    si životnost modelů řídí sami (RoadmapRegistry).
     """
-    p = Path(path)
+    p = Path(path) if path is not None else default_roadmap_path()
     if not p.exists():
         raise FileNotFoundError(f"Soubor neexistuje: {p}")
 
-    with p.open(encoding="utf-8") as f:
-        data = json.load(f)
-
-    # lehké migrace pro kompatibilitu
-    _ensure_numeric_difficulty(data)
-    _ensure_level_numeric(data)
-    _ensure_edges(data)
-
-    try:
-        return Roadmap(**data)
-    except Exception as e:  # hezká hláška s cestou k souboru
-        raise ValueError(f"Neplatná struktura dat v {p}: {e}") from e
-
-
-def save_roadmap(roadmap: Roadmap, path: str | Path) -> None:
-    """Uloží Roadmap zpět do JSON (hezky formátované)."""
-    p = Path(path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open("w", encoding="utf-8") as f:
-        json.dump(roadmap.model_dump(mode="json"), f, ensure_ascii=False, indent=2)
+    key = str(p.resolve())
+    st = p.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    if cache:
+        with _CACHE_LOCK:
+            hit = _ROADMAP_CACHE.get(key)
+            if hit is not None and hit[0] == stamp:
+                _ROADMAP_CACHE.move_to_end(key)
+                return hit[1]
+
+    raw = p.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    rm = None
+    if cache:
+        with _CACHE_LOCK:
+            rm = _ROADMAP_BY_HASH.get(digest)
+            if rm is not None:
+                _ROADMAP_BY_HASH.move_to_end(digest)
+
+    use_compiled = use_compiled and not _is_current(raw)
+    if rm is None and use_compiled:
+        rm = _load_compiled(p, digest)
+    if rm is None:
+        rm = _parse_roadmap(raw, p)
+        if persist_migrated and rm._migrated_from is not None:
+            save_roadmap(rm, p)
+            raw = p.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            st = p.stat()
+            stamp = (st.st_mtime_ns, st.st_size)
+        rm._source_hash = digest
+        if use_compiled and not _is_current(raw):   # persist_migrated už zdroj přepsal
+            _write_compiled(p, digest, rm)
+
+    if cache:
+        _remember_roadmap(key, stamp, digest, rm)
+    return rm
+
+
+def _remember_roadmap(key: str, stamp: Tuple[int, int], digest: str, rm: Roadmap) -> None:
+    with _CACHE_LOCK:
+        _lru_put(_ROADMAP_CACHE, key, (stamp, rm))
+        _lru_put(_ROADMAP_BY_HASH, digest, rm)
+
+
+def _adopt_live_roadmap(key: str, stamp: Tuple[int, int], rm: Roadmap) -> None:
+    """
+    Živý model po hot-reloadu (core/hot_reload.py) zůstane v cache jen podle
+    cesty. Podle obsahu ne – mění se na místě, takže jiný soubor se stejným
+    (původním či novým) obsahem musí dostat vlastní model.
+    """
+    with _CACHE_LOCK:
+        _lru_put(_ROADMAP_CACHE, key, (stamp, rm))
+        for digest in [d for d, m in _ROADMAP_BY_HASH.items() if m is rm]:
+            del _ROADMAP_BY_HASH[digest]
+
+
+def roadmap_hash(roadmap: Roadmap) -> str:
+    """Stabilní otisk obsahu roadmapy (hash zdroje, případně serializovaného modelu)."""
+    if roadmap._source_hash is None:
+        roadmap._source_hash = hashlib.sha256(roadmap.model_dump_json().encode("utf-8")).hexdigest()
+    return roadmap._source_hash
+
+
+def clear_roadmap_cache() -> None:
+    with _CACHE_LOCK:
+        _ROADMAP_CACHE.clear()
+        _ROADMAP_BY_HASH.clear()
+
+
+def save_roadmap(roadmap: Roadmap, path: str | Path, binary: Optional[bool] = None) -> None:
+    """
+    Uloží Roadmap (vždy v aktuální schema_version) atomicky přes dočasný soubor.
+    Formát podle přípony: .bin = kompaktní binární (core/storage.py), jinak
+    hezky formátovaný JSON; binary=True/False příponu přebije.
+    Líně načtená roadmapa (core/streaming.py) si před uložením dočte těla
+    uzlů – jinak by se prázdné desc/links zapsaly místo skutečných.
+    """
+    if roadmap._lazy_bodies is not None:
+        from .streaming import ensure_bodies
+        ensure_bodies(roadmap)
+    write_document(path, roadmap.model_dump(mode="json"), KIND_ROADMAP, binary)
 
 
 # =========================
@@ -1,22 +1,28 @@
 import flet as ft
 import math
-import json
 import random
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional, Set
+from typing import Iterable, List, Dict, Tuple, Optional
 
 from py_app.ui.appbar import build_appbar
+from py_app.core.utils import load_roadmap, default_roadmap_path
+from py_app.core.unlock import AVAILABLE, LOCKED, UnlockEngine
+from py_app.core.recommend import Recommender
+from py_app.core.spatial import SpatialIndex
 from py_app.core.progress import (
-    load_progress, mark_completed, first_available_index, category_progress_from_nodes,
-    set_task_done, get_tasks_done, node_progress_ratio, evaluate_node_completion,
-    recompute_badges, get_daily_goal, today_xp
+    load_progress, first_available_index, get_tasks_done, node_progress_ratio,
+    get_daily_goal, today_xp, bind_roadmap, progress_state,
+    aset_task_and_evaluate, amark_completed, arecompute_badges,
+    aprogress_state, ProgressSnapshot
 )
 
-DATA_PATH = Path("py_app/core/data/roadmap.json")
+DATA_PATH = default_roadmap_path()
 AUDIO_PATH = "sounds/fanfare.mp3"
 
 COLORS = ft.Colors
 
+BUBBLE_W, BUBBLE_H = 120, 56
+
 # ---------- micro-anim helpers ----------
 def _animate_bg_on_hover(ctrl: ft.Container, base, hover):
     def _h(e: ft.HoverEvent):
@@ -77,12 +83,6 @@ def _s_curve_points(n: int, width: int = 860, height: int = 560, amp: float = 16
         pts.append((x, y))
     return pts
 
-def _track_color(track_id: str, data: Dict) -> str:
-    for t in data.get("tracks", []):
-        if t["id"] == track_id:
-            return t.get("color") or "#888888"
-    return "#888888"
-
 # =========================
 #  CATEGORY SCREEN
 # =========================
@@ -94,16 +94,25 @@ class CategoryScreen(ft.View):
         self.category_name = category_name
         self.on_back = on_back
 
-        self.data = self._load_data()
-        self._id2label = {str(n["id"]): n.get("label", str(n["id"])) for n in self.data.get("nodes", [])}
-        self.nodes: List[Dict] = [n for n in self.data["nodes"] if n["track"] == self.category_id]
+        self.roadmap = load_roadmap(DATA_PATH)
+        self.index = self.roadmap.index
+        bind_roadmap(self.roadmap)
+        track_nodes = self.index.track_nodes(self.category_id)
+        # dump = vlastní kopie uzlů tracku, do které smíme psát __status__/__ratio__
+        self.nodes: List[Dict] = [n.model_dump() for n in track_nodes]
+        self._pos_by_id: Dict[str, int] = {str(n["id"]): i for i, n in enumerate(self.nodes)}
         self.points: List[Tuple[float, float]] = _s_curve_points(len(self.nodes))
         self.focus_idx: Optional[int] = None
+        self._recommender = Recommender(self.roadmap)
 
         # refs
-        self._bubble_refs: List[ft.Container] = []
-        self._aura_refs: List[ft.Container] = []
-        self._bubble_stacks: List[ft.Stack] = []  # pro ripple
+        # klíč = index uzlu
+        self._bubble_refs: Dict[int, ft.Container] = {}
+        self._aura_refs: Dict[int, ft.Container] = {}
+        self._bubble_stacks: Dict[int, ft.Stack] = {}  # pro ripple
+        self._spatial: Optional[SpatialIndex] = None
+        self._hover_idx: Optional[int] = None
+        self._press_idx: Optional[int] = None
         self._pulse_running = False
         self._confetti_layer: Optional[ft.Stack] = None
 
@@ -115,34 +124,50 @@ class CategoryScreen(ft.View):
         # audio
         self._audio: Optional[ft.Audio] = None
 
-        self._recompute_statuses()
+        self._recompute_statuses(*progress_state())
         self._build_view()
 
     # ---------- data ----------
-    def _load_data(self) -> Dict:
-        if not DATA_PATH.exists():
-            raise FileNotFoundError(f"Soubor {DATA_PATH} neexistuje.")
-        with DATA_PATH.open(encoding="utf-8") as f:
-            return json.load(f)
-
-    def _recompute_statuses(self):
-        p = load_progress()
-        completed = set(map(str, p.get("completed_nodes", [])))
+    def _recompute_statuses(self, snap: ProgressSnapshot, engine: UnlockEngine):
+        # plný přepočet jen při otevření (a když progress mezitím couvl, např. reset);
+        # snapshot i čítače (sdílené s progress vrstvou) přichází z progress_state
+        self._snap = snap
+        self._unlock = engine
+        self._recommender.update_snapshot(snap)
         for n in self.nodes:
-            nid = str(n["id"])
-            if nid in completed:
-                n["__status__"] = "completed"
-            else:
-                prereqs = [str(x) for x in (n.get("prereqs") or [])]
-                n["__status__"] = "available" if all(pr in completed for pr in prereqs) else "locked"
-            n["__ratio__"] = node_progress_ratio(n)
+            n["__status__"] = self._unlock.status(n["id"])
+            n["__ratio__"] = node_progress_ratio(n, self._snap)
+
+    def _update_statuses(self, snap: ProgressSnapshot, engine: UnlockEngine,
+                         touched: Iterable[str] = ()) -> List[str]:
+        """Inkrementálně: přepíše jen dotčené uzly a jejich následníky; vrátí právě odemčené."""
+        prev = self._snap.completed
+        touched = set(map(str, touched))
+        if not prev <= snap.completed or (snap.completed - prev) - touched:
+            # progress couvl nebo přibyly uzly odjinud (sync, jiný worker)
+            self._recompute_statuses(snap, engine)
+            return []
+        self._snap = snap
+        self._unlock = engine
+        self._recommender.update(snap.completed, snap.done_bits, touched=touched)
+        changed = touched | {s for t in touched for s in self.index.succ.get(t, ())}
+        unlocked: List[str] = []
+        for nid in changed:
+            i = self._pos_by_id.get(nid)
+            if i is None:           # uzel z jiného tracku
+                continue
+            n = self.nodes[i]
+            status = self._unlock.status(nid)
+            if n["__status__"] == LOCKED and status == AVAILABLE:
+                unlocked.append(nid)
+            n["__status__"] = status
+            n["__ratio__"] = node_progress_ratio(n, snap)
+        return unlocked
 
     def _missing_prereqs(self, node: Dict) -> List[str]:
-        p = load_progress()
-        done: Set[str] = set(map(str, p.get("completed_nodes", [])))
-        req = [str(x) for x in (node.get("prereqs") or [])]
-        missing_ids = [r for r in req if r not in done]
-        return [self._id2label.get(r, r) for r in missing_ids]
+        # celý chybějící řetěz (i nepřímé prereqy), v pořadí, jak je splnit
+        missing_ids = self.index.missing_for(str(node["id"]), self._snap.completed)
+        return [self.index.label(r) for r in missing_ids]
 
     # =========================
     #  CONFETTI + AUDIO
@@ -269,6 +294,11 @@ class CategoryScreen(ft.View):
         w, h = 860, 560
         base = [ft.Container(width=w, height=h, bgcolor=COLORS.with_opacity(0.04, COLORS.PRIMARY), border_radius=14)]
 
+        # prostorový index bodů: jeden hit-test místo handleru na každé bublině
+        # (plátno má pevnou velikost a nescrolluje, body jsou vždy celé uvnitř)
+        self._spatial = SpatialIndex(self.points)
+        self._hover_idx = self._press_idx = None
+
         # SPOJE tenká linka
         for i in range(len(self.points) - 1):
             x1, y1 = self.points[i]; x2, y2 = self.points[i + 1]
@@ -284,14 +314,14 @@ class CategoryScreen(ft.View):
             )
 
         # bubliny + aury s tactile efekty
-        self._bubble_refs = []
-        self._bubble_stacks = []
-        self._aura_refs = []
+        self._bubble_refs = {}
+        self._bubble_stacks = {}
+        self._aura_refs = {}
 
         for i, (node, (x, y)) in enumerate(zip(self.nodes, self.points)):
             status = node["__status__"]
             ratio = node["__ratio__"]
-            col = _track_color(node["track"], self.data)
+            col = self.index.track_color(node["track"])
 
             fill = (COLORS.with_opacity(0.25, COLORS.GREY_700) if status == "locked"
                     else COLORS.GREEN_400 if status == "available"
@@ -302,11 +332,11 @@ class CategoryScreen(ft.View):
             scale = 1.15 if focused else 1.0
 
             aura = ft.Container(
-                width=120, height=56,
+                width=BUBBLE_W, height=BUBBLE_H,
                 border_radius=999,
                 bgcolor=COLORS.with_opacity(0.06, col) if focused else COLORS.TRANSPARENT,
             )
-            self._aura_refs.append(aura)
+            self._aura_refs[i] = aura
 
             inner = ft.Container(
                 content=ft.Column(
@@ -320,44 +350,74 @@ class CategoryScreen(ft.View):
                 border=ft.border.all(3, ring),
             )
             # ripple stack
-            st = ft.Stack([inner], width=120, height=56)
+            st = ft.Stack([inner], width=BUBBLE_W, height=BUBBLE_H)
             bubble = ft.Container(content=st, animate_scale=ft.animation.Animation(120, "easeOut"), scale=scale)
+            self._bubble_refs[i] = bubble
+            self._bubble_stacks[i] = st
 
-            # hover → jemné zvýraznění a zvětšení
-            def _hover_b(e: ft.HoverEvent, idx=i):
-                if idx == self.focus_idx:
-                    return
-                bubble.scale = 1.06 if e.data == "true" else 1.0
-                bubble.update()
-
-            bubble.on_hover = _hover_b
-            self._bubble_refs.append(bubble)
-            self._bubble_stacks.append(st)
-
-            # gesture – press, ripple, click
-            d, u = _press_scale_handlers(bubble, 0.97)
-
-            def _down(e: ft.TapEvent, idx=i):
-                d(e)
-                _ripple_in(self._bubble_stacks[idx], e.local_x, e.local_y, COLORS.PRIMARY, 120, 260)
-
-            def _up(e):
-                u(e)
-
-            def _tap(e, idx=i):
-                self._on_bubble_click(idx)
-
-            gest = ft.GestureDetector(content=bubble, on_tap=_tap, on_tap_down=_down, on_tap_up=_up)
-
-            base.append(ft.Container(left=x - 60, top=y - 28, content=aura))
-            base.append(ft.Container(left=x - 60, top=y - 26, content=gest))
+            base.append(ft.Container(left=x - BUBBLE_W / 2, top=y - BUBBLE_H / 2, content=aura))
+            base.append(ft.Container(left=x - BUBBLE_W / 2, top=y - BUBBLE_H / 2 + 2, content=bubble))
 
         # vlnící tečky (pod bublinami)
         dots = self._make_wave_dots()
         base = [base[0]] + dots + base[1:]
 
+        # jedna vrstva pro hover / tap nad celým plátnem (uzel se najde přes index)
+        base.append(ft.GestureDetector(
+            content=ft.Container(width=w, height=h),
+            on_hover=self._on_canvas_hover, on_exit=lambda _: self._set_hover(None),
+            on_tap_down=self._on_canvas_tap_down, on_tap_up=self._on_canvas_tap_up,
+            on_tap=self._on_canvas_tap,
+        ))
+
         return ft.Stack(base, width=w, height=h)
 
+    # ---------- hit-test ----------
+    def _hit(self, x: float, y: float) -> Optional[int]:
+        """Index bubliny pod bodem plátna (x, y), jinak None."""
+        if self._spatial is None:
+            return None
+        idx = self._spatial.nearest(x, y, BUBBLE_W / 2)
+        if idx is None or idx not in self._bubble_refs:
+            return None
+        bx, by = self.points[idx]
+        return idx if abs(y - by) <= BUBBLE_H / 2 else None
+
+    def _set_hover(self, idx: Optional[int]):
+        # hover → jemné zvýraznění a zvětšení
+        if idx == self._hover_idx:
+            return
+        for j, target in ((self._hover_idx, 1.0), (idx, 1.06)):
+            b = self._bubble_refs.get(j) if j is not None else None
+            if b is not None and j != self.focus_idx:
+                b.scale = target
+                b.update()
+        self._hover_idx = idx
+
+    def _on_canvas_hover(self, e: ft.HoverEvent):
+        self._set_hover(self._hit(e.local_x, e.local_y))
+
+    # gesture – press, ripple, click
+    def _on_canvas_tap_down(self, e: ft.TapEvent):
+        idx = self._press_idx = self._hit(e.local_x, e.local_y)
+        if idx is None:
+            return
+        d, _ = _press_scale_handlers(self._bubble_refs[idx], 0.97)
+        d(e)
+        x, y = self.points[idx]
+        _ripple_in(self._bubble_stacks[idx], e.local_x - (x - BUBBLE_W / 2), e.local_y - (y - BUBBLE_H / 2),
+                   COLORS.PRIMARY, 120, 260)
+
+    def _on_canvas_tap_up(self, e):
+        b = self._bubble_refs.get(self._press_idx) if self._press_idx is not None else None
+        if b is not None:
+            _, u = _press_scale_handlers(b, 0.97)
+            u(e)
+
+    def _on_canvas_tap(self, _):
+        if self._press_idx is not None:
+            self._on_bubble_click(self._press_idx)
+
     def _make_wave_dots(self) -> List[ft.Control]:
         pos_controls: List[ft.Control] = []
         n_dots_per_segment = 14
@@ -433,8 +493,9 @@ class CategoryScreen(ft.View):
         self._refresh_canvas()
         self._load_tasks_for(idx)
 
-    def _refresh_canvas(self):
-        self._recompute_statuses()
+    def _refresh_canvas(self, state: Optional[Tuple[ProgressSnapshot, UnlockEngine]] = None,
+                        touched: Iterable[str] = ()) -> List[str]:
+        unlocked = self._update_statuses(*state, touched=touched) if state is not None else []
         self.points = _s_curve_points(len(self.nodes))
 
         new_stack = self._build_canvas()
@@ -443,6 +504,7 @@ class CategoryScreen(ft.View):
 
         self._start_pulse()
         self._start_wave_animation()
+        return unlocked
 
     def _load_tasks_locked(self, node: Dict, missing_labels: List[str]):
         self.tasks_title.value = f"🔒 {node['label']}"
@@ -462,17 +524,17 @@ class CategoryScreen(ft.View):
                                                 COLORS.with_opacity(0.02, COLORS.ON_SURFACE),
                                                 COLORS.with_opacity(0.05, COLORS.ON_SURFACE))
 
-        def _on_change(e):
-            set_task_done(node_id, i, cb.value)
-            just_completed, _, goal_hit = evaluate_node_completion(
-                next(n for n in self.nodes if str(n["id"]) == str(node_id)), xp_award=10
+        async def _on_change(e):
+            # zápisy běží mimo event loop (thread pool), UI mezitím nestojí
+            just_completed, unlocked, goal_hit = await aset_task_and_evaluate(
+                self.nodes[self._pos_by_id[str(node_id)]], i, cb.value, xp_award=10
             )
-            self._refresh_canvas()
+            self._refresh_canvas(await aprogress_state(), touched=[node_id])
             if just_completed:
-                with DATA_PATH.open(encoding="utf-8") as f:
-                    roadmap = json.load(f)
-                _, newly = recompute_badges(roadmap)
+                _, newly = await arecompute_badges(self.roadmap)
                 msg_parts = ["✨ Uzel dokončen!", "🪙 +10 XP"]
+                if unlocked:
+                    msg_parts.append("🔓 " + " • ".join(self.index.label(u) for u in unlocked))
                 if goal_hit:
                     msg_parts.append("🎯 Denní cíl splněn!")
                 if newly:
@@ -493,7 +555,7 @@ class CategoryScreen(ft.View):
         self.tasks_title.value = f"📚 {node['label']}"
         self.tasks_info.value = ""
         tasks = node.get("tasks_all") or []
-        done_set = get_tasks_done(node["id"])
+        done_set = set(get_tasks_done(node["id"], self._snap))
 
         self.tasks_list.controls = [
             self._task_checkbox(node["id"], i, t, i in done_set)
@@ -503,11 +565,12 @@ class CategoryScreen(ft.View):
         self.update()
 
     def _on_continue(self, e):
-        idx = first_available_index(self.nodes)
+        nid = self._recommender.best(self.category_id)
+        idx = self._pos_by_id[nid] if nid is not None else first_available_index(self.nodes, self._snap)
         self._focus_node(idx)
         self._xp_toast("➡️ Pokračuj tady")
 
-    def _on_complete_clicked(self, e):
+    async def _on_complete_clicked(self, e):
         if self.focus_idx is None:
             return
         node = self.nodes[self.focus_idx]
@@ -515,16 +578,15 @@ class CategoryScreen(ft.View):
             self._xp_toast("🔒 Nejdřív odemkni předchozí uzly")
             return
 
-        _, goal_hit = mark_completed(str(node["id"]), xp_award=10)
-        with DATA_PATH.open(encoding="utf-8") as f:
-            roadmap = json.load(f)
-        _, newly = recompute_badges(roadmap)
+        _, goal_hit = await amark_completed(str(node["id"]), xp_award=10)
+        _, newly = await arecompute_badges(self.roadmap)
 
-        self._recompute_statuses()
+        unlocked = self._refresh_canvas(await aprogress_state(), touched=[str(node["id"])])
         self._load_tasks_for(self.focus_idx)
-        self._refresh_canvas()
 
         msg_parts = ["✨ Hotovo!", "🪙 +10 XP"]
+        if unlocked:
+            msg_parts.append("🔓 " + " • ".join(self.index.label(u) for u in unlocked))
         if goal_hit:
             msg_parts.append("🎯 Denní cíl splněn!")
         if newly:
@@ -553,8 +615,8 @@ class CategoryScreen(ft.View):
                 return
             try:
                 for i, node in enumerate(self.nodes):
-                    if node["__status__"] == "available" and i != self.focus_idx:
-                        b = self._bubble_refs[i]
+                    b = self._bubble_refs.get(i)
+                    if b is not None and node["__status__"] == "available" and i != self.focus_idx:
                         target = 1.06 if scale_up else 1.0
                         b.animate_scale = ft.animation.Animation(280, "easeOut")
                         b.scale = target
@@ -605,12 +667,11 @@ class CategoryScreen(ft.View):
         xp_thresholds = [100, 500, 1000]
         streak_thresholds = [3, 7, 14, 30]
 
-        tracks = self.data.get("tracks", [])
-        comp = set(map(str, p.get("completed_nodes", [])))
+        tracks = [t.model_dump() for t in self.roadmap.tracks]
 
         def track_done(tid: str) -> bool:
-            tnodes = [n for n in self.data.get("nodes", []) if n.get("track") == tid]
-            return bool(tnodes) and all(str(n["id"]) in comp for n in tnodes)
+            # odznak uděluje badge engine v okamžiku dokončení posledního uzlu
+            return f"track_{tid}_complete" in owned
 
         def chip(text: str, ok: bool):
             return ft.Container(
@@ -2,13 +2,74 @@ from __future__ import annotations
 import flet as ft
 
 from py_app.core.models import Roadmap
-from py_app.core.progress import get_today_progress, get_current_streak
+from py_app.core.progress import (
+    get_today_progress, get_current_streak, due_reviews, due_review_count, areview_task,
+)
 from py_app.ui.appbar import build_appbar
 
 COLORS = getattr(ft, "colors", getattr(ft, "Colors", None))
 
 
-def _build_progress_section() -> ft.Row:
+REVIEW_PREVIEW = 3
+
+
+def _build_review_queue(roadmap: Roadmap) -> ft.Container:
+    """Karta s tasky, které jsou dnes na řadě k zopakování (SM-2, viz core/review.py)."""
+    index = roadmap.index
+    count = due_review_count()
+    count_text = ft.Text(f"{count} k zopakování", color=COLORS.WHITE)
+    rows = ft.Column(spacing=4)
+
+    def _task_label(nid: str, i: int) -> str:
+        node = index.node_by_id.get(nid)
+        if node is None:
+            return nid
+        task = node.tasks_all[i] if 0 <= i < len(node.tasks_all) else f"#{i + 1}"
+        return f"{node.label}: {task}"
+
+    def _row(nid: str, i: int) -> ft.Row:
+        def _grade(quality: int):
+            async def _h(e):
+                nonlocal count
+                await areview_task(nid, i, quality)
+                rows.controls.remove(row)
+                count -= 1
+                count_text.value = f"{count} k zopakování"
+                rows.update()
+                count_text.update()
+            return _h
+
+        row = ft.Row([
+            ft.Text(_task_label(nid, i), color=COLORS.WHITE, size=12, expand=True, no_wrap=False),
+            ft.IconButton(icon=ft.Icons.CHECK, icon_color=COLORS.WHITE, tooltip="Umím", on_click=_grade(4)),
+            ft.IconButton(icon=ft.Icons.REPLAY, icon_color=COLORS.WHITE, tooltip="Zopakovat brzy", on_click=_grade(1)),
+        ], spacing=4, vertical_alignment=ft.CrossAxisAlignment.CENTER)
+        return row
+
+    rows.controls = [_row(nid, i) for nid, i in due_reviews(limit=REVIEW_PREVIEW)]
+
+    return ft.Container(
+        bgcolor=ft.LinearGradient(
+            begin=ft.alignment.top_left,
+            end=ft.alignment.bottom_right,
+            colors=[COLORS.ORANGE, COLORS.DEEP_ORANGE],
+        ),
+        border_radius=16,
+        padding=20,
+        expand=True,
+        content=ft.Column(
+            [
+                ft.Text("Review Queue", color=COLORS.WHITE, size=14),
+                count_text,
+                rows,
+            ],
+            spacing=8,
+            horizontal_alignment=ft.CrossAxisAlignment.START,
+        ),
+    )
+
+
+def _build_progress_section(roadmap: Roadmap) -> ft.Row:
     today_progress = get_today_progress()  # float 0.0–1.0
     streak_days = get_current_streak()     # int
 
@@ -60,7 +121,7 @@ def _build_progress_section() -> ft.Row:
         ),
     )
 
-    return ft.Row([daily_goal, streak], spacing=16)
+    return ft.Row([daily_goal, _build_review_queue(roadmap), streak], spacing=16)
 
 
 
@@ -92,7 +153,7 @@ def home_screen(page: ft.Page, roadmap: Roadmap, on_open_category) -> ft.View:
 
     body = ft.Column(
         controls=[
-            ft.Container(content=_build_progress_section(), padding=ft.padding.symmetric(vertical=20)),
+            ft.Container(content=_build_progress_section(roadmap), padding=ft.padding.symmetric(vertical=20)),
             intro,
             *tiles
         ],
@@ -3,7 +3,8 @@ import flet as ft
 from typing import List, Dict, Tuple
 
 from py_app.core.models import Roadmap
-from py_app.core.progress import load_progress, category_progress_from_nodes
+from py_app.core.progress import load_progress, track_progress
+from py_app.core.analytics import weekly_xp
 from py_app.ui.appbar import build_appbar
 
 COLORS = getattr(ft, "colors", getattr(ft, "Colors", None))  # kompat vrstva
@@ -26,9 +27,9 @@ def _pretty_track_label(bid: str, roadmap: Roadmap) -> Tuple[str, str] | None:
     if not bid.startswith("track_") or not bid.endswith("_complete"):
         return None
     tid = bid[len("track_"):-len("_complete")]
-    for t in roadmap.tracks:
-        if t.id == tid:
-            return ("🏁", f"Dokončeno: {t.name}")
+    t = roadmap.index.track_by_id.get(tid)
+    if t is not None:
+        return ("🏁", f"Dokončeno: {t.name}")
     # fallback – kdyby track chyběl
     return ("🏁", f"Dokončeno: {tid}")
 
@@ -84,6 +85,22 @@ def _badges_grid(roadmap: Roadmap) -> ft.Control:
         columns=12, spacing=10, run_spacing=10
     )
 
+def _weekly_xp_chart(weeks: int = 8) -> ft.Control:
+    # čte jen předpočítané týdenní rollupy → graf je hned
+    data = weekly_xp(weeks)
+    top = max((xp for _, xp in data), default=0) or 1
+    rows: List[ft.Control] = []
+    for week, xp in data:
+        rows.append(ft.Row(
+            [
+                ft.Text(week, width=90, color=COLORS.GREY_500),
+                _progress_bar(int(round(100 * xp / top)), width=220, height=8),
+                ft.Text(f"{xp} XP", width=80, text_align=ft.TextAlign.RIGHT),
+            ],
+            spacing=10
+        ))
+    return ft.Column(rows, spacing=6)
+
 def create_profile_view(page: ft.Page, roadmap: Roadmap) -> ft.View:
     p = load_progress()
 
@@ -126,8 +143,7 @@ def create_profile_view(page: ft.Page, roadmap: Roadmap) -> ft.View:
     # Per-kategorie progress
     per_category_rows: List[ft.Control] = []
     for tr in roadmap.tracks:
-        nodes = [n for n in roadmap.nodes if n.track == tr.id]
-        prog = category_progress_from_nodes([n.model_dump() for n in nodes])  # pydantic -> dict
+        prog = track_progress(tr.id)  # O(1) z materializovaných čítačů
         row = ft.Row(
             [
                 ft.Text(tr.name, width=220),
@@ -150,6 +166,9 @@ def create_profile_view(page: ft.Page, roadmap: Roadmap) -> ft.View:
             ft.Divider(opacity=0.1),
             ft.Text("Postup podle kategorií", size=16, weight=ft.FontWeight.BOLD),
             ft.Column(per_category_rows, spacing=8),
+            ft.Divider(opacity=0.1),
+            ft.Text("XP po týdnech", size=16, weight=ft.FontWeight.BOLD),
+            _weekly_xp_chart(),
         ],
         spacing=16
     )
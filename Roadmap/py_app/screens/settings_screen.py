@@ -1,7 +1,7 @@
 from __future__ import annotations
 import flet as ft
 
-from py_app.core.progress import get_daily_goal, set_daily_goal
+from py_app.core.progress import get_daily_goal, aset_daily_goal
 from py_app.ui.appbar import build_appbar
 COLORS = getattr(ft, "colors", getattr(ft, "Colors", None))
 
@@ -10,21 +10,21 @@ def create_settings_view(page: ft.Page) -> ft.View:
     slider = ft.Slider(min=0, max=200, divisions=20, value=goal_val, label="{value} XP")
     input_field = ft.TextField(label="Denní cíl (XP)", value=str(goal_val), width=160)
 
-    def on_slider_change(e):
+    async def on_slider_change(e):
         v = int(slider.value)
         input_field.value = str(v)
-        set_daily_goal(v)
+        await aset_daily_goal(v)
         page.snack_bar = ft.SnackBar(ft.Text(f"Denní cíl nastaven na {v} XP"), open=True)
         page.update()
 
-    def on_input_submit(e):
+    async def on_input_submit(e):
         try:
             v = int(input_field.value)
         except Exception:
             v = goal_val
         v = max(0, min(5000, v))
         slider.value = min(v, 200)
-        set_daily_goal(v)
+        await aset_daily_goal(v)
         page.snack_bar = ft.SnackBar(ft.Text(f"Denní cíl nastaven na {v} XP"), open=True)
         page.update()
 
@@ -0,0 +1,132 @@
+"""
+Škálovací benchmarky nad syntetickými roadmapami (core/synthetic.py).
+
+Spouští se jen na požádání, běžný `pytest` je přeskočí:
+
+    ROADMAP_BENCH=1 python -m pytest -q tests/benchmarks
+    ROADMAP_BENCH=1 ROADMAP_BENCH_RECORD=1 python -m pytest -q tests/benchmarks   # nové baseline
+
+ROADMAP_BENCH_SIZES    velikosti (default "1000,10000,100000")
+ROADMAP_BENCH_THRESHOLD povolené zhoršení proti baseline (default 0.5 = +50 %)
+
+Baseline (baselines.json) jsou časy z referenčního stroje; na jiném HW je
+nejdřív přenahrajte s ROADMAP_BENCH_RECORD=1.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict
+import json
+import os
+import time
+
+import pytest
+
+from py_app.core import progress
+from py_app.core.layout_algo import clear_layout_cache, layered_layout, roadmap_edge_xy, serpentine_positions
+from py_app.core.synthetic import write_roadmap
+from py_app.core.utils import clear_roadmap_cache, load_roadmap
+
+pytestmark = pytest.mark.skipif(os.environ.get("ROADMAP_BENCH") != "1",
+                                reason="benchmarky běží jen s ROADMAP_BENCH=1")
+
+SIZES = [int(x) for x in os.environ.get("ROADMAP_BENCH_SIZES", "1000,10000,100000").split(",") if x.strip()]
+RECORD = os.environ.get("ROADMAP_BENCH_RECORD") == "1"
+THRESHOLD = float(os.environ.get("ROADMAP_BENCH_THRESHOLD", "0.5"))
+ABS_SLACK = 0.005        # pod 5 ms rozhoduje šum, ne kód
+BASELINES = Path(__file__).with_name("baselines.json")
+
+_RESULTS: Dict[str, float] = {}
+
+
+def _baselines() -> Dict[str, float]:
+    if BASELINES.exists():
+        return json.loads(BASELINES.read_text(encoding="utf-8"))
+    return {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _record_baselines():
+    yield
+    if RECORD and _RESULTS:
+        data = _baselines()
+        data.update({k: round(v, 6) for k, v in _RESULTS.items()})
+        BASELINES.write_text(json.dumps(dict(sorted(data.items())), indent=2) + "\n", encoding="utf-8")
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda n: f"{n}")
+def synthetic(request, tmp_path_factory):
+    n = request.param
+    path = write_roadmap(tmp_path_factory.mktemp(f"synthetic-{n}") / "roadmap.json", n, seed=n)
+    clear_roadmap_cache()
+    return n, path, load_roadmap(path, use_compiled=False)
+
+
+def _measure(name: str, n: int, fn) -> float:
+    """Nejlepší z několika běhů (menší šum než průměr) + kontrola proti baseline."""
+    repeat = 3 if n <= 10_000 else 1
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+
+    key = f"{name}@{n}"
+    if RECORD:
+        _RESULTS[key] = best
+        return best
+    base = _baselines().get(key)
+    if base is not None:
+        limit = base * (1 + THRESHOLD) + ABS_SLACK
+        assert best <= limit, f"{key}: {best:.4f}s > {limit:.4f}s (baseline {base:.4f}s)"
+    return best
+
+
+def test_load_roadmap(synthetic):
+    n, path, _ = synthetic
+
+    def run():
+        clear_roadmap_cache()
+        load_roadmap(path, use_compiled=False)
+
+    _measure("load_roadmap", n, run)
+
+
+def test_validate_refs(synthetic):
+    n, _, rm = synthetic
+    _measure("validate_refs", n, rm._validate_refs)
+
+
+def test_recompute_badges(synthetic, progress_file):
+    n, _, rm = synthetic
+    progress.bind_roadmap(rm)
+    for node in rm.nodes[: max(1, n // 100)]:
+        progress.mark_completed(node.id, xp_award=1)
+    _measure("recompute_badges", n, lambda: progress.recompute_badges(rm))
+
+
+def test_make_category_figure(synthetic):
+    from py_app.ui.layout import make_category_figure
+
+    n, _, rm = synthetic
+    idx = rm.index
+    track = max(rm.tracks, key=lambda t: len(idx.track_nodes(t.id)))
+    lessons = idx.track_nodes(track.id)
+    _measure("make_category_figure", n, lambda: make_category_figure(track, lessons, track.color))
+
+
+def test_serpentine_positions(synthetic):
+    n, _, rm = synthetic
+    _measure("serpentine_positions", n, lambda: (clear_layout_cache(), serpentine_positions(rm)))
+
+
+def test_route_all_edges(synthetic):
+    n, _, rm = synthetic
+    roadmap_edge_xy(rm)          # rozložení je cachované, měříme jen hrany
+    _measure("roadmap_edge_xy", n, lambda: roadmap_edge_xy(rm))
+
+
+def test_layered_layout(synthetic):
+    n, _, rm = synthetic
+    if n > 10_000:
+        pytest.skip("vrstvené rozložení je určené pro tisíce uzlů")
+    _measure("layered_layout", n, lambda: (clear_layout_cache(), layered_layout(rm)))
@@ -0,0 +1,32 @@
+from __future__ import annotations
+import pytest
+
+from py_app.core import progress
+from py_app.core.models import Roadmap
+
+
+@pytest.fixture
+def progress_file(tmp_path, monkeypatch):
+    """Přesměruje progress.json do dočasné složky a zruší navázanou roadmapu."""
+    path = tmp_path / "progress.json"
+    monkeypatch.setattr(progress, "_PROGRESS_PATH", path)
+    monkeypatch.setattr(progress, "_BACKUP_DIR", tmp_path / "progress_backups")
+    monkeypatch.setattr(progress, "_NODE_META", {})
+    monkeypatch.setattr(progress, "_TRACK_TOTALS", {})
+    monkeypatch.setattr(progress, "_ROADMAP_SIG", None)
+    monkeypatch.setattr(progress, "_PREREQS", {})
+    monkeypatch.setattr(progress, "_UNLOCKS", {})
+    monkeypatch.setattr(progress, "_UNLOCK_ENGINES", {})
+    return path
+
+
+@pytest.fixture
+def small_roadmap() -> Roadmap:
+    return Roadmap(
+        tracks=[{"id": "math", "name": "Matika"}, {"id": "prog", "name": "Programování"}],
+        nodes=[
+            {"id": "a", "label": "A", "track": "math", "tasks_all": ["t1", "t2"]},
+            {"id": "b", "label": "B", "track": "math", "prereqs": ["a"]},
+            {"id": "c", "label": "C", "track": "prog", "tasks_all": ["t1"], "prereqs": ["a"]},
+        ],
+    )
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from py_app.core import analytics, progress
+
+
+def test_rollups_update_incrementally(progress_file, small_roadmap, monkeypatch):
+    monkeypatch.setattr(progress, "_OP_LISTENERS", [])
+    analytics.enable()
+    progress.bind_roadmap(small_roadmap)
+
+    progress.set_task_done("a", 0, True)
+    progress.mark_completed("b", xp_award=10)
+    store = analytics.analytics_for()
+    assert store.refresh() == 3          # task, node, xp
+
+    progress.set_task_done("c", 0, True)
+    progress.add_xp(5)
+    assert store.refresh() == 2
+    assert store.refresh() == 0
+
+    week = analytics.weekly_xp(weeks=2)
+    assert week[-1][1] == 15 and week[0][1] == 0
+    assert list(store.rollup("month", "t:math").values())[0] == {"xp": 10, "tasks": 1, "nodes": 1}
+    assert list(store.rollup("day", "n:c").values())[0]["tasks"] == 1
+
+    cols = store.events()
+    assert len(cols["day"]) == 5 and cols["amount"].dtype == np.int32
+    frame = store.to_frame()
+    assert frame.groupby("type", observed=True)["amount"].sum()["xp"] == 15
+
+
+def test_refresh_truncates_spool_and_rollup_only_reads(progress_file, small_roadmap, monkeypatch):
+    monkeypatch.setattr(progress, "_OP_LISTENERS", [])
+    analytics.enable()
+    progress.bind_roadmap(small_roadmap)
+
+    progress.add_xp(7)
+    store = analytics.analytics_for()
+    files = {p: p.stat().st_mtime_ns for p in store.root.iterdir()}
+    # nezpracovaný spool se do grafu započte, ale čtení nic nezapíše
+    assert list(store.rollup("day").values())[0]["xp"] == 7
+    assert {p: p.stat().st_mtime_ns for p in store.root.iterdir()} == files
+
+    assert store.refresh() == 1
+    assert store.spool.read_bytes() == b""
+    assert list(store.rollup("day").values())[0]["xp"] == 7
+    progress.add_xp(3)
+    assert store.refresh() == 1 and len(store.events()["day"]) == 2
+
+
+def test_ops_are_emitted_only_after_a_successful_write(progress_file, small_roadmap, monkeypatch):
+    seen = []
+    monkeypatch.setattr(progress, "_OP_LISTENERS", [lambda user, op: seen.append(op["type"])])
+    progress.bind_roadmap(small_roadmap)
+    progress.add_xp(5)
+    progress.set_task_done("a", 0, True)
+    assert seen == ["xp", "task"]
+
+    # převod na synchronizační log (bootstrap) odběratelům nic neposílá
+    p = progress.load_progress()
+    progress._sync_state(p)
+    progress._write_progress_file(p)
+    assert seen == ["xp", "task"]
+    assert "__pending_ops__" not in progress.load_progress()
+
+    def broken(*a, **kw):
+        raise OSError("disk full")
+    monkeypatch.setattr(progress._store(), "write", broken)
+    progress.add_xp(1)
+    assert seen == ["xp", "task"]
+
+
+def _store_with_ops(monkeypatch, n):
+    monkeypatch.setattr(progress, "_OP_LISTENERS", [])
+    analytics.enable()
+    for _ in range(n):
+        progress.add_xp(1)
+    return analytics.analytics_for()
+
+
+def test_crash_before_spool_truncation_does_not_double_count(progress_file, monkeypatch):
+    store = _store_with_ops(monkeypatch, 3)
+
+    truncate = store._truncate_spool
+
+    def crash(meta):
+        raise OSError("pád")
+    monkeypatch.setattr(store, "_truncate_spool", crash)
+    with pytest.raises(OSError):
+        store.refresh()
+    monkeypatch.setattr(store, "_truncate_spool", truncate)
+    # potvrzený offset přeskočí už zpracované řádky
+    assert store.refresh() == 0
+    assert len(store.events()["day"]) == 3
+    assert sum(v["xp"] for v in store.rollup("day").values()) == 3
+
+
+def test_crash_after_spool_swap_reads_new_spool_from_start(progress_file, monkeypatch):
+    store = _store_with_ops(monkeypatch, 2)
+    commit = store._commit
+    calls = []
+
+    def crash_second(meta):
+        calls.append(1)
+        if len(calls) == 2:          # potvrzení zkráceného spoolu
+            raise OSError("pád")
+        commit(meta)
+    monkeypatch.setattr(store, "_commit", crash_second)
+    with pytest.raises(OSError):
+        store.refresh()
+    monkeypatch.setattr(store, "_commit", commit)
+
+    progress.add_xp(5)
+    assert store.refresh() == 1
+    assert sum(v["xp"] for v in store.rollup("day").values()) == 7
+
+
+def test_compaction_keeps_history_when_interrupted(progress_file, monkeypatch):
+    monkeypatch.setattr(analytics, "_MAX_CHUNKS", 2)
+    store = _store_with_ops(monkeypatch, 0)
+    for _ in range(2):
+        progress.add_xp(1)
+        store.refresh()
+    commit = store._commit
+
+    def crash_on_compact(meta):
+        if len(meta["chunks"]) == 1:
+            raise OSError("pád")
+        commit(meta)
+    monkeypatch.setattr(store, "_commit", crash_on_compact)
+    progress.add_xp(1)
+    with pytest.raises(OSError):
+        store.refresh()
+    assert len(store.events()["day"]) == 3
+
+    monkeypatch.setattr(store, "_commit", commit)
+    progress.add_xp(1)
+    assert store.refresh() == 1
+    assert len(store.events()["day"]) == 4
+    assert len(list(store.root.glob("events-*.npz"))) == 1
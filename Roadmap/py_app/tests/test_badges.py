@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from py_app.core import progress
+from py_app.core.badges import BadgeEngine, BadgeRule
+from py_app.core.events import ProgressEvent, XP_GAINED, NODE_COMPLETED
+
+
+def test_engine_checks_only_subscribed_rules():
+    calls = []
+
+    def when(p, ev):
+        calls.append(ev.type)
+        return True
+
+    eng = BadgeEngine([BadgeRule("lucky", (XP_GAINED,), when)])
+    p = {"badges": []}
+    assert eng.dispatch(p, [ProgressEvent(NODE_COMPLETED, node_id="a")]) == []
+    assert eng.dispatch(p, [ProgressEvent(XP_GAINED, amount=5)]) == ["lucky"]
+    assert eng.dispatch(p, [ProgressEvent(XP_GAINED, amount=5)]) == []   # už vlastní
+    assert calls == [XP_GAINED]
+    assert p["badges_unseen"] == ["lucky"]
+
+
+def test_badges_awarded_inside_mutations(progress_file, small_roadmap):
+    progress.bind_roadmap(small_roadmap)
+    progress.add_xp(95)
+    progress.set_task_done("a", 0, True)
+    progress.set_task_done("a", 1, True)
+    progress.evaluate_node_completion(small_roadmap.nodes[0].model_dump(), xp_award=10)
+    assert "xp_100" in progress.load_progress()["badges"]
+
+    progress.mark_completed("b")
+    assert "track_math_complete" in progress.load_progress()["badges"]
+    assert "track_prog_complete" not in progress.load_progress()["badges"]
+
+    possible, newly = progress.recompute_badges(small_roadmap)
+    assert "track_prog_complete" in possible
+    assert sorted(newly) == ["track_math_complete", "xp_100"]
+    assert progress.recompute_badges(small_roadmap)[1] == []
@@ -1,8 +1,11 @@
-from core.utils import load_roadmap
+from py_app.core.utils import load_roadmap, default_roadmap_path
 
 def test_load_roadmap_ok():
-    rm = load_roadmap("data/roadmap.json")
-    assert len(rm.nodes) == 2
-    assert len(rm.edges) == 1
-    assert rm.nodes[0].id == "python_basics"
-
+    # bez artefaktu – test nesmí zapisovat do zdrojového stromu (data/*.compiled)
+    rm = load_roadmap(default_roadmap_path(), use_compiled=False, cache=False)
+    assert len(rm.nodes) >= 2
+    assert len({n.id for n in rm.nodes}) == len(rm.nodes)
+    assert rm.nodes[0].id == "math-linear-algebra"
+    # všechny prereqy jsou v pořadí před uzlem
+    pos = rm.topo_pos
+    assert all(pos[p] < pos[n.id] for n in rm.nodes for p in n.prereqs)
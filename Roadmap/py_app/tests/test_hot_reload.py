@@ -0,0 +1,93 @@
+from __future__ import annotations
+import json
+import os
+
+from py_app.core import progress
+from py_app.core.hot_reload import RoadmapWatcher, add_reload_listener, remove_reload_listener
+from py_app.core.utils import clear_roadmap_cache, load_roadmap
+
+
+def _write(path, nodes, bump=0):
+    path.write_text(json.dumps({
+        "schema_version": 2,
+        "tracks": [{"id": "t", "name": "T"}, {"id": "u", "name": "U"}],
+        "nodes": nodes,
+    }), encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump))
+
+
+def test_content_edit_is_applied_in_place(tmp_path, progress_file):
+    path = tmp_path / "roadmap.json"
+    nodes = [
+        {"id": "a", "label": "A", "track": "t", "tasks_all": ["x"]},
+        {"id": "b", "label": "B", "track": "t", "prereqs": ["a"]},
+        {"id": "c", "label": "C", "track": "u"},
+    ]
+    _write(path, nodes)
+    clear_roadmap_cache()
+    live = load_roadmap(path, use_compiled=False)
+    index = live.index
+    progress.bind_roadmap(live)
+    progress.mark_completed("c")
+    assert not progress._unlock_engine(progress.load_progress()).is_available("b")
+
+    seen = []
+    listener = lambda rm, diff: seen.append(diff)
+    add_reload_listener(listener)
+    add_reload_listener(progress.apply_roadmap_diff)
+    try:
+        watcher = RoadmapWatcher(path, live)
+        nodes[1] = {"id": "b", "label": "B2", "track": "t", "prereqs": ["c"]}
+        _write(path, nodes, bump=10_000_000)
+        diff = watcher.poll()
+    finally:
+        remove_reload_listener(listener)
+        remove_reload_listener(progress.apply_roadmap_diff)
+
+    assert diff.changed == ("b",) and diff.prereqs_changed == ("b",) and not diff.structure
+    assert seen == [diff]
+    # živý objekt i jeho index zůstaly, jen se přepsaly dotčené záznamy
+    assert live.index is index and index.label("b") == "B2"
+    assert index.succ["c"] == ("b",) and index.succ["a"] == ()
+    assert load_roadmap(path) is live
+    # b už závisí jen na hotovém c → odemčený
+    assert progress._unlock_engine(progress.load_progress()).is_available("b")
+
+    # nic nového → žádný diff
+    assert watcher.poll() is None
+
+
+def test_added_node_triggers_rebuild(tmp_path):
+    path = tmp_path / "roadmap.json"
+    nodes = [{"id": "a", "label": "A", "track": "t"}]
+    _write(path, nodes)
+    clear_roadmap_cache()
+    live = load_roadmap(path, use_compiled=False)
+    watcher = RoadmapWatcher(path, live)
+
+    _write(path, nodes + [{"id": "b", "label": "B", "track": "u", "prereqs": ["a"]}], bump=10_000_000)
+    diff = watcher.poll()
+    assert diff.added == ("b",) and diff.structure
+    assert [n.id for n in live.index.track_nodes("u")] == ["b"]
+    assert live.topo_order == ["a", "b"]
+
+
+def test_reloaded_model_is_not_shared_by_content(tmp_path):
+    path, copy = tmp_path / "a.json", tmp_path / "copy.json"
+    nodes = [{"id": "a", "label": "A", "track": "t"}]
+    _write(path, nodes)
+    copy.write_bytes(path.read_bytes())
+    clear_roadmap_cache()
+    live = load_roadmap(path, use_compiled=False)
+
+    queued = []
+    watcher = RoadmapWatcher(path, live, dispatch=queued.append)
+    _write(path, [{"id": "a", "label": "A2", "track": "t"}], bump=10_000_000)
+    assert watcher.poll() is None and live.index.label("a") == "A"   # čeká na dispatch
+    queued.pop()()
+    assert live.index.label("a") == "A2"
+
+    other = load_roadmap(copy, use_compiled=False)
+    assert other is not live and other.index.label("a") == "A"
+    assert load_roadmap(path) is live
@@ -0,0 +1,119 @@
+from __future__ import annotations
+import math
+
+import numpy as np
+
+from py_app.core import layout_algo
+from py_app.core.synthetic import generate_roadmap
+from py_app.core.models import Roadmap
+
+
+def _bezier_point(a, b, t, k=0.18):
+    (ax, ay), (bx, by) = a, b
+    cx, cy = (ax + bx) / 2 - k * (by - ay), (ay + by) / 2 + k * (bx - ax)
+    return ((1 - t) ** 2 * ax + 2 * (1 - t) * t * cx + t ** 2 * bx,
+            (1 - t) ** 2 * ay + 2 * (1 - t) * t * cy + t ** 2 * by)
+
+
+def test_vectorized_edges_match_scalar_formula():
+    a = np.array([[0.0, 0.0], [1.0, 2.0], [-3.0, 0.5]])
+    b = np.array([[2.0, 1.0], [1.0, -2.0], [4.0, 4.0]])
+    xs, ys = layout_algo.bezier_edges(a, b, n=5)
+    assert xs.shape == ys.shape == (3, 5)
+    for e in range(3):
+        for j, t in enumerate(np.linspace(0, 1, 5)):
+            x, y = _bezier_point(a[e], b[e], t)
+            assert math.isclose(xs[e, j], x) and math.isclose(ys[e, j], y)
+
+    fx, fy = layout_algo.flatten_with_gaps(xs, ys)
+    assert fx.shape == (18,) and np.isnan(fx[5::6]).all() and np.isnan(fy[5::6]).all()
+
+
+def test_serpentine_layout_is_cached_per_content(small_roadmap):
+    layout_algo.clear_layout_cache()
+    pos = layout_algo.serpentine_positions(small_roadmap, per_col=2)
+    assert pos == {"a": (0.0, 0.0), "b": (0.0, 1.8), "c": (2.2, 0.0)}
+    assert layout_algo.serpentine_layout(small_roadmap, per_col=2) is layout_algo.serpentine_layout(small_roadmap, per_col=2)
+
+
+def test_route_and_all_edges():
+    rm = Roadmap.model_validate(generate_roadmap(60, seed=2))
+    path = max((lp.node_sequence for lp in rm.learning_paths), key=len)
+    assert len(path) > 1
+    xs, ys = layout_algo.build_route_xy(rm, path)
+    assert len(xs) == len(ys) == (len(path) - 1) * 23 + 1
+
+    n_edges = sum(len(n.prereqs) for n in rm.nodes)
+    ex, ey = layout_algo.roadmap_edge_xy(rm)
+    assert ex.shape == (n_edges * 25,)
+    assert layout_algo.build_route_xy(rm, []) == ([], [])
+
+
+def test_layered_layout_respects_prereqs_and_levels():
+    rm = Roadmap(
+        tracks=[{"id": "t", "name": "T"}],
+        nodes=[
+            {"id": "a1", "label": "A1", "track": "t"},
+            {"id": "a2", "label": "A2", "track": "t"},
+            {"id": "b1", "label": "B1", "track": "t", "prereqs": ["a2"]},
+            {"id": "b2", "label": "B2", "track": "t", "prereqs": ["a1"]},
+            {"id": "late", "label": "L", "track": "t", "level": 4, "prereqs": ["a1"]},
+        ],
+    )
+    layout_algo.clear_layout_cache()
+    lay = layout_algo.layered_layout(rm)
+    layer = dict(zip(lay.ids, lay.layer.tolist()))
+    assert layer == {"a1": 0, "a2": 0, "b1": 1, "b2": 1, "late": 3}
+    assert layout_algo.layered_layout(rm, by="longest_path").layer.tolist() == [0, 0, 1, 1, 1]
+
+    pos = lay.as_dict()
+    # zkřížené hrany a2→b1, a1→b2 se rozpletou
+    assert (pos["a1"][0] < pos["a2"][0]) == (pos["b2"][0] < pos["b1"][0])
+    assert abs(pos["a1"][0] - pos["a2"][0]) >= 2.2 - 1e-9
+    assert pos["late"][1] == -3 * 1.8
+    assert layout_algo.layered_layout(rm) is lay
+
+
+def test_inversion_count_matches_brute_force():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        v = rng.integers(0, 6, rng.integers(0, 30))
+        brute = sum(1 for i in range(len(v)) for j in range(i + 1, len(v)) if v[i] > v[j])
+        assert layout_algo._inversions(v) == brute
+
+
+def test_adaptive_edges_stay_within_tolerance():
+    a = np.array([[0.0, 0.0], [0.0, 0.0], [5.0, 5.0]])
+    b = np.array([[0.05, 0.0], [10.0, 0.0], [5.0, 5.0]])
+    tol = 0.01
+    xs, ys = layout_algo._sample_adaptive(a, b, 0.18, tol, 200)
+    chunks = np.split(np.column_stack((xs, ys)), np.flatnonzero(np.isnan(xs)) + 1)
+    pts = [c[~np.isnan(c[:, 0])] for c in chunks if len(c) > 1]
+    assert [len(p) for p in pts] == [2, 11, 2]        # krátká hrana 1 úsek, dlouhý oblouk 10
+    # polyline se od přesné křivky neodchýlí víc než o toleranci
+    dense_x, dense_y = layout_algo.bezier_edges(a[1:2], b[1:2], n=2001)
+    curve = np.column_stack((dense_x[0], dense_y[0]))
+    poly = pts[1]
+    seg_t = np.linspace(0, 1, 2001) * (len(poly) - 1)
+    i = np.minimum(seg_t.astype(int), len(poly) - 2)
+    f = (seg_t - i)[:, None]
+    approx = poly[i] * (1 - f) + poly[i + 1] * f
+    assert np.abs(approx - curve).max() <= tol + 1e-9
+
+
+def test_zoom_drives_level_of_detail():
+    base = layout_algo.Viewport(-5, 5, -20, 2)
+    assert layout_algo.viewport_from_relayout({"xaxis.autorange": True}, base) == base
+    zoomed = layout_algo.viewport_from_relayout({"xaxis.range[0]": -1, "xaxis.range[1]": 1,
+                                                 "yaxis.range[0]": -1, "yaxis.range[1]": 0.4}, base)
+    assert layout_algo.lod_tier(base).name == "normal"
+    assert layout_algo.lod_tier(zoomed).name == "detail"
+    far = layout_algo.Viewport(-200, 200, -400, 10)
+    assert layout_algo.lod_tier(far).name == "overview"
+
+    r = 0.54
+    coarse = layout_algo.circle_steps(r, far.tolerance(1.5))
+    fine = layout_algo.circle_steps(r, zoomed.tolerance(0.35))
+    assert coarse < fine <= 120
+    xs, _ = layout_algo.ring_xy([(0, 0), (3, 3)], r, fine)
+    assert len(xs) == 2 * (fine + 2)
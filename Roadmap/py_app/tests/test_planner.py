@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from py_app.core.models import Roadmap
+from py_app.core.planner import StudyPlanner, parse_estimate
+
+
+def _roadmap() -> Roadmap:
+    return Roadmap(
+        tracks=[{"id": "t", "name": "T"}, {"id": "u", "name": "U"}],
+        nodes=[
+            {"id": "a", "label": "A", "track": "t", "estimate": "10h"},
+            {"id": "b", "label": "B", "track": "t", "estimate": "30h", "prereqs": ["a"]},
+            {"id": "c", "label": "C", "track": "u", "estimate": "5h", "prereqs": ["a"]},
+            {"id": "d", "label": "D", "track": "u", "estimate": "1d", "prereqs": ["b", "c"]},
+        ],
+    )
+
+
+def test_parse_estimate():
+    assert parse_estimate("40h") == 40.0
+    assert parse_estimate("1,5 h") == 1.5
+    assert parse_estimate("10-20h") == 15.0
+    assert parse_estimate("2d") == 16.0
+    assert parse_estimate(None, default=3) == 3
+    assert parse_estimate("hodně", default=3) == 3
+
+
+def test_critical_path_and_incremental_update():
+    pl = StudyPlanner(_roadmap())
+    assert pl.critical_path("d") == (48.0, ["a", "b", "d"])
+    assert pl.track_critical_path("t") == (40.0, ["a", "b"])
+
+    pl.update({"a", "b"})
+    assert pl.critical_path("d") == (13.0, ["c", "d"])
+    # návrat k menší množině hotových → plný přepočet
+    pl.update(())
+    assert pl.earliest_finish("d") == 48.0
+
+
+def test_weekly_schedule_respects_budget_and_prereqs():
+    pl = StudyPlanner(_roadmap()).update({"a"})
+    weeks = pl.weekly_schedule(20, target="d")
+    assert [w["hours"] for w in weeks] == [20.0, 20.0, 3.0]
+    flat = [nid for w in weeks for nid, _ in w["items"]]
+    # kritická větev (b) před c, d až nakonec
+    assert flat == ["b", "b", "c", "d", "d"]
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import asyncio
+import json
+
+from py_app.core import progress
+
+
+def test_track_aggregates_follow_mutations(progress_file, small_roadmap):
+    progress.bind_roadmap(small_roadmap)
+
+    progress.set_task_done("a", 0, True)
+    progress.set_task_done("a", 0, True)   # idempotentní
+    assert progress.track_progress("math") == {"total": 3, "done": 1, "pct": 33}
+
+    progress.set_task_done("a", 1, True)
+    node_a = small_roadmap.nodes[0].model_dump()
+    just, _, _ = progress.evaluate_node_completion(node_a, xp_award=10)
+    assert just
+    progress.mark_completed("b", xp_award=10)
+    assert progress.track_progress("math") == {"total": 3, "done": 3, "pct": 100}
+
+    progress.set_task_done("a", 1, False)
+    assert progress.track_progress("math")["done"] == 2
+
+    # materializované čítače = plný přepočet
+    doc = progress.load_progress()
+    stored = dict(doc["aggregates"])
+    progress._rebuild_aggregates(doc)
+    assert doc["aggregates"] == stored
+
+
+def test_today_xp_survives_recent_truncation(progress_file):
+    for _ in range(60):
+        progress.add_xp(5)
+    p = progress.load_progress()
+    assert len(p["recent"]) == 50
+    assert progress.today_xp() == 300
+    assert progress.get_current_streak() == 1
+
+
+def test_legacy_file_gets_aggregates(progress_file, small_roadmap):
+    progress_file.write_text(json.dumps({
+        "xp": 10, "completed_nodes": ["b"],
+        "tasks": {"a": {"tasks_done": [0], "completed": False}},
+    }), encoding="utf-8")
+    progress.bind_roadmap(small_roadmap)
+    assert progress.track_progress("math") == {"total": 3, "done": 2, "pct": 67}
+    assert progress.get_today_progress() == 0.2
+
+
+def test_legacy_file_backfills_daily_log_from_recent(progress_file):
+    today = progress._today_str()
+    progress_file.write_text(json.dumps({
+        "xp": 25, "last_day": today, "streak_days": 4,
+        "recent": [
+            {"date": "2020-01-01", "type": "xp", "amount": 5},
+            {"date": today, "type": "xp", "amount": 15},
+            {"date": today, "type": "node", "amount": 1, "id": "a"},
+            {"date": today, "type": "xp", "amount": 5},
+        ],
+    }), encoding="utf-8")
+    assert progress.today_xp() == 20
+    assert progress.load_progress()["daily_log"] == {"2020-01-01": 5, today: 20}
+    assert progress.get_current_streak() == 4
+
+
+def test_snapshot_matches_per_node_helpers(progress_file, small_roadmap, monkeypatch):
+    progress.bind_roadmap(small_roadmap)
+    progress.set_task_done("a", 1, True)
+    progress.mark_completed("b")
+    nodes = [n.model_dump() for n in small_roadmap.nodes]
+
+    reads = []
+    real_read = progress._read_progress_file
+    monkeypatch.setattr(progress, "_read_progress_file", lambda: reads.append(1) or real_read())
+    snap = progress.progress_snapshot()
+    ratios = [progress.node_progress_ratio(n, snap) for n in nodes]
+    agg = progress.category_progress_from_nodes(nodes, snap)
+    assert len(reads) == 1
+
+    assert ratios == [0.5, 1.0, 0.0]
+    assert dict(snap.ratios) == {"a": 0.5, "b": 1.0, "c": 0.0}
+    assert snap.tasks_done("a") == [1] == progress.get_tasks_done("a")
+    assert agg == progress.category_progress_from_nodes(nodes)
+
+
+def test_async_writers_are_serialized(progress_file, small_roadmap):
+    progress.bind_roadmap(small_roadmap)
+
+    async def run():
+        await asyncio.gather(*(progress.aset_task_done("a", i, True) for i in range(8)))
+        return await progress.aload_progress()
+
+    p = asyncio.run(run())
+    assert p["tasks"]["a"]["tasks_done"] == list(range(8))
+    assert p["aggregates"]["tasks_done"] == 8
+
+
+def test_async_toggle_and_evaluate_is_one_write(progress_file, small_roadmap):
+    progress.bind_roadmap(small_roadmap)
+    node_a = small_roadmap.nodes[0].model_dump()
+
+    async def run():
+        return await asyncio.gather(*(progress.aset_task_and_evaluate(node_a, i, True) for i in range(2)))
+
+    results = asyncio.run(run())
+    # uzel dokončí právě ten zápis, který zaškrtl poslední task
+    assert [r[0] for r in results] == [False, True]
+    assert sorted(results[1][1]) == ["b", "c"]
+
+
+def test_completion_reports_newly_unlocked(progress_file, small_roadmap):
+    progress.bind_roadmap(small_roadmap)
+    node_a = small_roadmap.nodes[0].model_dump()
+    progress.set_task_done("a", 0, True)
+    progress.set_task_done("a", 1, True)
+
+    just, unlocked, _ = progress.evaluate_node_completion(node_a)
+    assert just and sorted(unlocked) == ["b", "c"]
+    # podruhé už nic nového
+    assert progress.evaluate_node_completion(node_a)[1] == []
+
+
+def test_progress_state_reads_snapshot_and_engine_together(progress_file, small_roadmap):
+    progress.bind_roadmap(small_roadmap)
+    progress.mark_completed("a")
+    snap, engine = asyncio.run(progress.aprogress_state())
+    assert snap.completed == {"a"}
+    assert engine is progress.unlock_engine() and engine.status("b") == "available"
+
+
+def test_failed_write_does_not_advance_unlock_engine(progress_file, small_roadmap, monkeypatch):
+    progress.bind_roadmap(small_roadmap)
+    node_a = small_roadmap.nodes[0].model_dump()
+    progress.set_task_done("a", 0, True)
+    progress.set_task_done("a", 1, True)
+    engine = progress.unlock_engine()
+
+    write = progress._store().write
+    def broken(*a, **kw):
+        raise OSError("disk full")
+    monkeypatch.setattr(progress._store(), "write", broken)
+    assert progress.evaluate_node_completion(node_a) == (False, [], False)
+    assert engine.status("a") == "available" and engine.status("b") == "locked"
+
+    monkeypatch.setattr(progress._store(), "write", write)
+    just, unlocked, _ = progress.evaluate_node_completion(node_a)
+    assert just and sorted(unlocked) == ["b", "c"]
+    # obrazovky čtou tytéž čítače
+    assert progress.unlock_engine() is engine and engine.status("b") == "available"
+
+
+def test_unlock_engine_sync_and_reset(small_roadmap):
+    from py_app.core.unlock import UnlockEngine
+
+    eng = UnlockEngine.for_roadmap(small_roadmap)
+    assert eng.available() == ["a"] and eng.status("b") == "locked"
+    assert sorted(eng.sync({"a"})) == ["b", "c"]
+    assert eng.sync({"a", "b"}) == []
+    # hotový uzel zmizel (reset progressu) → plný přepočet
+    assert eng.sync(set()) is None and eng.status("b") == "locked"
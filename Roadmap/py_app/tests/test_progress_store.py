@@ -0,0 +1,74 @@
+from __future__ import annotations
+import multiprocessing as mp
+
+import pytest
+
+from py_app.core import progress, progress_store
+from py_app.core.progress_store import ProgressStore, DEFAULT_USER
+
+
+def _bump_xp(root: str, user: str, n: int) -> None:
+    progress.configure_store(root)
+    with progress.use_user(user):
+        for _ in range(n):
+            progress.add_xp(1)
+
+
+def test_users_are_sharded_and_isolated(progress_file):
+    with progress.use_user("alice"):
+        progress.add_xp(30)
+    with progress.use_user("bob"):
+        progress.add_xp(5)
+    progress.add_xp(1)
+
+    store = progress._store()
+    assert store.path_for(DEFAULT_USER) == progress_file
+    assert store.path_for("alice").parent.parent.name == "users"
+    assert store.path_for("alice").exists()
+    with progress.use_user("alice"):
+        assert progress.load_progress()["xp"] == 30
+    assert progress.load_progress()["xp"] == 1
+
+
+def test_lru_serves_copies_and_sees_external_writes(tmp_path):
+    store = ProgressStore(tmp_path, cache_size=1)
+    store.write("u1", {"xp": 1})
+    doc = store.read("u1")
+    doc["xp"] = 999                      # kopie – cache zůstane čistá
+    assert store.read("u1") == {"xp": 1}
+
+    ProgressStore(tmp_path).write("u1", {"xp": 2})   # „jiný worker“
+    assert store.read("u1") == {"xp": 2}
+    store.write("u2", {"xp": 3})
+    assert list(store._cache) == ["u2"]
+
+
+@pytest.mark.skipif(progress_store.fcntl is None, reason="fcntl zámky jen na POSIXu")
+def test_concurrent_processes_do_not_lose_updates(tmp_path):
+    ctx = mp.get_context("fork")
+    procs = [ctx.Process(target=_bump_xp, args=(str(tmp_path), "carol", 15)) for _ in range(3)]
+    for pr in procs:
+        pr.start()
+    for pr in procs:
+        pr.join(30)
+    store = ProgressStore(tmp_path)
+    assert store.read("carol")["xp"] == 45
+
+
+def test_switch_to_binary_reads_existing_json(progress_file, tmp_path):
+    progress.configure_store(tmp_path)
+    progress.add_xp(60)
+    with progress.use_user("alice"):
+        progress.add_xp(7)
+
+    store = progress.configure_store(tmp_path, binary=True)
+    assert progress.load_progress()["xp"] == 60
+    with progress.use_user("alice"):
+        assert progress.load_progress()["xp"] == 7
+        progress.add_xp(1)
+    assert store.path_for("alice").suffix == ".bin" and store.path_for("alice").exists()
+    assert store.source_for("alice") == store.path_for("alice")
+
+    progress.add_xp(1)
+    assert (tmp_path / "progress.bin").exists()
+    assert progress.load_progress()["xp"] == 61
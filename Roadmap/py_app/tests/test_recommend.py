@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from py_app.core.models import Roadmap
+from py_app.core.recommend import Recommender
+
+
+def _roadmap() -> Roadmap:
+    return Roadmap(
+        tracks=[{"id": "t", "name": "T"}, {"id": "u", "name": "U"}],
+        nodes=[
+            {"id": "root", "label": "R", "track": "t", "tasks_all": ["x"]},
+            {"id": "hub", "label": "H", "track": "t", "prereqs": ["root"], "tasks_all": ["x", "y"]},
+            {"id": "leaf", "label": "L", "track": "t", "prereqs": ["root"], "tasks_all": ["x", "y"]},
+            {"id": "h1", "label": "H1", "track": "u", "prereqs": ["hub"]},
+            {"id": "h2", "label": "H2", "track": "u", "prereqs": ["hub"]},
+        ],
+    )
+
+
+def test_recommender_prefers_unblocking_and_partial_progress():
+    rec = Recommender(_roadmap())
+    assert rec.best() == "root"
+    assert rec.best("u") is None
+
+    rec.update({"root"})
+    # hub odemyká dva další uzly
+    assert rec.best("t") == "hub"
+
+    # skoro hotový leaf předběhne hub
+    rec.update({"root"}, {"leaf": 0b11})
+    assert [nid for nid, _ in rec.top(2)] == ["leaf", "hub"]
+
+    rec.update({"root", "hub", "leaf"})
+    assert rec.best("u") in {"h1", "h2"}
+    assert rec.best("t") is None
+
+
+def test_stale_heap_entries_are_compacted():
+    rec = Recommender(_roadmap())
+    rec.update({"root"})
+    for i in range(500):
+        rec.update({"root"}, {"leaf": i % 4})
+    assert len(rec._heaps[None]) <= 2 * len(rec._score) + 64
+    assert [nid for nid, _ in rec.top(2)] == ["leaf", "hub"]
+    assert rec.best("t") == "leaf"
+
+
+def test_top_pops_live_heap_and_update_limits_to_touched():
+    rec = Recommender(_roadmap())
+    rec.update({"root"})
+    size = len(rec._heaps[None])
+    assert [nid for nid, _ in rec.top(1)] == ["hub"]
+    assert len(rec._heaps[None]) <= size
+    assert rec.best() == "hub"
+
+    # dotčený uzel se přepočítá, netknutý mimo potomky ne
+    rec.update({"root"}, {"leaf": 0b11, "h1": 0b1}, touched={"leaf"})
+    assert rec._bits == {"leaf": 0b11}
+    assert [nid for nid, _ in rec.top(5)] == ["leaf", "hub"]
+    assert [nid for nid, _ in rec.top(5, "t")] == ["leaf", "hub"]
+
+    # bez touched se porovná celé done_bits, včetně zmizelých uzlů
+    rec.update({"root"}, {"h1": 0b1})
+    assert rec._bits == {"h1": 0b1}
+    assert rec.best() == "hub"
@@ -0,0 +1,41 @@
+from __future__ import annotations
+import pytest
+
+from py_app.core.registry import RoadmapRegistry
+from py_app.core.synthetic import write_roadmap
+
+
+def test_lazy_load_and_lru_eviction(tmp_path):
+    for name in ("alpha", "beta", "gamma"):
+        write_roadmap(tmp_path / f"{name}.json", 20, seed=len(name))
+    (tmp_path / "notes.txt").write_text("x", encoding="utf-8")
+
+    reg = RoadmapRegistry(tmp_path, capacity=2, use_compiled=False)
+    assert reg.ids() == ["alpha", "beta", "gamma"]
+    assert reg.loaded() == []
+
+    a = reg.get("alpha")
+    assert reg.get("alpha") is a
+    reg.get("beta")
+    reg.get("alpha")              # alpha je teď nejčerstvější
+    reg.get("gamma")
+    assert reg.loaded() == ["alpha", "gamma"]
+    assert reg.get("alpha") is a
+    assert reg.get("beta") is not None and "gamma" not in reg.loaded()
+
+
+def test_strings_are_shared_between_roadmaps(tmp_path):
+    write_roadmap(tmp_path / "one.json", 30, seed=1)
+    write_roadmap(tmp_path / "two.json", 30, seed=2)
+    reg = RoadmapRegistry(tmp_path, use_compiled=False)
+    one, two = reg.get("one"), reg.get("two")
+    assert one.nodes[3].id is two.nodes[3].id
+    assert one.tracks[0].id is two.tracks[0].id
+    assert one.index.node_by_id["n3"] is one.nodes[3]
+
+
+def test_unknown_roadmap_raises(tmp_path):
+    reg = RoadmapRegistry(tmp_path)
+    assert "missing" not in reg
+    with pytest.raises(KeyError):
+        reg.get("missing")
@@ -0,0 +1,46 @@
+from __future__ import annotations
+import datetime as dt
+import json
+
+from py_app.core import progress, review
+
+
+def test_done_task_enters_review_and_sm2_grows_interval():
+    p = {"tasks": {}}
+    today = dt.date(2026, 1, 1)
+    key = review.task_key("a", 0)
+    review.enroll(p, key, today)
+    assert review.due(p, today) == []
+    tomorrow = today + dt.timedelta(days=1)
+    assert review.due(p, tomorrow) == [key]
+
+    intervals = [review.grade(p, key, 5, tomorrow)["interval"] for _ in range(3)]
+    assert intervals == [1, 6, 16]
+    # špatná odpověď vrací na začátek, ease neklesne pod minimum
+    item = review.grade(p, key, 0, tomorrow)
+    assert item["interval"] == 1 and item["ease"] >= review.MIN_EASE
+    assert p["review_due"] == {item["due"]: [key]}
+
+
+def test_progress_layer_tracks_reviews(progress_file, small_roadmap):
+    progress.bind_roadmap(small_roadmap)
+    progress.set_task_done("a", 1, True)
+    p = progress.load_progress()
+    assert list(p["reviews"]) == ["a:1"]
+
+    # přetočíme termín na dnešek
+    progress.import_progress({**p, "reviews": {"a:1": {**p["reviews"]["a:1"], "due": dt.date.today().isoformat()}}})
+    assert progress.due_reviews() == [("a", 1)]
+    progress.review_task("a", 1, 4)
+    assert progress.due_reviews() == []
+
+    progress.set_task_done("a", 1, False)
+    assert progress.load_progress()["reviews"] == {}
+
+
+def test_legacy_doc_gets_review_queue_persisted_once(progress_file, small_roadmap):
+    progress.bind_roadmap(small_roadmap)
+    progress_file.write_text(json.dumps({"xp": 5, "tasks": {"a": {"tasks_done": [0], "completed": False}}}),
+                             encoding="utf-8")
+    assert list(progress.load_progress()["reviews"]) == ["a:0"]
+    assert "a:0" in json.loads(progress_file.read_text(encoding="utf-8"))["reviews"]
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+
+def test_index_lookups(small_roadmap):
+    idx = small_roadmap.index
+    assert small_roadmap.index is idx
+
+    assert idx.node_by_id["c"].label == "C"
+    assert [n.id for n in idx.track_nodes("math")] == ["a", "b"]
+    assert idx.ordinal == {"a": 0, "b": 1, "c": 0}
+    assert idx.pred["b"] == ("a",)
+    assert set(idx.succ["a"]) == {"b", "c"}
+    assert idx.topo_pos["a"] < idx.topo_pos["b"] and idx.topo_pos["a"] < idx.topo_pos["c"]
+    assert idx.track_color("math") == "#888888"
+    assert idx.label("missing") == "missing"
+
+
+def test_closure_queries():
+    from py_app.core.models import Roadmap
+
+    rm = Roadmap(
+        tracks=[{"id": "t", "name": "T"}],
+        nodes=[
+            {"id": "a", "label": "A", "track": "t"},
+            {"id": "b", "label": "B", "track": "t", "prereqs": ["a"]},
+            {"id": "c", "label": "C", "track": "t", "prereqs": ["b"]},
+            {"id": "d", "label": "D", "track": "t", "prereqs": ["a"]},
+            {"id": "e", "label": "E", "track": "t", "prereqs": ["c", "d"]},
+        ],
+    )
+    idx = rm.index
+    assert idx.missing_for("e", completed={"a"}) == ["b", "d", "c"]
+    assert set(idx.unblocks("b")) == {"c", "e"}
+    assert idx.shared_prereqs("c", "d") == ["a"]
+    assert idx.shared_prereqs("c", "e") == ["a", "b"]
+
+    # po úpravě uzlu se masky přestaví
+    rm.replace_node({"id": "d", "label": "D", "track": "t", "prereqs": ["c"]})
+    assert idx.missing_for("e", completed=()) == ["a", "b", "c", "d"]
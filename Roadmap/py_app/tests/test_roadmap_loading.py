@@ -0,0 +1,124 @@
+from __future__ import annotations
+import json
+import os
+import pickle
+
+import pytest
+
+from py_app.core import utils
+from py_app.core.utils import load_roadmap, roadmap_hash, COMPILED_SUFFIX
+
+
+@pytest.fixture
+def roadmap_file(tmp_path):
+    utils.clear_roadmap_cache()
+    path = tmp_path / "roadmap.json"
+    path.write_text(json.dumps({
+        "tracks": [{"id": "math", "name": "Matika"}],
+        "nodes": [
+            {"id": "a", "label": "A", "track": "math", "difficulty": "Beginner"},
+            {"id": "b", "label": "B", "track": "math", "prereqs": ["a"]},
+        ],
+    }), encoding="utf-8")
+    yield path
+    utils.clear_roadmap_cache()
+
+
+def test_cache_hits_until_file_changes(roadmap_file):
+    rm = load_roadmap(roadmap_file)
+    assert load_roadmap(roadmap_file) is rm
+    assert rm.nodes[0].difficulty == 1 and len(rm.edges) == 1
+
+    data = json.loads(roadmap_file.read_text(encoding="utf-8"))
+    data["nodes"][1]["label"] = "B2"
+    roadmap_file.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(roadmap_file, ns=(1, 1))
+    rm2 = load_roadmap(roadmap_file)
+    assert rm2 is not rm and rm2.nodes[1].label == "B2"
+    assert roadmap_hash(rm2) != roadmap_hash(rm)
+
+
+def test_compiled_artifact_skips_parsing(roadmap_file, monkeypatch):
+    rm = load_roadmap(roadmap_file, use_compiled=True)
+    assert rm._migrated_from is not None
+    assert roadmap_file.with_name(roadmap_file.name + COMPILED_SUFFIX).exists()
+    utils.clear_roadmap_cache()
+
+    def boom(*a, **k):
+        raise AssertionError("nemělo se parsovat")
+
+    monkeypatch.setattr(utils, "_parse_roadmap", boom)
+    cold = load_roadmap(roadmap_file, use_compiled=True)
+    assert cold is not rm
+    assert cold.model_dump() == rm.model_dump()
+    assert roadmap_hash(cold) == roadmap_hash(rm)
+
+
+def test_synthetic_roadmap_is_valid_dag(tmp_path):
+    from py_app.core.synthetic import write_roadmap
+
+    rm = load_roadmap(write_roadmap(tmp_path / "big.json", 500, seed=3), use_compiled=False)
+    assert len(rm.nodes) == 500 and rm.learning_paths
+    assert len(rm.topo_order) == 500
+
+
+def test_legacy_file_is_migrated_once_and_can_be_persisted(tmp_path):
+    from py_app.core.migrations import SCHEMA_VERSION
+
+    path = tmp_path / "legacy.json"
+    path.write_text(json.dumps({
+        "tracks": [{"id": "t", "name": "T"}],
+        "nodes": [
+            {"id": "a", "label": "A", "track": "t", "difficulty": "Advanced", "level": "x"},
+            {"id": "b", "label": "B", "track": "t", "prereqs": ["a"]},
+        ],
+        "learning_paths": [{"name": "p", "node_sequence": ["a", "b", "ghost"]}],
+    }), encoding="utf-8")
+
+    rm = load_roadmap(path, use_compiled=False, persist_migrated=True)
+    assert rm._migrated_from == 1
+    assert (rm.nodes[0].difficulty, rm.nodes[0].level) == (3, 1)
+    assert [(e.source, e.target) for e in rm.edges] == [("a", "b")]
+
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert next(iter(saved)) == "schema_version" and saved["schema_version"] == SCHEMA_VERSION
+
+    # aktuální verze jde rychlou cestou bez migrací
+    utils.clear_roadmap_cache()
+    again = load_roadmap(path, use_compiled=False)
+    assert again._migrated_from is None
+    assert again.model_dump() == rm.model_dump()
+
+
+def test_process_cache_is_bounded(roadmap_file, monkeypatch):
+    monkeypatch.setattr(utils, "_CACHE_SIZE", 2)
+    data = json.loads(roadmap_file.read_text(encoding="utf-8"))
+    for i in range(5):
+        data["nodes"][1]["label"] = f"B{i}"
+        roadmap_file.write_text(json.dumps(data), encoding="utf-8")
+        os.utime(roadmap_file, ns=(i, i))
+        load_roadmap(roadmap_file, use_compiled=False)
+    assert len(utils._ROADMAP_BY_HASH) == 2 and len(utils._ROADMAP_CACHE) == 1
+
+
+def test_compiled_artifact_only_for_migrated_sources(roadmap_file):
+    load_roadmap(roadmap_file)
+    assert not roadmap_file.with_name(roadmap_file.name + COMPILED_SUFFIX).exists()
+
+    # aktuální verze jde přes model_validate_json, artefakt by nic neušetřil
+    utils.clear_roadmap_cache()
+    load_roadmap(roadmap_file, use_compiled=True, persist_migrated=True)
+    utils.clear_roadmap_cache()
+    load_roadmap(roadmap_file, use_compiled=True)
+    assert not roadmap_file.with_name(roadmap_file.name + COMPILED_SUFFIX).exists()
+
+
+def test_compiled_artifact_is_plain_data(roadmap_file):
+    load_roadmap(roadmap_file, use_compiled=True)
+    compiled = roadmap_file.with_name(roadmap_file.name + COMPILED_SUFFIX)
+    assert compiled.read_bytes()[:4] == b"WQRB"
+
+    # podvržený pickle se nikdy nerozbalí – artefakt se jen ignoruje
+    compiled.write_bytes(pickle.dumps({"format": 3}))
+    utils.clear_roadmap_cache()
+    assert load_roadmap(roadmap_file, use_compiled=True).nodes[1].label == "B"
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+
+from py_app.core.models import Roadmap
+
+
+def _roadmap(prereqs):
+    return {
+        "tracks": [{"id": "t", "name": "T"}],
+        "nodes": [{"id": nid, "label": nid.upper(), "track": "t", "prereqs": p} for nid, p in prereqs.items()],
+    }
+
+
+def test_cycle_is_rejected_with_path():
+    with pytest.raises(ValueError) as exc:
+        Roadmap.model_validate(_roadmap({"a": [], "b": ["a", "d"], "c": ["b"], "d": ["c"]}))
+    assert "b -> c -> d -> b" in str(exc.value) or "c -> d -> b -> c" in str(exc.value) or "d -> b -> c -> d" in str(exc.value)
+
+
+def test_topo_order_stored_on_model(small_roadmap):
+    pos = small_roadmap.topo_pos
+    assert sorted(small_roadmap.topo_order) == ["a", "b", "c"]
+    assert pos["a"] < pos["b"] and pos["a"] < pos["c"]
+
+
+def test_replace_node_reorders_and_detects_cycle():
+    rm = Roadmap.model_validate(_roadmap({"a": [], "b": [], "c": ["b"], "d": []}))
+    # nový prereq d -> a, kde d je v pořadí až za a
+    rm.replace_node({"id": "a", "label": "A", "track": "t", "prereqs": ["d"]})
+    pos = rm.topo_pos
+    assert pos["d"] < pos["a"] and pos["b"] < pos["c"]
+    assert rm.index.succ["d"] == ("a",)
+
+    with pytest.raises(ValueError, match="cyklus"):
+        rm.replace_node({"id": "b", "label": "B", "track": "t", "prereqs": ["c"]})
+    # neúspěšná úprava nic nezměnila
+    assert rm.index.pred["b"] == () and rm.nodes[1].prereqs == []
+
+
+def test_replace_node_keeps_prereq_edges_in_sync():
+    data = _roadmap({"a": [], "b": ["a"], "c": []})
+    data["edges"] = [{"source": "a", "target": "b"}]
+    rm = Roadmap.model_validate(data)
+    rm.index   # index postavený před úpravou se musí přepojit na místě
+    rm.replace_node({"id": "b", "label": "B", "track": "t", "prereqs": ["c"]})
+    assert [(e.source, e.target) for e in rm.edges] == [("c", "b")]
+    assert rm.index.in_edges["b"] == ("c",) and rm.index.out_edges["a"] == ()
+    assert rm.index.out_edges["c"] == ("b",)
+
+    with pytest.raises(ValueError, match="cyklus"):
+        rm.replace_node({"id": "c", "label": "C", "track": "t", "prereqs": ["b"]})
+    assert [(e.source, e.target) for e in rm.edges] == [("c", "b")]
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import numpy as np
+
+from py_app.core import layout_algo
+from py_app.core.models import Roadmap
+from py_app.core.spatial import SpatialIndex, segments_in_rect
+from py_app.core.synthetic import generate_roadmap
+
+
+def _brute_rect(xy, x0, x1, y0, y1):
+    return np.flatnonzero((xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1))
+
+
+def test_rect_query_matches_brute_force():
+    rng = np.random.default_rng(7)
+    xy = rng.normal(size=(3000, 2)) * [40.0, 6.0]
+    index = SpatialIndex(xy)
+    for _ in range(100):
+        x0, x1 = rng.uniform(-150, 150, 2)
+        y0, y1 = rng.uniform(-25, 25, 2)
+        got = index.in_rect(x0, x1, y0, y1)
+        assert np.array_equal(got, _brute_rect(xy, min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1)))
+
+    assert len(index.in_rect(1e4, 2e4, 1e4, 2e4)) == 0
+    assert len(SpatialIndex(np.empty((0, 2))).in_rect(-1, 1, -1, 1)) == 0
+    # všechny body na jednom místě / na jedné přímce
+    assert SpatialIndex(np.zeros((4, 2))).in_rect(-1, 1, -1, 1).tolist() == [0, 1, 2, 3]
+    line = np.column_stack((np.arange(50.0), np.zeros(50)))
+    assert SpatialIndex(line).in_rect(10, 12, -1, 1).tolist() == [10, 11, 12]
+
+
+def test_nearest_hit_test():
+    rng = np.random.default_rng(3)
+    xy = rng.uniform(0, 100, size=(2000, 2))
+    index = SpatialIndex(xy)
+    for x, y in rng.uniform(0, 100, size=(50, 2)):
+        d = np.hypot(*(xy - (x, y)).T)
+        expected = int(np.argmin(d)) if d.min() <= 1.5 else None
+        assert index.nearest(x, y, 1.5) == expected
+    assert index.nearest(*xy[42], 0.01) == 42
+    assert index.nearest(-50, -50, 1.0) is None
+
+
+def test_segments_in_rect_uses_padding():
+    a = np.array([[0.0, 0.0], [10.0, 10.0], [-5.0, 0.5]])
+    b = np.array([[1.0, 1.0], [12.0, 12.0], [5.0, 0.5]])
+    assert segments_in_rect(a, b, 0.5, 2, 0.5, 2).tolist() == [True, False, True]
+    assert segments_in_rect(a, b, 2, 3, 2, 3).tolist() == [False, False, False]
+    assert segments_in_rect(a, b, 2, 3, 2, 3, pad=np.array([1.0, 0.0, 0.0])).tolist() == [True, False, False]
+
+
+def test_edge_culling_keeps_every_edge_crossing_the_view():
+    rm = Roadmap.model_validate(generate_roadmap(400, seed=5))
+    pos = layout_algo.serpentine_layout(rm)
+    assert pos.spatial() is pos.spatial()
+
+    view = layout_algo.Viewport(5.0, 15.0, 0.0, 4.0)
+    src, dst = layout_algo.prereq_edge_rows(rm)
+    vs, vd = layout_algo.visible_edge_rows(pos, src, dst, view)
+    assert 0 < len(vs) < len(src)
+
+    # hrany, jejichž vzorky padnou do výřezu, nesmí ořez zahodit
+    xs, ys = layout_algo.bezier_edges(pos.xy[src], pos.xy[dst], n=64)
+    inside = ((xs >= view.x0) & (xs <= view.x1) & (ys >= view.y0) & (ys <= view.y1)).any(axis=1)
+    kept = set(zip(vs.tolist(), vd.tolist()))
+    assert all((s, d) in kept for s, d, hit in zip(src.tolist(), dst.tolist(), inside) if hit)
+
+    fx, _ = layout_algo.roadmap_edge_xy(rm, view=view)
+    assert np.isnan(fx).sum() == len(vs)
+
+
+def test_cull_window_contains_view_and_is_stable_under_small_pan():
+    view = layout_algo.Viewport(-5.0, 5.0, -300.0, -290.0)
+    win = layout_algo.cull_window(view)
+    assert win.x0 < view.x0 and win.x1 > view.x1 and win.y0 < view.y0 and win.y1 > view.y1
+    panned = layout_algo.Viewport(-5.0, 5.0, -301.0, -291.0)
+    assert layout_algo.cull_window(panned) == win
@@ -0,0 +1,70 @@
+from __future__ import annotations
+import os
+
+import pytest
+
+from py_app.core import progress, storage
+from py_app.core.convert import main as convert_main
+from py_app.core.synthetic import write_roadmap
+from py_app.core.utils import load_roadmap, save_roadmap
+
+
+def test_binary_roadmap_roundtrip(tmp_path):
+    src = write_roadmap(tmp_path / "roadmap.json", 200, seed=4)
+    rm = load_roadmap(src, use_compiled=False, cache=False)
+    out = tmp_path / "roadmap.bin"
+    save_roadmap(rm, out)
+    assert storage.is_binary(out.read_bytes())
+    assert out.stat().st_size < src.stat().st_size
+    assert load_roadmap(out, use_compiled=False, cache=False).model_dump() == rm.model_dump()
+
+
+def test_corrupted_binary_is_rejected():
+    raw = bytearray(storage.dump_binary({"a": [1, 2, 3]}, storage.KIND_PROGRESS))
+    raw[-1] ^= 0xFF
+    with pytest.raises(ValueError, match="crc32"):
+        storage.load_binary(bytes(raw), storage.KIND_PROGRESS)
+    with pytest.raises(ValueError, match="druhu"):
+        storage.load_binary(storage.dump_binary({}, storage.KIND_ROADMAP), storage.KIND_PROGRESS)
+
+
+def test_failed_write_keeps_original(tmp_path, monkeypatch):
+    path = tmp_path / "doc.json"
+    storage.write_document(path, {"v": 1}, storage.KIND_PROGRESS)
+
+    def boom(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "fsync", boom)
+    with pytest.raises(OSError):
+        storage.write_document(path, {"v": 2}, storage.KIND_PROGRESS)
+    assert storage.decode_document(path.read_bytes(), storage.KIND_PROGRESS) == {"v": 1}
+    assert os.listdir(tmp_path) == ["doc.json"]
+
+
+def test_binary_progress_store_and_converter(tmp_path, progress_file, small_roadmap):
+    progress.configure_store(tmp_path / "bin", binary=True)
+    try:
+        progress.bind_roadmap(small_roadmap)
+        progress.mark_completed("a")
+        path = tmp_path / "bin" / "progress.bin"
+        assert storage.is_binary(path.read_bytes())
+        assert "a" in progress.load_progress()["completed_nodes"]
+
+        assert convert_main([str(path), str(tmp_path / "export.json")]) == 0
+        exported = storage.decode_document((tmp_path / "export.json").read_bytes(), storage.KIND_PROGRESS)
+        assert exported["completed_nodes"] == ["a"]
+    finally:
+        progress.configure_store(tmp_path)
+
+
+def test_atomic_write_permissions(tmp_path):
+    ref = tmp_path / "ref"
+    ref.write_bytes(b"")
+    new = tmp_path / "new.json"
+    storage.atomic_write_bytes(new, b"{}")
+    assert new.stat().st_mode & 0o777 == ref.stat().st_mode & 0o777   # podle umask jako open()
+
+    new.chmod(0o640)
+    storage.atomic_write_bytes(new, b"[]")
+    assert new.stat().st_mode & 0o777 == 0o640 and new.read_bytes() == b"[]"
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
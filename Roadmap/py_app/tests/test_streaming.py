@@ -0,0 +1,96 @@
+from __future__ import annotations
+import json
+
+import pytest
+
+from py_app.core.models import Link
+from py_app.core.roadmap_index import RoadmapIndex
+from py_app.core.streaming import ensure_bodies, is_lazy, load_roadmap_streaming
+from py_app.core.synthetic import write_roadmap
+from py_app.core.utils import load_roadmap, save_roadmap
+
+
+@pytest.fixture
+def current_file(tmp_path):
+    """Syntetická roadmapa uložená v aktuálním formátu (s diakritikou přes hranice bloků)."""
+    src = write_roadmap(tmp_path / "src.json", 300, seed=3)
+    rm = load_roadmap(src, use_compiled=False, cache=False)
+    rm.nodes[7].links = [Link(title="Čtení", url="https://example.com/ř")]
+    path = tmp_path / "roadmap.json"
+    save_roadmap(rm, path)
+    return path, rm
+
+
+def test_streaming_matches_regular_load(current_file):
+    path, expected = current_file
+    rm = load_roadmap_streaming(path, chunk_size=1024)
+    assert rm.model_dump() == expected.model_dump()
+    assert rm.topo_order and rm.index.node_by_id["n5"].label == "Lekce 5"
+
+
+def test_streaming_builds_the_index_while_reading(current_file):
+    path, _ = current_file
+    rm = load_roadmap_streaming(path, chunk_size=1024)
+    assert rm._index is not None
+    built = RoadmapIndex(rm)
+    idx = rm.index
+    assert idx.node_by_id == built.node_by_id and idx.position == built.position
+    assert list(idx.nodes_by_track) == list(built.nodes_by_track)
+    assert idx.nodes_by_track == built.nodes_by_track and idx.ordinal == built.ordinal
+    assert idx.succ == built.succ and idx.pred == built.pred
+
+
+def test_failed_body_read_keeps_spans(current_file, monkeypatch):
+    path, expected = current_file
+    rm = load_roadmap_streaming(path, lazy=True, chunk_size=1024)
+    path.write_text("{ rozbitý", encoding="utf-8")     # soubor se změnil a nejde načíst
+    with pytest.raises(ValueError):
+        ensure_bodies(rm, ["n7"])
+    assert is_lazy(rm) and "n7" in rm._lazy_bodies.spans
+
+    save_roadmap(expected, path)
+    assert ensure_bodies(rm, ["n7"]) == 1
+    assert rm.nodes[7].links == expected.nodes[7].links
+
+
+def test_lazy_mode_reads_bodies_on_demand(current_file):
+    path, expected = current_file
+    rm = load_roadmap_streaming(path, lazy=True, chunk_size=1024)
+    assert is_lazy(rm)
+    assert rm.nodes[7].desc == "" and rm.nodes[7].links == []
+    assert rm.nodes[7].tasks_all == expected.nodes[7].tasks_all
+
+    assert ensure_bodies(rm, ["n7", "n8"]) == 2
+    assert rm.nodes[7].desc == expected.nodes[7].desc
+    assert rm.nodes[7].links == expected.nodes[7].links
+    assert ensure_bodies(rm, ["n7"]) == 0
+
+    ensure_bodies(rm)
+    assert not is_lazy(rm)
+    assert rm.model_dump() == expected.model_dump()
+
+
+def test_duplicate_node_is_reported_with_position(tmp_path):
+    path = tmp_path / "roadmap.json"
+    path.write_text(json.dumps({
+        "schema_version": 2,
+        "tracks": [{"id": "t", "name": "T"}],
+        "nodes": [{"id": "a", "label": "A", "track": "t"}, {"id": "a", "label": "A2", "track": "t"}],
+    }), encoding="utf-8")
+    with pytest.raises(ValueError, match=r"nodes\[1\].*duplicitní id 'a'"):
+        load_roadmap_streaming(path)
+
+
+def test_old_schema_falls_back_to_migrations(tmp_path):
+    path = write_roadmap(tmp_path / "v1.json", 40, seed=1)
+    rm = load_roadmap_streaming(path, lazy=True)
+    assert rm._migrated_from == 1 and not is_lazy(rm)
+
+
+def test_saving_lazy_roadmap_keeps_bodies(current_file, tmp_path):
+    path, expected = current_file
+    rm = load_roadmap_streaming(path, lazy=True)
+    out = tmp_path / "out.json"
+    save_roadmap(rm, out)
+    assert not is_lazy(rm)
+    assert load_roadmap(out, use_compiled=False, cache=False).model_dump() == expected.model_dump()
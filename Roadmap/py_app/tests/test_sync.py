@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from py_app.core import progress
+from py_app.core.sync import FileSyncRemote, sync_progress
+
+
+def _state(user):
+    with progress.use_user(user):
+        p = progress.load_progress()
+    tasks = {k: v["tasks_done"] for k, v in p["tasks"].items() if v["tasks_done"]}
+    return p["xp"], sorted(p["completed_nodes"]), sorted(p["badges"]), tasks
+
+
+def test_devices_converge_through_deltas(progress_file, small_roadmap, tmp_path):
+    progress.bind_roadmap(small_roadmap)
+    remote = FileSyncRemote(tmp_path / "remote.json")
+
+    with progress.use_user("laptop"):
+        progress.set_task_done("a", 0, True)
+        progress.set_task_done("a", 1, True)
+        progress.add_xp(95)
+    with progress.use_user("phone"):
+        progress.mark_completed("b", xp_award=10)
+        progress.set_task_done("c", 0, True)
+
+    with progress.use_user("laptop"):
+        assert sync_progress(remote)["pulled"] == 0
+    with progress.use_user("phone"):
+        stats = sync_progress(remote)
+        assert stats["pulled"] > 0
+        progress.set_task_done("a", 1, False)        # pozdější zápis vyhrává (LWW)
+        sync_progress(remote)
+    with progress.use_user("laptop"):
+        sync_progress(remote)
+        # druhé kolo už nic nepřenáší
+        assert sync_progress(remote) == {"pulled": 0, "pushed": 0}
+        assert progress.load_progress()["sync"]["ops"] == []
+
+    assert _state("laptop") == _state("phone")
+    xp, completed, badges, tasks = _state("laptop")
+    assert xp == 105 and completed == ["b"] and "xp_100" in badges
+    assert tasks == {"a": [0], "c": [0]}
+    assert progress.track_progress("math")["done"] == 0   # výchozí uživatel nic nedělal
+
+
+def test_log_stays_empty_until_first_sync(progress_file, small_roadmap):
+    progress.bind_roadmap(small_roadmap)
+    for _ in range(20):
+        progress.set_task_done("a", 0, True)
+        progress.set_task_done("a", 0, False)
+    assert "sync" not in progress.load_progress()
+
+
+def test_shared_history_is_not_double_counted(progress_file, small_roadmap, tmp_path):
+    progress.bind_roadmap(small_roadmap)
+    progress.add_xp(60)
+    progress.set_task_done("a", 0, True)
+    doc = progress.load_progress()
+    for user in ("laptop", "phone"):             # stejný soubor zkopírovaný na dvě zařízení
+        with progress.use_user(user):
+            progress.import_progress(dict(doc))
+
+    remote = FileSyncRemote(tmp_path / "remote.json")
+    for user in ("laptop", "phone", "laptop"):
+        with progress.use_user(user):
+            sync_progress(remote)
+    with progress.use_user("phone"):
+        progress.add_xp(5)
+        sync_progress(remote)
+    with progress.use_user("laptop"):
+        sync_progress(remote)
+
+    assert _state("laptop") == _state("phone")
+    assert _state("laptop")[0] == 65
+
+
+def _fork_and_diverge(remote, copy, gains):
+    progress.add_xp(100)
+    doc = copy()
+    for user, gain in gains.items():
+        with progress.use_user(user):
+            progress.import_progress(dict(doc))
+            progress.add_xp(gain)                 # ještě před první synchronizací
+    for user in (*gains, *gains):
+        with progress.use_user(user):
+            sync_progress(remote)
+
+
+def test_xp_gained_after_export_is_summed(progress_file, small_roadmap, tmp_path):
+    progress.bind_roadmap(small_roadmap)
+    remote = FileSyncRemote(tmp_path / "remote.json")
+    _fork_and_diverge(remote, progress.export_progress, {"laptop": 20, "phone": 30})
+
+    assert _state("laptop") == _state("phone")
+    assert _state("laptop")[0] == 150
+
+    # zdroj exportu se připojí později: započte se jen jeho přírůstek po exportu
+    progress.add_xp(10)
+    sync_progress(remote)
+    assert progress.load_progress()["xp"] == 160
+    with progress.use_user("phone"):
+        sync_progress(remote)
+    assert _state("phone")[0] == 160
+
+
+def test_unmarked_copies_merge_xp_as_max(progress_file, small_roadmap, tmp_path):
+    # známé omezení: bez značky z exportu nejde poznat společnou část historie
+    progress.bind_roadmap(small_roadmap)
+    remote = FileSyncRemote(tmp_path / "remote.json")
+    _fork_and_diverge(remote, progress.load_progress, {"laptop": 20, "phone": 30})
+
+    assert _state("laptop") == _state("phone")
+    assert _state("laptop")[0] == 130
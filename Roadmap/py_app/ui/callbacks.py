@@ -4,28 +4,63 @@ from dash import Output, Input, State, MATCH, ALL, no_update, ctx
 
 from py_app.core.models import Roadmap, Track, Node
 from py_app.core.utils import category_maps
-from py_app.ui.layout import make_category_figure
+from py_app.core.progress import progress_snapshot
+from py_app.core.recommend import Recommender
+from py_app.core.hot_reload import RELOAD_LOCK, add_reload_listener
+from py_app.ui.layout import lod_key, make_category_figure
 
 
+def _point_lesson_index(point: Dict[str, Any]) -> int:
+    # u velkých tracků figura kreslí jen uzly kolem výřezu → pointIndex je lokální,
+    # globální index lekce nese customdata[1]
+    custom = point.get("customdata")
+    return int(custom[1]) if custom else int(point["pointIndex"])
+
 def _extract_hover_index(hoverData: Optional[Dict[str, Any]]) -> Optional[int]:
     try:
         pts = (hoverData or {}).get("points") or []
-        return int(pts[0]["pointIndex"]) if pts else None
+        return _point_lesson_index(pts[0]) if pts else None
     except Exception:
         return None
 
 def _extract_click_index(clickData: Optional[Dict[str, Any]]) -> Optional[int]:
     try:
         pts = (clickData or {}).get("points") or []
-        return int(pts[0]["pointIndex"]) if pts else None
+        return _point_lesson_index(pts[0]) if pts else None
     except Exception:
         return None
 
+def _json_key(value: Any) -> Any:
+    """Hodnota v podobě, v jaké se vrátí z dcc.Store (tuple → list)."""
+    if isinstance(value, (list, tuple)):
+        return [_json_key(v) for v in value]
+    return value
+
 def register_callbacks(app, roadmap: Roadmap):
 
     _, id_to_color, _ = category_maps(roadmap)
-    track_by_id: Dict[str, Track] = {t.id: t for t in roadmap.tracks}
-    lessons_by_track: Dict[str, List[Node]] = {t.id: [n for n in roadmap.nodes if n.track==t.id] for t in roadmap.tracks}
+    recommender = Recommender(roadmap)
+
+    # index čteme až při volání callbacku – po hot-reloadu může být nový.
+    # Callbacky běží ve vláknech requestů → model čtou pod RELOAD_LOCK
+    # (reload ho přepisuje na místě); figury se staví až z kopie mimo zámek.
+    def track_by_id() -> Dict[str, Track]:
+        return roadmap.index.track_by_id
+
+    def lessons_by_track() -> Dict[str, List[Node]]:
+        return roadmap.index.nodes_by_track
+
+    def _on_reload(rm: Roadmap, diff) -> None:
+        nonlocal recommender, id_to_color
+        if rm is not roadmap:
+            return
+        _, id_to_color, _ = category_maps(roadmap)
+        if diff.structure or diff.prereqs_changed:
+            recommender = Recommender(roadmap)
+        else:
+            recommender.refresh(diff.changed)
+
+    add_reload_listener(_on_reload)
 
     @app.callback(
         Output("active-category","data"),
@@ -58,39 +93,53 @@ def register_callbacks(app, roadmap: Roadmap):
         cur["focus"] = None if cur.get("focus")==idx else idx
         return cur
 
-    # hover/focus -> rebuild
+    # hover/focus/zoom -> rebuild; poslední úroveň detailu si drží klient
+    # (cat-lod Store) – posun beze změny zoomu / okna ořezu figuru nepřestaví
     @app.callback(
         Output({"type":"cat-graph","category":MATCH},"figure"),
+        Output({"type":"cat-lod","category":MATCH},"data"),
         Input("active-category","data"),
         Input({"type":"cat-graph","category":MATCH},"hoverData"),
         Input({"type":"cat-state","category":MATCH},"data"),
+        Input({"type":"cat-graph","category":MATCH},"relayoutData"),
+        State({"type":"cat-lod","category":MATCH},"data"),
         State({"type":"cat-graph","category":MATCH},"id"),
         prevent_initial_call=True
     )
-    def rebuild_on_interaction(active_cat, hoverData, cat_state, myid):
-        if myid["category"] != active_cat: return no_update
-        tr = track_by_id[active_cat]
-        lessons = lessons_by_track[active_cat]
-        color = tr.color or id_to_color.get(tr.id, "#8ab4ff")
+    def rebuild_on_interaction(active_cat, hoverData, cat_state, relayoutData, last_lod, myid):
+        if myid["category"] != active_cat: return no_update, no_update
+        with RELOAD_LOCK:
+            tr = track_by_id()[active_cat]
+            lessons = list(lessons_by_track()[active_cat])
+            color = tr.color or id_to_color.get(tr.id, "#8ab4ff")
+        # přes Store jde JSON → tuple z lod_key porovnáváme jako list
+        key = _json_key(lod_key(lessons, relayoutData))
+        zoom_only = all(t["prop_id"].endswith(".relayoutData") for t in ctx.triggered)
+        if zoom_only and last_lod == key:
+            return no_update, no_update
         hover_idx = _extract_hover_index(hoverData)
         focus_idx = (cat_state or {}).get("focus")
-        return make_category_figure(tr, lessons, color, hover_idx=hover_idx, focus_idx=focus_idx)
+        return make_category_figure(tr, lessons, color, hover_idx=hover_idx, focus_idx=focus_idx,
+                                    relayout=relayoutData), key
 
     # přepnutí tabu -> základní figure
     @app.callback(
         Output({"type":"cat-graph","category":MATCH},"figure", allow_duplicate=True),
+        Output({"type":"cat-lod","category":MATCH},"data", allow_duplicate=True),
         Input("active-category","data"),
         State({"type":"cat-graph","category":MATCH},"id"),
         prevent_initial_call=True
     )
     def rebuild_on_tab_switch(active_cat, myid):
-        if myid["category"] != active_cat: return no_update
-        tr = track_by_id[active_cat]
-        lessons = lessons_by_track[active_cat]
-        color = tr.color or id_to_color.get(tr.id, "#8ab4ff")
-        return make_category_figure(tr, lessons, color)
+        if myid["category"] != active_cat: return no_update, no_update
+        with RELOAD_LOCK:
+            tr = track_by_id()[active_cat]
+            lessons = list(lessons_by_track()[active_cat])
+            color = tr.color or id_to_color.get(tr.id, "#8ab4ff")
+        # základní figura bez zoomu → uložený klíč už neplatí
+        return make_category_figure(tr, lessons, color), None
 
-    # Pokračovat -> fokus na první 'available' (zatím index 0) + konfety signál
+    # Pokračovat -> fokus na doporučený dostupný uzel tracku + konfety signál
     @app.callback(
         Output({"type":"cat-state","category":MATCH},"data", allow_duplicate=True),
         Output({"type":"confetti","category":MATCH},"data", allow_duplicate=True),
@@ -101,7 +150,11 @@ def register_callbacks(app, roadmap: Roadmap):
     def continue_focus(n_clicks, cur):
         if not n_clicks: return no_update, no_update
         cur = (cur or {})
-        cur["focus"] = 0  # TODO: najdi první skutečně dostupný uzel dle progressu
+        snap = progress_snapshot()
+        with RELOAD_LOCK:
+            recommender.update_snapshot(snap)
+            nid = recommender.best(ctx.triggered_id["category"])
+            cur["focus"] = roadmap.index.ordinal[nid] if nid is not None else 0
         # pošleme krátký signál do Store -> assets/confetti.js to zachytí
         signal = {"burst": True, "ts": n_clicks}
         return cur, signal
@@ -114,5 +167,5 @@ def register_callbacks(app, roadmap: Roadmap):
     )
     def update_cat_meta(active_cat, myid):
         if myid["category"] != active_cat: return ""
-        lessons = lessons_by_track[active_cat]
-        return f"{len(lessons)} lekcí"
+        with RELOAD_LOCK:
+            return f"{len(lessons_by_track()[active_cat])} lekcí"
@@ -1,11 +1,17 @@
 from __future__ import annotations
 from typing import Dict, Any, List, Tuple, Optional
+from functools import lru_cache
 import math
+import numpy as np
 import plotly.graph_objects as go
 from dash import html, dcc
 
 from py_app.core.models import Roadmap, Track, Node
 from py_app.core.utils import category_maps
+from py_app.core.layout_algo import (
+    CULL_MIN_NODES, Viewport, circle_steps, cull_window, lod_tier, ring_xy, viewport_from_relayout,
+)
+from py_app.core.spatial import SpatialIndex
 
 
 BG = "rgba(0,0,0,0)"
@@ -49,11 +55,41 @@ def _s_curve_points(n: int, step_y: float = 3.2, amp: float = 2.25):
         pts.append((x,y))
     return pts
 
-def _ring_circle(xc: float, yc: float, r: float = RING_R, steps: int = 120):
-    th = [k * (2 * math.pi / steps) for k in range(steps + 1)]
-    xs = [xc + r * math.cos(t) for t in th]
-    ys = [yc + r * math.sin(t) for t in th]
-    return xs, ys
+def _figure_view(pts: List[Tuple[float, float]], relayout: Optional[Dict[str, Any]] = None) -> Viewport:
+    """Výchozí výřez figury (všechny uzly + okraj), případně přiblížený podle relayoutData."""
+    pad = 2.8
+    xs = [p[0] for p in pts]; ys = [p[1] for p in pts]
+    xr = (min(xs)-pad, max(xs)+pad) if xs else (-4, 4)
+    yr = (min(ys)-pad, max(ys)+pad) if ys else (-12, 2)
+    return viewport_from_relayout(relayout, Viewport(xr[0], xr[1], yr[0], yr[1]))
+
+@lru_cache(maxsize=16)
+def _curve_index(n: int) -> SpatialIndex:
+    return SpatialIndex(np.array(_s_curve_points(n), dtype=float).reshape(-1, 2))
+
+def _visible_rows(pts: List[Tuple[float, float]], relayout: Optional[Dict[str, Any]] = None) -> Tuple[range, Optional[Viewport]]:
+    """
+    Uzly, které se kreslí: u velkých tracků jen ty v okně kolem výřezu
+    (+ soused na každé straně, aby spline cesta navazovala za okraj).
+    """
+    n = len(pts)
+    if n < CULL_MIN_NODES:
+        return range(n), None
+    window = cull_window(_figure_view(pts, relayout))
+    rows = _curve_index(n).in_rect(window.x0, window.x1, window.y0, window.y1)
+    if not len(rows):
+        return range(0), window
+    # body křivky jdou po y monotónně → viditelné uzly tvoří souvislý úsek
+    return range(max(0, int(rows[0]) - 1), min(n, int(rows[-1]) + 2)), window
+
+def lod_key(lessons: List[Node], relayout: Optional[Dict[str, Any]] = None) -> Tuple[Any, ...]:
+    """Podle čeho se liší geometrie figury při zoomu – beze změny klíče netřeba překreslovat."""
+    pts = _s_curve_points(len(lessons))
+    view = _figure_view(pts, relayout)
+    tier = lod_tier(view)
+    _, window = _visible_rows(pts, relayout)
+    win = None if window is None else (window.x0, window.x1, window.y0, window.y1)
+    return tier.name, circle_steps(RING_R, view.tolerance(tier.tolerance_px)), win
 
 def _status_color(status: str) -> str:
     return COL_DONE if status == "done" else (COL_AVAIL if status == "available" else COL_LOCKED)
@@ -97,18 +133,28 @@ def make_category_figure(
     lessons: List[Node],
     color_hex: str,
     hover_idx: Optional[int] = None,
-    focus_idx: Optional[int] = None
+    focus_idx: Optional[int] = None,
+    relayout: Optional[Dict[str, Any]] = None
 ) -> go.Figure:
     pts = _s_curve_points(len(lessons))
+    # úroveň detailu podle aktuálního zoomu: hustota kružnic z tolerance v pixelech,
+    # ikony jen když jsou uzly dost velké, aby byly vidět
+    default_view = _figure_view(pts)
+    view = _figure_view(pts, relayout)
+    tier = lod_tier(view)
+    tol = view.tolerance(tier.tolerance_px)
+    # velké tracky: jen uzly kolem výřezu; indexy (hover/focus, customdata[1]) zůstávají globální
+    rows, _ = _visible_rows(pts, relayout)
     items=[]
-    for (x,y), node in zip(pts, lessons):
+    for i in rows:
+        (x,y), node = pts[i], lessons[i]
         items.append({
-            "x": x, "y": y, "label": node.label, "status": "locked",
+            "x": x, "y": y, "label": node.label, "status": "available" if i == 0 else "locked",
             "node_id": node.id, "desc": node.desc or "", "estimate": node.estimate or "",
             "tasks_count": len(node.tasks_all or [])
         })
-    if items:
-        items[0]["status"] = "available"
+    hover_at = hover_idx - rows.start if hover_idx is not None and hover_idx in rows else None
+    focus_at = focus_idx - rows.start if focus_idx is not None and focus_idx in rows else None
 
     xs=[p["x"] for p in items]; ys=[p["y"] for p in items]
     clr = color_hex or "#8ab4ff"
@@ -125,10 +171,7 @@ def make_category_figure(
         line=dict(color=clr, width=8, shape="spline"),
         hoverinfo="skip", showlegend=False))
 
-    ring_x=[]; ring_y=[]
-    for it in items:
-        rx, ry = _ring_circle(it["x"], it["y"])
-        ring_x += rx + [None]; ring_y += ry + [None]
+    ring_x, ring_y = ring_xy(list(zip(xs, ys)), RING_R, circle_steps(RING_R, tol))
     traces.append(go.Scatter(x=ring_x, y=ring_y, mode="lines",
         line=dict(color=COL_RING, width=RING_W),
         hoverinfo="skip", showlegend=False))
@@ -136,8 +179,8 @@ def make_category_figure(
     halo_sizes=[]
     for i in range(len(items)):
         base = NODE_R + NODE_GLOW
-        if i == focus_idx: base += FOCUS_BOOST + 2
-        elif i == hover_idx: base += HOVER_BOOST
+        if i == focus_at: base += FOCUS_BOOST + 2
+        elif i == hover_at: base += HOVER_BOOST
         halo_sizes.append(base)
     traces.append(go.Scatter(x=xs, y=ys, mode="markers",
         marker=dict(size=halo_sizes, color=glow, line=dict(width=0)),
@@ -145,31 +188,29 @@ def make_category_figure(
 
     sizes=[]; fill=[]; custom=[]
     for i,it in enumerate(items):
-        s = NODE_R + (FOCUS_BOOST if i==focus_idx else HOVER_BOOST if i==hover_idx else 0)
+        s = NODE_R + (FOCUS_BOOST if i==focus_at else HOVER_BOOST if i==hover_at else 0)
         sizes.append(s); fill.append(_status_color(it["status"]))
-        custom.append([it["node_id"], i, it["label"], track.name, it["desc"], it["estimate"], it["tasks_count"]])
+        custom.append([it["node_id"], rows.start + i, it["label"], track.name, it["desc"], it["estimate"], it["tasks_count"]])
     traces.append(go.Scatter(x=xs, y=ys, mode="markers",
         marker=dict(size=sizes, color=fill, line=dict(width=0)),
         hovertemplate="%{customdata[2]}<extra></extra>",
         customdata=custom, showlegend=False))
 
-    if focus_idx is not None and 0 <= focus_idx < len(items):
-        fx, fy = xs[focus_idx], ys[focus_idx]
-        th=[k*(2*math.pi/140) for k in range(141)]
-        ring_fx=[fx + (RING_R+0.22)*math.cos(t) for t in th]
-        ring_fy=[fy + (RING_R+0.22)*math.sin(t) for t in th]
+    if focus_at is not None:
+        fx, fy = xs[focus_at], ys[focus_at]
+        ring_fx, ring_fy = ring_xy([(fx, fy)], RING_R+0.22, circle_steps(RING_R+0.22, tol, max_steps=140))
         traces.append(go.Scatter(x=ring_fx, y=ring_fy, mode="lines",
             line=dict(color=_rgba("#ffffff",0.85), width=FOCUS_RING),
             hoverinfo="skip", showlegend=False))
 
     images=[]
-    for it in items:
+    for it in (items if tier.decorations else ()):
         images.append(dict(source=f"/assets/icons/book.png", xref="x", yref="y",
             x=it["x"], y=it["y"], sizex=0.58, sizey=0.58, xanchor="center", yanchor="middle", layer="above"))
 
     annotations=[]
-    if hover_idx is not None and 0 <= hover_idx < len(items):
-        hx,hy = xs[hover_idx], ys[hover_idx]; it = items[hover_idx]
+    if hover_at is not None:
+        hx,hy = xs[hover_at], ys[hover_at]; it = items[hover_at]
         desc = (it["desc"] or "").strip()
         if len(desc)>120: desc=desc[:117]+"…"
         meta=[]
@@ -185,9 +226,8 @@ def make_category_figure(
             bordercolor="rgba(0,0,0,0.25)", borderwidth=1, borderpad=6, opacity=0.96
         ))
 
-    pad=2.8
-    xr=(min(xs)-pad, max(xs)+pad) if xs else (-4,4)
-    yr=(min(ys)-pad, max(ys)+pad) if ys else (-12,2)
+    xr=(default_view.x0, default_view.x1)
+    yr=(default_view.y0, default_view.y1)
 
     fig = go.Figure(traces)
     fig.update_layout(
@@ -203,8 +243,9 @@ def make_category_figure(
 def build_layout(roadmap: Roadmap) -> html.Div:
     _, id_to_color, _ = category_maps(roadmap)
     panes=[]
+    index = roadmap.index
     for tr in roadmap.tracks:
-        lessons=[n for n in roadmap.nodes if n.track==tr.id]
+        lessons=index.track_nodes(tr.id)
         header=_category_header(tr, lessons)
         fig=make_category_figure(tr, lessons, color_hex=(tr.color or id_to_color.get(tr.id, "#8ab4ff")))
         panes.append(
@@ -219,6 +260,7 @@ def build_layout(roadmap: Roadmap) -> html.Div:
                     ),
                     dcc.Store(id={"type":"cat-state","category":tr.id}, data={"focus": None}),
                     dcc.Store(id={"type":"confetti","category":tr.id}),  # signal pro konfety
+                    dcc.Store(id={"type":"cat-lod","category":tr.id}),   # poslední lod_key (per klient)
                 ],
                 id={"type":"tab-pane","category":tr.id}, className="tab-pane"
             )